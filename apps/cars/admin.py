@@ -2,6 +2,8 @@
 # apps/cars/admin.py
 from django.contrib import admin
 
+from core.search import car_search_filter, with_car_search_columns
+
 from .models import Car
 
 
@@ -9,3 +11,12 @@ from .models import Car
 class CarAdmin(admin.ModelAdmin):
     list_display = ("id", "vin", "make", "model", "year_of_manufacture", "owner", "created_at")
     search_fields = ("vin", "make", "model", "owner__username")
+    list_select_related = ("owner",)
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Trigram-indexed lookups (core.search) instead of icontains scans joined to auth_user.
+        term = " ".join(search_term.split())
+        if not term:
+            return queryset, False
+        return with_car_search_columns(queryset).filter(car_search_filter(term)), False
@@ -0,0 +1,112 @@
+"""
+Async (ASGI) variants of the read-only car endpoints.
+
+The gateway fans out many validity and history lookups per quote. Under an
+ASGI server these views wait on the database and cache without holding a
+worker thread per in-flight request. They return the same payloads as the
+DRF actions in views.py, but skip DRF's sync request/response machinery:
+authentication is done here (cached JWT bearer token or session, like the
+DRF defaults) and responses are plain JsonResponse objects.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.cars import cache as history_cache
+from apps.cars.models import Car
+from apps.cars.views import CarService
+from apps.policies.coverage import coverage_index
+from apps.policies.models import InsurancePolicy
+from core.authentication import aresolve_user
+from core.dates import parse_date, parse_date_window
+from core.routing import read_alias_for, reading_from
+from core.scoping import scope_to_owner
+
+NOT_AUTHENTICATED = "Authentication credentials were not provided."
+CAR_NOT_FOUND = "No Car matches the given query."
+
+
+async def authenticate(request):
+    """Return the active user behind a JWT bearer token or session, else None."""
+    parts = request.headers.get("Authorization", "").split()
+    if parts:
+        if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+            return None
+        try:
+            token = AccessToken(parts[1])
+        except TokenError:
+            return None
+        user = await aresolve_user(token.get(jwt_settings.USER_ID_CLAIM))
+        return user if user is not None and user.is_active else None
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def async_api_view(view):
+    """
+    Authenticate the request, read from a replica when one is fresh enough
+    (core.routing) and turn DRF ValidationErrors into 400 responses.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({"detail": NOT_AUTHENTICATED}, status=401)
+        request.user = user
+        try:
+            alias = await sync_to_async(read_alias_for)(user) if settings.DATABASE_REPLICAS else None
+            with reading_from(alias):
+                return await view(request, *args, **kwargs)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400, safe=False)
+
+    return wrapper
+
+
+@async_api_view
+async def insurance_valid(request, pk):
+    """GET /api/async/cars/{carId}/insurance-valid?date=YYYY-MM-DD"""
+    date_str = request.GET.get("date")
+    date_obj = parse_date(date_str)
+
+    cars = scope_to_owner(Car.objects.filter(pk=pk), request.user)
+    if settings.COVERAGE_INDEX_ENABLED:
+        if not await cars.aexists():
+            return JsonResponse({"detail": CAR_NOT_FOUND}, status=404)
+        valid = await sync_to_async(coverage_index.is_covered)(pk, date_obj)
+    else:
+        # Existence and coverage in one round trip.
+        covering = InsurancePolicy.objects.filter(car=OuterRef("pk"), coverage__contains=date_obj)
+        valid = await (
+            cars.annotate(valid=Exists(covering)).values_list("valid", flat=True).afirst()
+        )
+        if valid is None:
+            return JsonResponse({"detail": CAR_NOT_FOUND}, status=404)
+
+    return JsonResponse({"carId": pk, "date": date_str, "valid": valid})
+
+
+@async_api_view
+async def car_history(request, pk):
+    """GET /api/async/cars/{carId}/history[?from=YYYY-MM-DD&to=YYYY-MM-DD]"""
+    window = parse_date_window(request.GET)
+    if not await scope_to_owner(Car.objects.filter(pk=pk), request.user).aexists():
+        return JsonResponse({"detail": CAR_NOT_FOUND}, status=404)
+
+    async def load():
+        policies, claims = CarService.history_querysets(pk, window)
+        return CarService.format_car_history([row async for row in policies], [row async for row in claims])
+
+    history = await history_cache.aget_car_history(pk, load, window)
+    return JsonResponse(history, safe=False)
@@ -0,0 +1,82 @@
+"""
+Read-through cache for car history.
+
+Entries are keyed by car id and the car's history version stamp. Writers
+bump the stamp (see apps.policies.signals / apps.claims.signals), so an
+entry computed from rows that have since changed is simply never read
+again and expires on its own.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routing import primary_reads
+from core.versioning import aget_version, bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "history"
+HITS_KEY = "stats:history_cache:hits"
+MISSES_KEY = "stats:history_cache:misses"
+
+
+def _history_key(car_id, version, window):
+    start, end = window
+    if start is None and end is None:
+        return f"history:{car_id}:{version}"
+    return f"history:{car_id}:{version}:{start or ''}:{end or ''}"
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_car_history(car_id, loader, window=(None, None)):
+    """
+    Return the cached history for a car (limited to the (from, to) date
+    ``window``, if any), calling ``loader()`` on a miss.
+    """
+    key = _history_key(car_id, get_version(VERSION_NAMESPACE, car_id), window)
+    history = cache.get(key)
+    if history is not None:
+        _count(HITS_KEY)
+        return history
+
+    _count(MISSES_KEY)
+    with primary_reads():
+        history = loader()
+    cache.set(key, history, timeout=settings.HISTORY_CACHE_TTL)
+    return history
+
+
+async def _acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, timeout=None)
+        await cache.aincr(key)
+
+
+async def aget_car_history(car_id, loader, window=(None, None)):
+    """Async get_car_history(); ``loader`` is a coroutine function."""
+    key = _history_key(car_id, await aget_version(VERSION_NAMESPACE, car_id), window)
+    history = await cache.aget(key)
+    if history is not None:
+        await _acount(HITS_KEY)
+        return history
+
+    await _acount(MISSES_KEY)
+    with primary_reads():
+        history = await loader()
+    await cache.aset(key, history, timeout=settings.HISTORY_CACHE_TTL)
+    return history
+
+
+def invalidate_car_history(car_id):
+    bump_version_on_commit(VERSION_NAMESPACE, car_id)
+
+
+def history_cache_stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": counters.get(HITS_KEY, 0), "misses": counters.get(MISSES_KEY, 0)}
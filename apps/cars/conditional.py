@@ -0,0 +1,107 @@
+"""
+Conditional GET (ETag / Last-Modified) for the car endpoints.
+
+Validators are built from the version stamps in core.versioning, so deciding
+on a 304 costs a few cache reads and no queries. Every stamp token starts with
+the time it was minted, which doubles as the Last-Modified date.
+
+    car         per car, bumped when the car (or its owner) changes
+    cars/all    bumped when any car is added, changed or removed
+    history     per car, bumped by policy and claim writes (apps.cars.cache)
+    coverage    per car, bumped by policy writes (apps.policies.coverage)
+    car-summary/all  bumped whenever car_summary rows are refreshed (?view=summary)
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from apps.cars import summary
+from apps.cars.cache import VERSION_NAMESPACE as HISTORY_NAMESPACE
+from apps.policies.coverage import VERSION_NAMESPACE as COVERAGE_NAMESPACE
+from core.routing import reading_from_replica
+from core.scoping import scope_key
+from core.versioning import get_version
+
+CAR_NAMESPACE = "car"
+LIST_NAMESPACE = "cars"
+LIST_KEY = "all"
+
+
+def _stamps(request, keys):
+    """Current stamps for (namespace, key) pairs, memoised per request."""
+    memo = request.__dict__.setdefault("_version_stamps", {})
+    for key in keys:
+        if key not in memo:
+            memo[key] = get_version(*key)
+    return [memo[key] for key in keys]
+
+
+def _etag(request, keys, extra=()):
+    if reading_from_replica():
+        # The body may predate the stamps (core.routing); don't let clients keep it under them.
+        return None
+    # The rendered format is part of the representation (JSON vs. browsable API),
+    # and so is who is asking: lists are scoped per owner (core.scoping).
+    parts = _stamps(request, keys) + [request.accepted_renderer.format, scope_key(request.user), *extra]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def _last_modified(request, keys):
+    if reading_from_replica():
+        return None
+    minted = max(int(stamp.split("-", 1)[0]) for stamp in _stamps(request, keys))
+    return datetime.fromtimestamp(minted / 1e9, tz=timezone.utc)
+
+
+def _view_keys(request):
+    if request.GET.get("view") == "summary":
+        return [(summary.VERSION_NAMESPACE, summary.VERSION_KEY)]
+    return []
+
+
+def _detail_keys(request, pk):
+    return [(CAR_NAMESPACE, pk)] + _view_keys(request)
+
+
+def _history_keys(pk):
+    return [(CAR_NAMESPACE, pk), (HISTORY_NAMESPACE, pk)]
+
+
+def _validity_keys(pk):
+    return [(CAR_NAMESPACE, pk), (COVERAGE_NAMESPACE, pk)]
+
+
+def _list_keys(request):
+    return [(LIST_NAMESPACE, LIST_KEY)] + _view_keys(request)
+
+
+def car_detail_etag(request, pk=None, **kwargs):
+    return _etag(request, _detail_keys(request, pk))
+
+
+def car_detail_last_modified(request, pk=None, **kwargs):
+    return _last_modified(request, _detail_keys(request, pk))
+
+
+def car_history_etag(request, pk=None, **kwargs):
+    window = (request.GET.get("from", ""), request.GET.get("to", ""))
+    return _etag(request, _history_keys(pk), window)
+
+
+def car_history_last_modified(request, pk=None, **kwargs):
+    return _last_modified(request, _history_keys(pk))
+
+
+def insurance_valid_etag(request, pk=None, **kwargs):
+    return _etag(request, _validity_keys(pk))
+
+
+def insurance_valid_last_modified(request, pk=None, **kwargs):
+    return _last_modified(request, _validity_keys(pk))
+
+
+def car_list_etag(request, *args, **kwargs):
+    return _etag(request, _list_keys(request))
+
+
+def car_list_last_modified(request, *args, **kwargs):
+    return _last_modified(request, _list_keys(request))
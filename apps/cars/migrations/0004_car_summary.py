@@ -0,0 +1,57 @@
+# Generated by Django 5.1 on 2026-10-17 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Snapshot of apps.cars.summary.REFRESH_SUMMARIES_SQL at the time of this migration.
+BACKFILL_SQL = """
+    INSERT INTO car_summary (car_id, active_policy_id, active_provider, active_until, next_expiry,
+                             claim_count, total_claimed, as_of, refreshed_at)
+    SELECT c.id, active.id, active.provider, active.end_date, upcoming.end_date,
+           coalesce(claims.claim_count, 0), coalesce(claims.total_claimed, 0), CURRENT_DATE, now()
+    FROM car c
+    LEFT JOIN LATERAL (
+        SELECT id, provider, end_date FROM insurance_policy
+        WHERE car_id = c.id AND coverage @> CURRENT_DATE
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS active ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT min(end_date) AS end_date FROM insurance_policy
+        WHERE car_id = c.id AND end_date >= CURRENT_DATE
+    ) AS upcoming ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT count(*) AS claim_count, sum(amount) AS total_claimed FROM claim
+        WHERE car_id = c.id
+    ) AS claims ON TRUE
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0003_car_owner_alter_car_year_of_manufacture_and_more'),
+        ('claims', '0003_claim_rollup'),
+        ('policies', '0006_coverage_gap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarSummary',
+            fields=[
+                ('car', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='cars.car')),
+                ('active_policy_id', models.BigIntegerField(blank=True, null=True)),
+                ('active_provider', models.CharField(blank=True, max_length=100, null=True)),
+                ('active_until', models.DateField(blank=True, null=True)),
+                ('next_expiry', models.DateField(blank=True, null=True)),
+                ('claim_count', models.PositiveIntegerField(default=0)),
+                ('total_claimed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('as_of', models.DateField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'car_summary',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-17 19:17
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# auth_user belongs to django.contrib.auth, so its search index is created here.
+OWNER_USERNAME_INDEX_SQL = "CREATE INDEX idx_auth_user_username_trgm ON auth_user USING gin (UPPER(username) gin_trgm_ops)"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cars', '0004_car_summary'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vin'), name='gin_trgm_ops'), name='idx_car_vin_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('make'), name='gin_trgm_ops'), name='idx_car_make_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('model'), name='gin_trgm_ops'), name='idx_car_model_trgm'),
+        ),
+        migrations.RunSQL(OWNER_USERNAME_INDEX_SQL, 'DROP INDEX IF EXISTS idx_auth_user_username_trgm'),
+    ]
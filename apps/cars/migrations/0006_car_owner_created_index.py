@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-17 19:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0005_car_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Build the composite index before dropping the FK index it replaces.
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='idx_car_owner_created'),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cars', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-17 20:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0006_car_owner_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vin'), name='text_pattern_ops'), name='idx_car_vin_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('make'), name='text_pattern_ops'), name='idx_car_make_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('model'), name='text_pattern_ops'), name='idx_car_model_prefix'),
+        ),
+    ]
@@ -1,11 +1,15 @@
 import datetime
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Upper
 
+from core.tracking import LoadedValuesMixin
 
-class Car(models.Model):
+
+class Car(LoadedValuesMixin, models.Model):
     vin = models.CharField(max_length=17, unique=True)
     make = models.CharField(max_length=50)
     model = models.CharField(max_length=50)
@@ -13,13 +17,45 @@ class Car(models.Model):
         validators=[MinValueValidator(1900),
                     MaxValueValidator(datetime.date.today().year +1)]
     )
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cars')
+    # Indexed by idx_car_owner_created, which leads with owner.
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cars', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         db_table = 'car'
-        indexes = [models.Index(fields=["vin"], name="idx_car_vin")]
+        indexes = [
+            models.Index(fields=["vin"], name="idx_car_vin"),
+            # Owner-scoped lists in their default order (core.scoping).
+            models.Index(fields=["owner", "-created_at", "-id"], name="idx_car_owner_created"),
+            # Trigram indexes for search (core.search) and the admin changelist.
+            GinIndex(OpClass(Upper("vin"), name="gin_trgm_ops"), name="idx_car_vin_trgm"),
+            GinIndex(OpClass(Upper("make"), name="gin_trgm_ops"), name="idx_car_make_trgm"),
+            GinIndex(OpClass(Upper("model"), name="gin_trgm_ops"), name="idx_car_model_trgm"),
+            # B-tree indexes for prefix matches, which trigrams cannot narrow below three characters.
+            models.Index(OpClass(Upper("vin"), name="text_pattern_ops"), name="idx_car_vin_prefix"),
+            models.Index(OpClass(Upper("make"), name="text_pattern_ops"), name="idx_car_make_prefix"),
+            models.Index(OpClass(Upper("model"), name="text_pattern_ops"), name="idx_car_model_prefix"),
+        ]
         constraints = [models.UniqueConstraint(fields=["vin"], name="uq_car_vin")]
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.year_of_manufacture})"
+
+
+class CarSummary(models.Model):
+    """
+    Denormalized dashboard card per car (apps.cars.summary keeps it current):
+    the policy active on `as_of`, the next policy end date and claim totals.
+    """
+    car = models.OneToOneField(Car, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    active_policy_id = models.BigIntegerField(blank=True, null=True)
+    active_provider = models.CharField(max_length=100, blank=True, null=True)
+    active_until = models.DateField(blank=True, null=True)
+    next_expiry = models.DateField(blank=True, null=True)
+    claim_count = models.PositiveIntegerField(default=0)
+    total_claimed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    as_of = models.DateField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'car_summary'
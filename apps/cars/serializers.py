@@ -9,3 +9,91 @@ class CarSerializer(serializers.ModelSerializer):
     class Meta:
         model = Car
         fields = "__all__"
+
+
+class CarReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path for car list/detail. Produces the same payload as
+    CarSerializer but builds it directly from the instance, skipping the
+    per-field serializer machinery. Expects `owner` loaded via select_related.
+    """
+
+    # Columns the representation needs; views pass these to .only().
+    loaded_fields = (
+        "id", "vin", "make", "model", "year_of_manufacture", "created_at",
+        "owner__id", "owner__username", "owner__email",
+    )
+    created_at_field = serializers.DateTimeField()
+
+    def to_representation(self, car):
+        owner = car.owner
+        return {
+            "id": car.id,
+            "owner": {"id": owner.id, "username": owner.username, "email": owner.email},
+            "vin": car.vin,
+            "make": car.make,
+            "model": car.model,
+            "year_of_manufacture": car.year_of_manufacture,
+            "created_at": self.created_at_field.to_representation(car.created_at),
+        }
+
+
+class CarSummarySerializer(serializers.BaseSerializer):
+    """
+    Opt-in dashboard representation (?view=summary) built from the car_summary
+    projection. Expects `summary` loaded via select_related; cars whose summary
+    has not been computed yet report nulls.
+    """
+
+    loaded_fields = (
+        "id", "vin", "make", "model", "year_of_manufacture",
+        "summary__active_policy_id", "summary__active_provider", "summary__active_until",
+        "summary__next_expiry", "summary__claim_count", "summary__total_claimed", "summary__as_of",
+    )
+    date_field = serializers.DateField()
+    amount_field = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+    def to_representation(self, car):
+        try:
+            summary = car.summary
+        except Car.summary.RelatedObjectDoesNotExist:
+            summary = None
+        representation = {
+            "id": car.id,
+            "vin": car.vin,
+            "make": car.make,
+            "model": car.model,
+            "year_of_manufacture": car.year_of_manufacture,
+            "active_policy": None,
+            "next_expiry": None,
+            "claim_count": None,
+            "total_claimed": None,
+            "as_of": None,
+        }
+        if summary is None:
+            return representation
+        if summary.active_policy_id is not None:
+            representation["active_policy"] = {
+                "id": summary.active_policy_id,
+                "provider": summary.active_provider,
+                "end_date": self.date_field.to_representation(summary.active_until),
+            }
+        representation.update(
+            next_expiry=summary.next_expiry and self.date_field.to_representation(summary.next_expiry),
+            claim_count=summary.claim_count,
+            total_claimed=self.amount_field.to_representation(summary.total_claimed),
+            as_of=self.date_field.to_representation(summary.as_of),
+        )
+        return representation
+
+
+class CarImportSerializer(serializers.ModelSerializer):
+    """
+    Flat car representation for bulk ingest. VIN uniqueness is checked once
+    per batch by the importer instead of one query per row.
+    """
+
+    class Meta:
+        model = Car
+        fields = ["vin", "make", "model", "year_of_manufacture"]
+        extra_kwargs = {"vin": {"validators": []}}
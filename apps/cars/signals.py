@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.claims.rollups import make_model_changed
+from apps.policies import analytics
+from core.tracking import previous_values
+from core.versioning import bump_version_on_commit
+
+from .conditional import CAR_NAMESPACE, LIST_KEY, LIST_NAMESPACE
+from .models import Car
+from .summary import refresh_car_summaries_on_commit
+
+
+def cars_changed(car_ids):
+    """Invalidate conditional-GET validators of cars whose own fields changed."""
+    car_ids = set(car_ids)
+    for car_id in car_ids:
+        bump_version_on_commit(CAR_NAMESPACE, car_id)
+    if car_ids:
+        bump_version_on_commit(LIST_NAMESPACE, LIST_KEY)
+
+
+def fleet_changed():
+    """
+    Invalidate fleet-wide data after cars were added or removed.
+    Called by the model signals and by bulk writers that bypass them.
+    """
+    bump_version_on_commit(analytics.VERSION_NAMESPACE, analytics.VERSION_KEY)
+    bump_version_on_commit(LIST_NAMESPACE, LIST_KEY)
+
+
+@receiver(post_save, sender=Car)
+def car_saved(sender, instance, created, **kwargs):
+    cars_changed([instance.pk])
+    if created:
+        fleet_changed()
+        refresh_car_summaries_on_commit([instance.pk])
+
+
+@receiver(pre_save, sender=Car)
+def remember_make_model(sender, instance, raw=False, **kwargs):
+    previous = None if raw else previous_values(instance, ("make", "model"))
+    instance._rollup_make_model = f"{previous['make']}/{previous['model']}" if previous else None
+
+
+@receiver(post_save, sender=Car)
+def move_claim_rollups(sender, instance, **kwargs):
+    previous = getattr(instance, "_rollup_make_model", None)
+    current = f"{instance.make}/{instance.model}"
+    if previous is not None and previous != current:
+        make_model_changed(instance.pk, previous, current)
+
+
+@receiver(post_delete, sender=Car)
+def car_deleted(sender, instance, **kwargs):
+    cars_changed([instance.pk])
+    fleet_changed()
+
+
+@receiver(post_save, sender=User)
+def owner_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Car payloads embed the owner; logins only touch last_login.
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    cars_changed(Car.objects.filter(owner=instance).values_list("id", flat=True))
@@ -0,0 +1,89 @@
+"""
+Maintenance of the car_summary projection behind ?view=summary.
+
+Each row is recomputed from the source tables with one upsert per batch of
+cars, so a refresh is idempotent and never accumulates drift:
+
+  active policy   the policy covering `as_of` (latest start wins)
+  next_expiry     earliest end_date on or after `as_of`
+  claim totals    count and sum of the car's claims
+
+Policy and claim writes refresh the affected cars once their transaction
+commits. "Active" also depends on the date, so the scheduler refreshes the
+whole fleet daily in chunks of cars.
+"""
+from django.db import connection, transaction
+from django.utils.timezone import localdate, now
+
+from core.versioning import bump_version
+
+VERSION_NAMESPACE = "car-summary"
+VERSION_KEY = "all"
+
+REFRESH_SUMMARIES_SQL = """
+    INSERT INTO car_summary (car_id, active_policy_id, active_provider, active_until, next_expiry,
+                             claim_count, total_claimed, as_of, refreshed_at)
+    SELECT c.id, active.id, active.provider, active.end_date, upcoming.end_date,
+           coalesce(claims.claim_count, 0), coalesce(claims.total_claimed, 0), %(as_of)s, %(now)s
+    FROM car c
+    LEFT JOIN LATERAL (
+        SELECT id, provider, end_date FROM insurance_policy
+        WHERE car_id = c.id AND coverage @> %(as_of)s::date
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS active ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT min(end_date) AS end_date FROM insurance_policy
+        WHERE car_id = c.id AND end_date >= %(as_of)s
+    ) AS upcoming ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT count(*) AS claim_count, sum(amount) AS total_claimed FROM claim
+        WHERE car_id = c.id
+    ) AS claims ON TRUE
+    WHERE {cars}
+    ON CONFLICT (car_id) DO UPDATE SET
+        active_policy_id = EXCLUDED.active_policy_id,
+        active_provider = EXCLUDED.active_provider,
+        active_until = EXCLUDED.active_until,
+        next_expiry = EXCLUDED.next_expiry,
+        claim_count = EXCLUDED.claim_count,
+        total_claimed = EXCLUDED.total_claimed,
+        as_of = EXCLUDED.as_of,
+        refreshed_at = EXCLUDED.refreshed_at
+"""
+
+BY_IDS = REFRESH_SUMMARIES_SQL.format(cars="c.id = ANY(%(car_ids)s::bigint[])")
+BY_RANGE = REFRESH_SUMMARIES_SQL.format(cars="c.id BETWEEN %(first)s AND %(last)s")
+
+
+def _refresh(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {**params, "as_of": localdate(), "now": now()})
+        refreshed = cursor.rowcount
+    transaction.on_commit(lambda: bump_version(VERSION_NAMESPACE, VERSION_KEY))
+    return refreshed
+
+
+def refresh_car_summaries(car_ids):
+    """Recompute the summaries of the given cars; returns the number of rows written."""
+    car_ids = sorted(set(car_ids))  # stable lock order between concurrent writers
+    if not car_ids:
+        return 0
+    return _refresh(BY_IDS, {"car_ids": car_ids})
+
+
+def refresh_car_summary_range(first_id, last_id):
+    """Recompute the summaries of cars first_id..last_id in one transaction."""
+    with transaction.atomic():
+        return _refresh(BY_RANGE, {"first": first_id, "last": last_id})
+
+
+def refresh_car_summaries_on_commit(car_ids):
+    """
+    Refresh once the surrounding transaction commits (immediately in autocommit).
+    Deferring also keeps a cascaded car delete from re-inserting the summary
+    row of the car being deleted.
+    """
+    car_ids = set(car_ids)
+    if car_ids:
+        transaction.on_commit(lambda: refresh_car_summaries(car_ids))
@@ -1,3 +1,375 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cars.factories import CarFactory
+from apps.policies.factories import InsurancePolicyFactory
+
+
+@pytest.fixture
+def auth_client(db):
+    # Staff see every owner's cars (core.scoping); customer scoping has its own tests.
+    user = User.objects.create_user(username="tester", password="test1234", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _streamed_json(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
+@pytest.mark.django_db
+def test_bulk_insurance_valid_by_car_id(auth_client, django_assert_max_num_queries):
+    today = timezone.now().date()
+    covered = InsurancePolicyFactory(
+        start_date=today - timezone.timedelta(days=10),
+        end_date=today + timezone.timedelta(days=10),
+    )
+    uncovered = CarFactory()
+    payload = {
+        "items": [
+            {"carId": covered.car.id, "date": str(today)},
+            {"carId": uncovered.id, "date": str(today)},
+            {"carId": 999999, "date": str(today)},
+        ]
+    }
+
+    response = auth_client.post("/api/cars/insurance-valid/", payload, format="json")
+    assert response.status_code == 200
+    with django_assert_max_num_queries(1):
+        results = _streamed_json(response)
+
+    assert [r["valid"] for r in results] == [True, False, None]
+    assert results[2]["detail"] == "Car not found."
+
+
+@pytest.mark.django_db
+def test_bulk_insurance_valid_by_vin(auth_client):
+    today = timezone.now().date()
+    policy = InsurancePolicyFactory(
+        start_date=today - timezone.timedelta(days=10),
+        end_date=today + timezone.timedelta(days=10),
+    )
+    payload = {"date": str(today), "vins": [policy.car.vin, "UNKNOWNVIN"]}
+
+    response = auth_client.post("/api/cars/insurance-valid/", payload, format="json")
+    results = _streamed_json(response)
+
+    assert results[0] == {"vin": policy.car.vin, "carId": policy.car.id, "date": str(today), "valid": True}
+    assert results[1]["carId"] is None and results[1]["valid"] is None
+
+
+@pytest.mark.django_db
+def test_bulk_insurance_valid_rejects_bad_date(auth_client):
+    car = CarFactory()
+    payload = {"items": [{"carId": car.id, "date": "2025-13-01"}]}
+    response = auth_client.post("/api/cars/insurance-valid/", payload, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_history_is_cached_until_a_claim_is_added(auth_client, django_assert_num_queries, django_capture_on_commit_callbacks):
+    from apps.cars.cache import history_cache_stats
+
+    cache.clear()
+    policy = InsurancePolicyFactory()
+    url = f"/api/cars/{policy.car.id}/history/"
+
+    assert len(auth_client.get(url).data) == 1
+    with django_assert_num_queries(1):  # car lookup only
+        assert len(auth_client.get(url).data) == 1
+    assert history_cache_stats() == {"hits": 1, "misses": 1}
+
+    payload = {"claim_date": "2025-03-01", "amount": "150.00", "description": "Mirror replacement"}
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f"/api/cars/{policy.car.id}/claims/", payload, format="json")
+
+    assert len(auth_client.get(url).data) == 2
+
+
+@pytest.mark.django_db
+def test_bulk_import_cars_csv_rejects_duplicate_vins(auth_client):
+    from apps.cars.models import Car
+
+    existing = CarFactory()
+    body = "\n".join([
+        "vin,make,model,year_of_manufacture",
+        "WVWZZZ1JZXW000001,Volkswagen,Golf,2019",
+        "WVWZZZ1JZXW000001,Volkswagen,Golf,2019",
+        f"{existing.vin},Audi,A4,2018",
+        "WVWZZZ1JZXW000002,Audi,A4,1800",
+        ",Skoda,Octavia,2020",
+        ",Skoda,Octavia,2020",
+    ])
+
+    response = auth_client.post("/api/import/cars/", body, content_type="text/csv")
+    assert response.data["created"] == 1
+    assert [error["row"] for error in response.data["errors"]] == [2, 3, 4, 5, 6]
+    # A missing vin is a validation error, never a duplicate of another missing one.
+    assert all("already exists" not in str(error["errors"]) for error in response.data["errors"][3:])
+    assert Car.objects.get(vin="WVWZZZ1JZXW000001").owner.username == "tester"
+
+
+@pytest.mark.django_db
+def test_bulk_import_rejects_only_rows_the_database_refuses(auth_client, monkeypatch):
+    from apps.cars.models import Car
+    from core.ingest import CarImporter
+
+    existing = CarFactory()
+    # As if the VIN had been inserted concurrently, after the batch's VIN check.
+    monkeypatch.setattr(CarImporter, "resolve", lambda self, batch: ((n, row, {"owner": self.owner}) for n, row in batch))
+    body = "\n".join([
+        "vin,make,model,year_of_manufacture",
+        "WVWZZZ1JZXW000001,Volkswagen,Golf,2019",
+        f"{existing.vin},Audi,A4,2018",
+        "WVWZZZ1JZXW000002,Audi,A4,2020",
+    ])
+
+    response = auth_client.post("/api/import/cars/", body, content_type="text/csv")
+    assert response.data["created"] == 2
+    assert response.data["errors"] == [{"row": 2, "errors": {"detail": "Duplicates an existing record."}}]
+    assert Car.objects.filter(vin__in=["WVWZZZ1JZXW000001", "WVWZZZ1JZXW000002"]).count() == 2
+
+
+@pytest.mark.django_db
+def test_car_list_query_count_is_independent_of_page_size(auth_client, django_assert_num_queries):
+    CarFactory.create_batch(5)
+
+    with django_assert_num_queries(2):  # COUNT + page with owners joined
+        response = auth_client.get("/api/cars/?page_size=5")
+    assert len(response.data["results"]) == 5
+    assert set(response.data["results"][0]["owner"]) == {"id", "username", "email"}
+
+
+@pytest.mark.django_db
+def test_car_detail_matches_full_serializer(auth_client, django_assert_num_queries):
+    from apps.cars.serializers import CarSerializer
+
+    car = CarFactory()
+    with django_assert_num_queries(1):
+        response = auth_client.get(f"/api/cars/{car.id}/")
+    assert response.data == CarSerializer(car).data
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_exposes_per_view_histograms(auth_client, settings):
+    CarFactory.create_batch(2)
+    auth_client.get("/api/cars/")
+
+    body = auth_client.get("/metrics/").content.decode()
+    assert 'http_request_duration_seconds_count{method="GET",status="200",view="car-list"}' in body
+    assert 'http_request_db_queries_bucket{method="GET",status="200",view="car-list",le="2"}' in body
+
+    # Staff or the scrape token only.
+    customer = APIClient()
+    customer.force_authenticate(user=User.objects.create_user(username="driver", password="test1234"))
+    assert customer.get("/metrics/").status_code == 403
+    assert APIClient().get("/metrics/").status_code == 401
+    settings.METRICS_TOKEN = "scrape-secret"
+    assert APIClient().get("/metrics/", HTTP_AUTHORIZATION="Token wrong").status_code == 401
+    assert APIClient().get("/metrics/", HTTP_AUTHORIZATION="Token scrape-secret").status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_endpoints_match_sync_payloads(auth_client):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    cache.clear()
+    today = timezone.now().date()
+    policy = InsurancePolicyFactory(
+        start_date=today - timezone.timedelta(days=10),
+        end_date=today + timezone.timedelta(days=10),
+    )
+    car_id = policy.car.id
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(User.objects.get(username='tester'))}")
+
+    for path in (f"cars/{car_id}/insurance-valid/?date={today}", f"cars/{car_id}/history/"):
+        response = client.get(f"/api/async/{path}")
+        assert response.status_code == 200
+        assert response.json() == auth_client.get(f"/api/{path}").json()
+
+    assert client.get(f"/api/async/cars/{car_id}/insurance-valid/?date=2025-13-01").status_code == 400
+    assert client.get("/api/async/cars/999999/history/").status_code == 404
+    assert APIClient().get(f"/api/async/cars/{car_id}/history/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_conditional_get_answers_304_from_version_stamps(auth_client, django_assert_num_queries, django_capture_on_commit_callbacks):
+    cache.clear()
+    policy = InsurancePolicyFactory()
+    car = policy.car
+
+    for url in (f"/api/cars/{car.id}/", f"/api/cars/{car.id}/history/", "/api/cars/"):
+        response = auth_client.get(url)
+        assert response.status_code == 200 and response.has_header("Last-Modified")
+        with django_assert_num_queries(0):
+            assert auth_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    detail_etag = auth_client.get(f"/api/cars/{car.id}/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.patch(f"/api/cars/{car.id}/", {"model": "Golf"}, format="json")
+    assert auth_client.get(f"/api/cars/{car.id}/", HTTP_IF_NONE_MATCH=detail_etag).data["model"] == "Golf"
+
+    history_etag = auth_client.get(f"/api/cars/{car.id}/history/")["ETag"]
+    payload = {"claim_date": "2025-03-01", "amount": "80.00", "description": "Wiper"}
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f"/api/cars/{car.id}/claims/", payload, format="json")
+    response = auth_client.get(f"/api/cars/{car.id}/history/", HTTP_IF_NONE_MATCH=history_etag)
+    assert response.status_code == 200 and len(response.data) == 2
+
+
+@pytest.mark.django_db
+def test_summary_view_is_one_query_and_follows_writes(auth_client, django_assert_num_queries, django_capture_on_commit_callbacks):
+    cache.clear()
+    today = timezone.now().date()
+    with django_capture_on_commit_callbacks(execute=True):
+        policy = InsurancePolicyFactory(
+            provider="Allianz",
+            start_date=today - timezone.timedelta(days=10),
+            end_date=today + timezone.timedelta(days=20),
+        )
+        CarFactory.create_batch(3)
+    car = policy.car
+
+    with django_assert_num_queries(1):
+        response = auth_client.get("/api/cars/?view=summary&pagination=cursor&page_size=100")
+    card = next(row for row in response.data["results"] if row["id"] == car.id)
+    assert card["active_policy"] == {"id": policy.id, "provider": "Allianz", "end_date": str(policy.end_date)}
+    assert card["next_expiry"] == str(policy.end_date)
+    assert card["claim_count"] == 0
+
+    etag = response["ETag"]
+    payload = {"claim_date": str(today), "amount": "120.50", "description": "Bumper"}
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f"/api/cars/{car.id}/claims/", payload, format="json")
+    response = auth_client.get(f"/api/cars/{car.id}/?view=summary", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert (response.data["claim_count"], response.data["total_claimed"]) == (1, "120.50")
+    assert auth_client.get("/api/cars/?view=bogus").status_code == 400
+
+
+@pytest.mark.django_db
+def test_car_search_matches_vin_prefix_and_fuzzy_terms(auth_client):
+    from django.db import connection
+
+    from core.search import car_search_queryset
+
+    cache.clear()
+    golf = CarFactory(vin="WVWZZZ1JZXW123456", make="Volkswagen", model="Golf")
+    CarFactory(vin="ZFA31200000123456", make="Fiat", model="Panda")
+
+    response = auth_client.get("/api/cars/search/?q=wv")
+    assert [car["id"] for car in response.data["results"]] == [golf.id]
+    assert auth_client.get("/api/cars/search/").status_code == 400
+
+    # Short terms are prefix matches served by the B-tree indexes, not a table scan.
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = car_search_queryset("wv").explain()
+    assert "Seq Scan" not in plan
+    assert all(name in plan for name in ("idx_car_vin_prefix", "idx_car_make_prefix", "idx_car_model_prefix"))
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            pytest.skip("pg_trgm is not installed on this PostgreSQL server")
+
+    for term in ("WVWZZZ1JZ", "volkswagn", golf.owner.username):
+        response = auth_client.get(f"/api/cars/search/?q={term}")
+        assert response.data["results"][0]["id"] == golf.id
+
+
+@pytest.mark.django_db
+def test_jwt_user_is_resolved_from_cache_until_deactivated(django_assert_num_queries, django_capture_on_commit_callbacks):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    cache.clear()
+    user = User.objects.create_user(username="driver", password="test1234")
+    car = CarFactory(owner=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    assert client.get(f"/api/cars/{car.id}/").status_code == 200
+    with django_assert_num_queries(1):  # the car; no auth_user lookup
+        assert client.get(f"/api/cars/{car.id}/").status_code == 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+    assert client.get(f"/api/cars/{car.id}/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_customers_only_see_their_own_cars_policies_and_claims():
+    from apps.claims.factories import ClaimFactory
+
+    cache.clear()
+    customer = User.objects.create_user(username="fleet", password="test1234")
+    client = APIClient()
+    client.force_authenticate(user=customer)
+    own = CarFactory.create_batch(2, owner=customer)
+    other = CarFactory()
+    for car in (*own, other):
+        InsurancePolicyFactory(car=car)
+        ClaimFactory(car=car)
+
+    assert {car["id"] for car in client.get("/api/cars/").data["results"]} == {car.id for car in own}
+    assert {policy["car"] for policy in client.get("/api/policies/").data["results"]} == {car.id for car in own}
+    assert {claim["car"] for claim in client.get("/api/claims/").data["results"]} == {car.id for car in own}
+
+    assert client.get(f"/api/cars/{other.id}/").status_code == 404
+    assert client.get(f"/api/cars/{other.id}/history/").status_code == 404
+    payload = {"provider": "Allianz", "start_date": "2030-01-01", "end_date": "2030-12-31"}
+    assert client.post(f"/api/cars/{other.id}/policies/", payload, format="json").status_code == 404
+    assert client.get("/api/claims/summary/?by=car").status_code == 403
+
+    today = str(timezone.now().date())
+    payload = {"items": [{"carId": own[0].id, "date": today}, {"carId": other.id, "date": today}]}
+    results = _streamed_json(client.post("/api/cars/insurance-valid/", payload, format="json"))
+    assert results[0]["valid"] is not None and results[1]["valid"] is None
+
+
+@pytest.mark.django_db
+def test_reads_go_to_a_fresh_replica_until_the_client_writes(auth_client, settings, monkeypatch):
+    from core import routing
+
+    cache.clear()
+    routing._replica_lag.clear()
+    # The primary stands in for a replica: it reports no lag.
+    settings.DATABASE_REPLICAS = ["default"]
+    routed = []
+    db_for_read = routing.ReplicaRouter.db_for_read
+    monkeypatch.setattr(
+        routing.ReplicaRouter, "db_for_read",
+        lambda self, model, **hints: routed.append(db_for_read(self, model, **hints)) or routed[-1],
+    )
+    car = CarFactory()
+
+    def reads(method, url, **kwargs):
+        routed.clear()
+        response = getattr(auth_client, method)(url, **kwargs)
+        assert response.status_code < 300
+        return set(routed)
+
+    # The car comes from the replica; the cached history is loaded from the primary.
+    assert reads("get", f"/api/cars/{car.id}/history/") == {"default", None}
+    # A replica response may predate the stamps, so it gets no validator.
+    response = auth_client.get(f"/api/cars/{car.id}/")
+    assert response.status_code == 200 and "ETag" not in response
+    assert reads("get", "/api/claims/") == {"default"}
+
+    # Read-your-writes: after a write the client reads from the primary (None).
+    payload = {"claim_date": "2025-01-01", "amount": "10.00", "description": "Scratch"}
+    reads("post", f"/api/cars/{car.id}/claims/", data=payload, format="json")
+    assert reads("get", "/api/claims/") == {None}
+
+    cache.clear()
+    assert reads("get", "/api/claims/") == {"default"}
+    settings.REPLICA_MAX_LAG_SECONDS = -1  # every replica lags
+    assert reads("get", "/api/claims/") == {None}
@@ -1,8 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import CarViewSet
 
 router = DefaultRouter()
 router.register(r"cars", CarViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/cars/<int:pk>/insurance-valid/", async_views.insurance_valid, name="car-insurance-valid-async"),
+    path("async/cars/<int:pk>/history/", async_views.car_history, name="car-history-async"),
+]
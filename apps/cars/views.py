@@ -1,24 +1,63 @@
-from datetime import datetime
+import json
 from itertools import chain
 from operator import itemgetter
 
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from apps.cars import cache as history_cache
+from apps.cars import conditional
 from apps.cars.models import Car
-from apps.cars.serializers import CarSerializer
+from apps.cars.serializers import CarReadSerializer, CarSerializer, CarSummarySerializer
 from apps.claims.models import Claim
 from apps.claims.serializers import ClaimSerializer
-from apps.policies.models import InsurancePolicy
+from apps.policies.coverage import coverage_index
+from apps.policies.models import InsurancePolicy, date_range
 from apps.policies.serializers import InsurancePolicySerializer
+from core.dates import parse_date, parse_date_window
+from core.routing import ReplicaReadMixin
+from core.scoping import OwnerScopedMixin
+from core.search import (CARS_KEY, CARS_NAMESPACE, cached_search_response,
+                         car_search_queryset, parse_search_term)
 
 # ===============================================================
 # 🧠 SERVICE LAYER
 # ===============================================================
 
+BULK_VALIDITY_MAX_ITEMS = 10000
+BULK_VALIDITY_FETCH_SIZE = 1000
+
+# One statement answers every (car, date) pair: the pairs are unnested
+# server-side and each probe is a containment lookup on idx_policy_car_coverage.
+# Cars of other owners are reported as not found (owner NULL means staff: no scoping).
+BULK_VALIDITY_BY_ID_SQL = """
+    SELECT q.car_id, q.day, c.id IS NOT NULL, c.id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM insurance_policy p
+        WHERE p.car_id = c.id AND p.coverage @> q.day
+    )
+    FROM unnest(%s::bigint[], %s::date[]) WITH ORDINALITY AS q(car_id, day, ord)
+    LEFT JOIN car c ON c.id = q.car_id AND (%s::bigint IS NULL OR c.owner_id = %s)
+    ORDER BY q.ord
+"""
+
+BULK_VALIDITY_BY_VIN_SQL = """
+    SELECT q.vin, c.id, EXISTS (
+        SELECT 1 FROM insurance_policy p
+        WHERE p.car_id = c.id AND p.coverage @> %s::date
+    )
+    FROM unnest(%s::varchar[]) WITH ORDINALITY AS q(vin, ord)
+    LEFT JOIN car c ON c.vin = q.vin AND (%s::bigint IS NULL OR c.owner_id = %s)
+    ORDER BY q.ord
+"""
+
+
 class CarService:
     """Business logic for cars, policies, and claims."""
 
@@ -38,32 +77,120 @@ class CarService:
 
     @staticmethod
     def check_insurance_validity(car, date_str):
-        if not date_str:
-            raise ValidationError({"detail": "Missing required query parameter: date"})
+        date_obj = parse_date(date_str)
 
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            raise ValidationError({"detail": "Invalid date format. Expected YYYY-MM-DD."})
+        if settings.COVERAGE_INDEX_ENABLED:
+            valid = coverage_index.is_covered(car.id, date_obj)
+        else:
+            valid = InsurancePolicy.objects.filter(car=car, coverage__contains=date_obj).exists()
 
-        if not (1900 <= date_obj.year <= 2100):
-            raise ValidationError({"detail": "Date out of valid range (1900–2100)."})
+        return {"carId": car.id, "date": date_str, "valid": valid}
 
-        valid = InsurancePolicy.objects.filter(
-            car=car, start_date__lte=date_obj, end_date__gte=date_obj
-        ).exists()
+    @staticmethod
+    def parse_bulk_validity_request(data):
+        """
+        Validate a bulk validity payload up front so errors surface as a 400
+        before any result is streamed. Accepts either
+        {"items": [{"carId": 1, "date": "YYYY-MM-DD"}, ...]} or
+        {"date": "YYYY-MM-DD", "vins": ["...", ...]}.
+        """
+        if "vins" in data:
+            vins = data.get("vins")
+            if not isinstance(vins, list) or not vins:
+                raise ValidationError({"vins": "Expected a non-empty list of VINs."})
+            if len(vins) > BULK_VALIDITY_MAX_ITEMS:
+                raise ValidationError({"vins": f"At most {BULK_VALIDITY_MAX_ITEMS} VINs per request."})
+            if not all(isinstance(vin, str) and vin for vin in vins):
+                raise ValidationError({"vins": "Every VIN must be a non-empty string."})
+            return {"date": parse_date(data.get("date")), "vins": vins}
 
-        return {"carId": car.id, "date": date_str, "valid": valid}
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"items": "Expected a non-empty list of {carId, date} objects."})
+        if len(items) > BULK_VALIDITY_MAX_ITEMS:
+            raise ValidationError({"items": f"At most {BULK_VALIDITY_MAX_ITEMS} items per request."})
+
+        car_ids, dates = [], []
+        for index, item in enumerate(items):
+            car_id = item.get("carId") if isinstance(item, dict) else None
+            if isinstance(car_id, bool) or not isinstance(car_id, int):
+                raise ValidationError({"items": {index: "carId must be an integer."}})
+            try:
+                dates.append(parse_date(item.get("date")))
+            except ValidationError as exc:
+                raise ValidationError({"items": {index: exc.detail["detail"]}})
+            car_ids.append(car_id)
+        return {"car_ids": car_ids, "dates": dates}
+
+    @staticmethod
+    def iter_bulk_insurance_validity(request_data, owner_id=None, using=DEFAULT_DB_ALIAS):
+        """
+        Yield one result dict per requested pair, in request order, from a
+        single set-based query on database `using` fetched in fixed-size
+        chunks. With `owner_id`, only that owner's cars are found.
+        """
+        if "vins" in request_data:
+            date_obj = request_data["date"]
+            sql = BULK_VALIDITY_BY_VIN_SQL
+            params = [date_obj, request_data["vins"], owner_id, owner_id]
+        else:
+            sql = BULK_VALIDITY_BY_ID_SQL
+            params = [request_data["car_ids"], request_data["dates"], owner_id, owner_id]
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany(BULK_VALIDITY_FETCH_SIZE):
+                for row in rows:
+                    if "vins" in request_data:
+                        vin, car_id, valid = row
+                        result = {"vin": vin, "carId": car_id, "date": date_obj.isoformat()}
+                        found = car_id is not None
+                    else:
+                        car_id, day, found, valid = row
+                        result = {"carId": car_id, "date": day.isoformat()}
+                    if found:
+                        result["valid"] = valid
+                    else:
+                        result["valid"] = None
+                        result["detail"] = "Car not found."
+                    yield result
+
+    @staticmethod
+    def get_car_history(car, window=(None, None)):
+        return history_cache.get_car_history(
+            car.id, lambda: CarService.build_car_history(car, window), window
+        )
 
     @staticmethod
-    def get_car_history(car):
-        policies = InsurancePolicy.objects.filter(car=car).values(
+    def history_querysets(car_id, window=(None, None)):
+        """
+        A car's policies and claims, limited to those overlapping / dated in
+        the inclusive (from, to) `window` when given. The claim_date bounds
+        let a partitioned claim table scan only the months involved.
+        """
+        policies = InsurancePolicy.objects.filter(car_id=car_id).values(
             "id", "start_date", "end_date", "provider"
         )
-        claims = Claim.objects.filter(car=car).values(
+        claims = Claim.objects.filter(car_id=car_id).values(
             "id", "claim_date", "amount", "description"
         )
+        start, end = window
+        if start or end:
+            policies = policies.filter(coverage__overlap=date_range(start, end))
+        if start:
+            claims = claims.filter(claim_date__gte=start)
+        if end:
+            claims = claims.filter(claim_date__lte=end)
+        return policies, claims
+
+    @staticmethod
+    def build_car_history(car, window=(None, None)):
+        policies, claims = CarService.history_querysets(car.id, window)
+        return CarService.format_car_history(policies, claims)
 
+    @staticmethod
+    def format_car_history(policies, claims):
+        """Merge policy and claim rows into one timeline ordered by date."""
         policies_list = [
             {
                 "type": "POLICY",
@@ -94,12 +221,64 @@ class CarService:
         return combined
 
 
+def _stream_json_array(items):
+    yield "["
+    for index, item in enumerate(items):
+        yield ("," if index else "") + json.dumps(item)
+    yield "]"
+
+
 # ===============================================================
 # 🎯 CONTROLLER LAYER (DRF VIEWSET)
 # ===============================================================
-class CarViewSet(viewsets.ModelViewSet):
-    queryset = Car.objects.all()
+class CarViewSet(ReplicaReadMixin, OwnerScopedMixin, viewsets.ModelViewSet):
+    queryset = Car.objects.select_related("owner").order_by("-created_at", "-id")
     serializer_class = CarSerializer
+    car_lookup = None
+    keyset_ordering = ("-created_at", "-id")  # idx_car_owner_created
+    read_actions = ("list", "retrieve")
+    representations = ("summary",)
+    replica_read_actions = ("bulk_insurance_valid",)  # POST, but read-only (core.routing)
+
+    def get_representation(self):
+        """Optional ?view= representation for list/retrieve; None for the default."""
+        if self.action not in self.read_actions:
+            return None
+        representation = self.request.query_params.get("view")
+        if representation is not None and representation not in self.representations:
+            raise ValidationError({"view": f"Expected one of: {', '.join(self.representations)}."})
+        return representation
+
+    def get_keyset_ordering(self):
+        if self.action == "search":
+            return ("-rank", "-id")
+        return self.keyset_ordering
+
+    def get_queryset(self):
+        if self.get_representation() == "summary":
+            # One join on the car_summary primary key; no policy or claim queries.
+            queryset = Car.objects.select_related("summary").order_by("-created_at", "-id")
+            return self.scope_queryset(queryset.only(*CarSummarySerializer.loaded_fields))
+        queryset = super().get_queryset()
+        if self.action in self.read_actions:
+            queryset = queryset.only(*CarReadSerializer.loaded_fields)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.get_representation() == "summary":
+            return CarSummarySerializer
+        if self.action in self.read_actions:
+            return CarReadSerializer
+        return super().get_serializer_class()
+
+    # Conditional GET: 304 answers come from version stamps alone (apps.cars.conditional).
+    @method_decorator(condition(conditional.car_list_etag, conditional.car_list_last_modified))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(conditional.car_detail_etag, conditional.car_detail_last_modified))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
@@ -110,7 +289,7 @@ class CarViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="policies")
     def create_policy(self, request, pk=None):
         """POST /api/cars/{carId}/policies"""
-        car = get_object_or_404(Car, pk=pk)
+        car = self.get_owned_car(pk)
         policy, data = CarService.create_policy(car, request.data)
         headers = {"Location": f"/api/cars/{car.id}/policies/{policy.id}"}
         return Response(data, status=status.HTTP_201_CREATED, headers=headers)
@@ -118,21 +297,43 @@ class CarViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="claims")
     def create_claim(self, request, pk=None):
         """POST /api/cars/{carId}/claims"""
-        car = get_object_or_404(Car, pk=pk)
+        car = self.get_owned_car(pk)
         claim, data = CarService.create_claim(car, request.data)
         headers = {"Location": f"/api/cars/{car.id}/claims/{claim.id}"}
         return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=["get"], url_path="insurance-valid")
+    @method_decorator(condition(conditional.insurance_valid_etag, conditional.insurance_valid_last_modified))
     def insurance_valid(self, request, pk=None):
         """GET /api/cars/{carId}/insurance-valid?date=YYYY-MM-DD"""
-        car = get_object_or_404(Car, pk=pk)
+        car = self.get_owned_car(pk)
         result = CarService.check_insurance_validity(car, request.query_params.get("date"))
         return Response(result, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="insurance-valid")
+    def bulk_insurance_valid(self, request):
+        """POST /api/cars/insurance-valid (bulk, streamed JSON array)"""
+        request_data = CarService.parse_bulk_validity_request(request.data)
+        owner_id = None if request.user.is_staff else request.user.pk
+        # The body is streamed after the view returns: pick the database now.
+        results = CarService.iter_bulk_insurance_validity(request_data, owner_id, using=Car.objects.db)
+        return StreamingHttpResponse(_stream_json_array(results), content_type="application/json")
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """GET /api/cars/search?q=  (VIN prefix, fuzzy VIN / make / model / owner; ranked)"""
+        term = parse_search_term(request.query_params)
+        base = self.scope_queryset(Car.objects.select_related("owner").only(*CarReadSerializer.loaded_fields))
+        queryset = car_search_queryset(term, base).order_by("-rank", "-id")
+        return cached_search_response(
+            self, request, queryset, CarReadSerializer, CARS_NAMESPACE, CARS_KEY, self.owner_scope_key()
+        )
+
     @action(detail=True, methods=["get"], url_path="history")
+    @method_decorator(condition(conditional.car_history_etag, conditional.car_history_last_modified))
     def get_history(self, request, pk=None):
-        """GET /api/cars/{carId}/history"""
-        car = get_object_or_404(Car, pk=pk)
-        history = CarService.get_car_history(car)
+        """GET /api/cars/{carId}/history[?from=YYYY-MM-DD&to=YYYY-MM-DD]"""
+        window = parse_date_window(request.query_params)
+        car = self.get_owned_car(pk)
+        history = CarService.get_car_history(car, window)
         return Response(history, status=status.HTTP_200_OK)
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.db.models import Q
+
+from core.search import CLAIM_DOCUMENT, claim_search_query
 
 from .models import Claim
 
@@ -6,4 +9,15 @@ from .models import Claim
 @admin.register(Claim)
 class ClaimAdmin(admin.ModelAdmin):
     list_display = ("id", "car", "claim_date", "description", "amount", "created_at")
-    search_fields = ("car", "claim_date",)
+    search_fields = ("description",)
+    list_select_related = ("car",)
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # A claim id or car id, or full-text over descriptions via idx_claim_description_fts.
+        term = " ".join(search_term.split())
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(Q(pk=int(term)) | Q(car_id=int(term))), False
+        return queryset.alias(document=CLAIM_DOCUMENT).filter(document=claim_search_query(term)), False
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-17 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['claim_date', 'id'], name='idx_claim_date_id'),
+        ),
+    ]
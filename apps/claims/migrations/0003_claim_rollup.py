@@ -0,0 +1,56 @@
+# Generated by Django 5.1 on 2026-10-17 19:52
+
+from django.db import migrations, models
+
+
+# Snapshot of apps.claims.rollups.REBUILD_SQL at the time of this migration. Importing
+# the live query would tie this migration to columns added later (policies 0005 adds
+# the coverage range it now reads), so the backfill keeps its own copy.
+BACKFILL_SQL = """
+    INSERT INTO claim_rollup (dimension, key, claim_count, total_amount, updated_at)
+    SELECT 'car', c.car_id::text, count(*), sum(c.amount), now()
+    FROM claim c GROUP BY c.car_id
+    UNION ALL
+    SELECT 'make_model', car.make || '/' || car.model, count(*), sum(c.amount), now()
+    FROM claim c JOIN car ON car.id = c.car_id GROUP BY car.make, car.model
+    UNION ALL
+    SELECT 'month', to_char(c.claim_date, 'YYYY-MM'), count(*), sum(c.amount), now()
+    FROM claim c GROUP BY to_char(c.claim_date, 'YYYY-MM')
+    UNION ALL
+    SELECT 'provider', coalesce(p.provider, 'uninsured'), count(*), sum(c.amount), now()
+    FROM claim c
+    LEFT JOIN LATERAL (
+        SELECT coalesce(provider, 'unknown') AS provider FROM insurance_policy
+        WHERE car_id = c.car_id AND start_date <= c.claim_date AND end_date >= c.claim_date
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS p ON TRUE
+    GROUP BY coalesce(p.provider, 'uninsured')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0002_keyset_indexes'),
+        ('policies', '0004_policy_unlogged_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('car', 'Car'), ('make_model', 'Make / model'), ('month', 'Month'), ('provider', 'Provider')], max_length=20)),
+                ('key', models.CharField(max_length=120)),
+                ('claim_count', models.BigIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'claim_rollup',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='uq_claim_rollup_dimension_key')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-17 19:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0003_claim_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='english'), name='idx_claim_description_fts'),
+        ),
+    ]
@@ -1,9 +1,12 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 
 from apps.cars.models import Car
+from core.tracking import LoadedValuesMixin
 
 
-class Claim(models.Model):
+class Claim(LoadedValuesMixin, models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name="claims")
     claim_date = models.DateField()
     description = models.TextField()
@@ -13,7 +16,43 @@ class Claim(models.Model):
 
     class Meta:
         db_table = "claim"
-        indexes = [models.Index(fields=["car", "claim_date"], name="idx_claim_car_date")]
+        indexes = [
+            models.Index(fields=["car", "claim_date"], name="idx_claim_car_date"),
+            models.Index(fields=["claim_date", "id"], name="idx_claim_date_id"),
+            # Full-text search over descriptions (core.search).
+            GinIndex(SearchVector("description", config="english"), name="idx_claim_description_fts"),
+        ]
 
     def __str__(self):
         return f"Claim #{self.id} for {self.car} - {self.claim_date}"
+
+
+class ClaimRollup(models.Model):
+    """
+    Pre-aggregated claim totals, one row per (dimension, key), maintained
+    incrementally by apps.claims.rollups and rebuilt by `rebuild_claim_rollups`.
+    """
+
+    DIMENSION_CAR = "car"
+    DIMENSION_MAKE_MODEL = "make_model"
+    DIMENSION_MONTH = "month"
+    DIMENSION_PROVIDER = "provider"
+    DIMENSIONS = [
+        (DIMENSION_CAR, "Car"),
+        (DIMENSION_MAKE_MODEL, "Make / model"),
+        (DIMENSION_MONTH, "Month"),
+        (DIMENSION_PROVIDER, "Provider"),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    key = models.CharField(max_length=120)
+    claim_count = models.BigIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "claim_rollup"
+        constraints = [models.UniqueConstraint(fields=["dimension", "key"], name="uq_claim_rollup_dimension_key")]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.claim_count} claims, {self.total_amount}"
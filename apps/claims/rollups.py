@@ -0,0 +1,242 @@
+"""
+Incremental maintenance of the claim_rollup table.
+
+Every claim contributes to one row per dimension:
+  car         -> car id
+  make_model  -> "<make>/<model>" of the car
+  month       -> "YYYY-MM" of claim_date
+  provider    -> provider of the car's policy covering claim_date
+                 ("uninsured" when there is none, "unknown" when it has no provider)
+
+Writes turn into signed deltas that are summed per (dimension, key) and
+applied with a single INSERT ... ON CONFLICT DO UPDATE; rows whose count
+drops to zero are deleted. Besides claim writes (apps.claims.signals):
+
+  policy writes     re-attribute the car's claims: their provider totals are
+                    read before and after the write (apps.policies.signals,
+                    PolicyImporter) and the difference is applied
+  make/model edits  move the car's totals, read from its "car" row, to the
+                    new make_model key (apps.cars.signals)
+  car deletes       subtract all the car's claims with one grouped query
+                    before the cascade removes them (apps.claims.signals)
+
+Claims in partitions detached by `partition_tables detach|archive` are
+subtracted as they leave. `rebuild_claim_rollups` recomputes everything from
+the claim table after writes that bypass the ORM (COPY seeding, raw SQL
+backfills).
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from apps.cars.models import Car
+
+from .models import ClaimRollup
+
+UNINSURED = "uninsured"
+UNKNOWN_PROVIDER = "unknown"
+
+PROVIDERS_ON_DATES_SQL = """
+    SELECT q.ord, coalesce(p.provider, %s)
+    FROM unnest(%s::bigint[], %s::date[]) WITH ORDINALITY AS q(car_id, day, ord)
+    LEFT JOIN LATERAL (
+        SELECT coalesce(provider, %s) AS provider FROM insurance_policy
+        WHERE car_id = q.car_id AND coverage @> q.day
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS p ON TRUE
+"""
+
+CAR_PROVIDER_TOTALS_SQL = """
+    SELECT coalesce(p.provider, %(uninsured)s), count(*), sum(c.amount)
+    FROM claim c
+    LEFT JOIN LATERAL (
+        SELECT coalesce(provider, %(unknown)s) AS provider FROM insurance_policy
+        WHERE car_id = c.car_id AND coverage @> c.claim_date
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS p ON TRUE
+    WHERE c.car_id = ANY(%(car_ids)s)
+    GROUP BY coalesce(p.provider, %(uninsured)s)
+"""
+
+APPLY_DELTAS_SQL = """
+    INSERT INTO claim_rollup (dimension, key, claim_count, total_amount, updated_at)
+    SELECT d.dimension, d.key, d.claim_count, d.total_amount, now()
+    FROM unnest(%s::varchar[], %s::varchar[], %s::bigint[], %s::numeric[])
+        AS d(dimension, key, claim_count, total_amount)
+    ON CONFLICT (dimension, key) DO UPDATE SET
+        claim_count = claim_rollup.claim_count + EXCLUDED.claim_count,
+        total_amount = claim_rollup.total_amount + EXCLUDED.total_amount,
+        updated_at = EXCLUDED.updated_at
+    RETURNING id, claim_count
+"""
+
+# (dimension, key, claim count, total amount) over the claims of {table}: the
+# claim table, or one of its partitions.
+TOTALS_SQL = """
+    SELECT 'car', c.car_id::text, count(*), sum(c.amount)
+    FROM {table} c GROUP BY c.car_id
+    UNION ALL
+    SELECT 'make_model', car.make || '/' || car.model, count(*), sum(c.amount)
+    FROM {table} c JOIN car ON car.id = c.car_id GROUP BY car.make, car.model
+    UNION ALL
+    SELECT 'month', to_char(c.claim_date, 'YYYY-MM'), count(*), sum(c.amount)
+    FROM {table} c GROUP BY to_char(c.claim_date, 'YYYY-MM')
+    UNION ALL
+    SELECT 'provider', coalesce(p.provider, %(uninsured)s), count(*), sum(c.amount)
+    FROM {table} c
+    LEFT JOIN LATERAL (
+        SELECT coalesce(provider, %(unknown)s) AS provider FROM insurance_policy
+        WHERE car_id = c.car_id AND coverage @> c.claim_date
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) AS p ON TRUE
+    GROUP BY coalesce(p.provider, %(uninsured)s)
+"""
+
+REBUILD_SQL = f"""
+    INSERT INTO claim_rollup (dimension, key, claim_count, total_amount, updated_at)
+    SELECT totals.*, now() FROM ({TOTALS_SQL.format(table="claim")}) AS totals
+"""
+
+
+def claim_snapshot(claim):
+    return {"car_id": claim.car_id, "claim_date": claim.claim_date, "amount": Decimal(claim.amount)}
+
+
+def apply_claim_deltas(changes):
+    """
+    `changes` is an iterable of (snapshot, sign) where snapshot is the
+    claim_snapshot() of a claim and sign is +1 (added) or -1 (removed).
+    Costs three queries however many claims are involved.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    car_ids = [snapshot["car_id"] for snapshot, _ in changes]
+    days = [snapshot["claim_date"] for snapshot, _ in changes]
+    cars = {car_id: (make, model) for car_id, make, model in
+            Car.objects.filter(id__in=set(car_ids)).values_list("id", "make", "model")}
+    with connection.cursor() as cursor:
+        cursor.execute(PROVIDERS_ON_DATES_SQL, [UNINSURED, car_ids, days, UNKNOWN_PROVIDER])
+        providers = dict(cursor.fetchall())
+
+    deltas = _deltas()
+    for position, (snapshot, sign) in enumerate(changes, start=1):
+        make, model = cars.get(snapshot["car_id"], ("", ""))
+        for dimension, key in (
+            (ClaimRollup.DIMENSION_CAR, str(snapshot["car_id"])),
+            (ClaimRollup.DIMENSION_MAKE_MODEL, f"{make}/{model}"),
+            (ClaimRollup.DIMENSION_MONTH, snapshot["claim_date"].strftime("%Y-%m")),
+            (ClaimRollup.DIMENSION_PROVIDER, providers[position]),
+        ):
+            deltas[(dimension, key)][0] += sign
+            deltas[(dimension, key)][1] += sign * snapshot["amount"]
+    _apply(deltas)
+
+
+def _deltas():
+    return defaultdict(lambda: [0, Decimal("0")])
+
+
+def _apply(deltas):
+    keys = sorted(key for key, (count, amount) in deltas.items() if count or amount)
+    if not keys:
+        return
+    # Sorted keys give concurrent writers a stable lock order.
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(APPLY_DELTAS_SQL, [
+            [dimension for dimension, _ in keys],
+            [key for _, key in keys],
+            [deltas[k][0] for k in keys],
+            [deltas[k][1] for k in keys],
+        ])
+        emptied = [row_id for row_id, claim_count in cursor.fetchall() if claim_count == 0]
+        if emptied:
+            # The upsert keeps these rows locked until commit, so no writer counts them in between.
+            cursor.execute("DELETE FROM claim_rollup WHERE id = ANY(%s)", [emptied])
+
+
+def provider_totals(car_ids):
+    """{provider: (claim count, total amount)} over the claims of `car_ids`, as attributed now."""
+    with connection.cursor() as cursor:
+        cursor.execute(CAR_PROVIDER_TOTALS_SQL, {
+            "uninsured": UNINSURED, "unknown": UNKNOWN_PROVIDER, "car_ids": sorted(car_ids),
+        })
+        return {provider: (count, amount) for provider, count, amount in cursor.fetchall()}
+
+
+def providers_changed(car_ids, before):
+    """Apply the change in provider attribution since `before` = provider_totals(car_ids)."""
+    deltas = _deltas()
+    for sign, totals in ((-1, before), (1, provider_totals(car_ids))):
+        for provider, (count, amount) in totals.items():
+            deltas[(ClaimRollup.DIMENSION_PROVIDER, provider)][0] += sign * count
+            deltas[(ClaimRollup.DIMENSION_PROVIDER, provider)][1] += sign * amount
+    _apply(deltas)
+
+
+@contextmanager
+def claims_reattributed(car_ids):
+    """For bulk policy writers: keeps provider rollups right across the block's writes."""
+    car_ids = set(car_ids)
+    before = provider_totals(car_ids)
+    yield
+    providers_changed(car_ids, before)
+
+
+def remove_claims_in(table, **params):
+    """
+    Subtract every claim in `table`, a claim partition about to be detached
+    (core.partitioning), so the rollups keep covering the live table only.
+    Returns the number of claims subtracted.
+    """
+    deltas = _deltas()
+    removed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(TOTALS_SQL.format(table=table), {"uninsured": UNINSURED, "unknown": UNKNOWN_PROVIDER, **params})
+        for dimension, key, count, amount in cursor.fetchall():
+            deltas[(dimension, key)] = [-count, -amount]
+            if dimension == ClaimRollup.DIMENSION_CAR:
+                removed += count
+    _apply(deltas)
+    return removed
+
+
+def remove_claims_of_cars(car_ids):
+    """
+    Subtract every claim of `car_ids`, cars about to be deleted together with
+    their claims. Returns the number of claims subtracted.
+    """
+    return remove_claims_in("(SELECT * FROM claim WHERE car_id = ANY(%(car_ids)s))", car_ids=sorted(car_ids))
+
+
+def make_model_changed(car_id, previous, current):
+    """Move the car's claim totals from the `previous` to the `current` "<make>/<model>" key."""
+    totals = ClaimRollup.objects.filter(dimension=ClaimRollup.DIMENSION_CAR, key=str(car_id)).values_list(
+        "claim_count", "total_amount"
+    ).first()
+    if totals is None:
+        return
+    deltas = _deltas()
+    deltas[(ClaimRollup.DIMENSION_MAKE_MODEL, previous)] = [-totals[0], -totals[1]]
+    deltas[(ClaimRollup.DIMENSION_MAKE_MODEL, current)] = [totals[0], totals[1]]
+    _apply(deltas)
+
+
+def add_claims(claims):
+    apply_claim_deltas((claim_snapshot(claim), 1) for claim in claims)
+
+
+def rebuild_claim_rollups():
+    """Recompute every rollup row from the claim table in one transaction."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Incremental writers wait until the rebuilt rows are committed.
+        cursor.execute("LOCK TABLE claim_rollup IN EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM claim_rollup")
+        cursor.execute(REBUILD_SQL, {"uninsured": UNINSURED, "unknown": UNKNOWN_PROVIDER})
+        return cursor.rowcount
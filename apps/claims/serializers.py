@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Claim
+from .models import Claim, ClaimRollup
 
 
 class ClaimSerializer(serializers.ModelSerializer):
@@ -23,3 +23,9 @@ class ClaimSerializer(serializers.ModelSerializer):
         if value.year < 1900 or value.year > 2100:
             raise serializers.ValidationError("Date out of valid range (1900–2100).")
         return value
+
+
+class ClaimRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClaimRollup
+        fields = ["dimension", "key", "claim_count", "total_amount", "updated_at"]
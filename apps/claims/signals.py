@@ -0,0 +1,88 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.cars.cache import invalidate_car_history
+from apps.cars.models import Car
+from apps.cars.summary import refresh_car_summaries_on_commit
+from core.search import CLAIMS_KEY, CLAIMS_NAMESPACE
+from core.tracking import previous_values
+from core.versioning import bump_version_on_commit
+
+from .models import Claim
+from .rollups import (add_claims, apply_claim_deltas, claim_snapshot,
+                      remove_claims_of_cars)
+
+SNAPSHOT_FIELDS = ("car_id", "claim_date", "amount")
+
+
+def claims_changed(car_ids):
+    """
+    Invalidate per-car data derived from claims.
+    Called by the model signals and by bulk writers that bypass them.
+    """
+    car_ids = set(car_ids)
+    for car_id in car_ids:
+        invalidate_car_history(car_id)
+    refresh_car_summaries_on_commit(car_ids)
+    if car_ids:
+        bump_version_on_commit(CLAIMS_NAMESPACE, CLAIMS_KEY)
+
+
+def claims_created(claims):
+    """Bulk writers call this after inserting claims without signals."""
+    claims = list(claims)
+    add_claims(claims)
+    claims_changed(claim.car_id for claim in claims)
+
+
+def _deleted_with_car(origin):
+    """True when a claim is deleted by the cascade from its car (or owner)."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and model is not Claim
+
+
+@receiver([post_save, post_delete], sender=Claim)
+def claim_changed(sender, instance, origin=None, **kwargs):
+    if _deleted_with_car(origin):
+        return  # car_claims_deleted covers the car once
+    car_ids = [instance.car_id]
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is not None:
+        car_ids.append(previous["car_id"])  # the claim moved to another car
+    claims_changed(car_ids)
+
+
+@receiver(pre_save, sender=Claim)
+def remember_claim_snapshot(sender, instance, raw=False, **kwargs):
+    # Read from the values the instance was loaded with (core.tracking), not a query.
+    instance._rollup_previous = None if raw else previous_values(instance, SNAPSHOT_FIELDS)
+
+
+@receiver(post_save, sender=Claim)
+def roll_up_saved_claim(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = claim_snapshot(instance)
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous == current:
+        return  # e.g. only the description changed
+    changes = [(current, 1)]
+    if previous is not None:
+        changes.append((previous, -1))
+    apply_claim_deltas(changes)
+
+
+@receiver(pre_delete, sender=Claim)
+def roll_up_deleted_claim(sender, instance, origin=None, **kwargs):
+    if _deleted_with_car(origin):
+        return  # subtracted per car by car_claims_deleted
+    apply_claim_deltas([(claim_snapshot(instance), -1)])
+
+
+@receiver(pre_delete, sender=Car)
+def car_claims_deleted(sender, instance, **kwargs):
+    # pre_delete runs for every collected object before any row is deleted,
+    # so the car's claims and policies are all still there to be totalled.
+    if remove_claims_of_cars([instance.pk]):
+        claims_changed([instance.pk])
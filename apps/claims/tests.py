@@ -1,3 +1,310 @@
-from django.test import TestCase
+import json
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cars.factories import CarFactory
+from apps.claims.factories import ClaimFactory
+from apps.claims.models import Claim
+from apps.policies.factories import InsurancePolicyFactory
+
+
+@pytest.fixture
+def auth_client(db):
+    # Staff see every owner's cars (core.scoping); customer scoping has its own tests.
+    user = User.objects.create_user(username="tester", password="test1234", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+def test_claim_list_cursor_pagination_walks_every_row_once(auth_client):
+    car = CarFactory()
+    today = timezone.now().date()
+    # Duplicate claim dates exercise the (claim_date, id) tie-breaker.
+    claims = [ClaimFactory(car=car, claim_date=today - timezone.timedelta(days=i // 2)) for i in range(5)]
+    expected = [c.id for c in sorted(claims, key=lambda c: (c.claim_date, c.id), reverse=True)]
+
+    seen = []
+    url = "/api/claims/?pagination=cursor&page_size=2&count=exact"
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert response.data["count"] == 5
+        seen.extend(row["id"] for row in response.data["results"])
+        url = response.data["next"]
+
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_claim_cursor_starts_an_index_range_scan():
+    from django.db import connection
+
+    from core.pagination import KeysetPagination
+
+    paginator = KeysetPagination()
+    paginator.ordering = [("claim_date", True), ("id", True)]
+    queryset = Claim.objects.order_by("-claim_date", "-id").filter(paginator.after(["2025-03-01", 500], Claim))
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_bitmapscan = off")
+        plan = queryset[:10].explain()
+    assert "idx_claim_date_id" in plan
+    assert "Index Cond: (claim_date <= '2025-03-01'::date)" in plan
+
+
+@pytest.mark.django_db
+def test_claim_list_cursor_pagination_skips_count_by_default(auth_client):
+    ClaimFactory()
+    response = auth_client.get("/api/claims/?pagination=cursor")
+    assert "count" not in response.data
+    assert len(response.data["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_claim_list_invalid_cursor(auth_client):
+    response = auth_client.get("/api/claims/?cursor=not-a-cursor")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_claim_export_csv_applies_filters(auth_client):
+    car = CarFactory()
+    inside = ClaimFactory(car=car, claim_date=timezone.datetime(2025, 3, 1).date())
+    ClaimFactory(car=car, claim_date=timezone.datetime(2024, 3, 1).date())
+    ClaimFactory(claim_date=timezone.datetime(2025, 3, 1).date())
+
+    response = auth_client.get(f"/api/claims/export/?from=2025-01-01&to=2025-12-31&car={car.id}")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "id,car_id,claim_date,amount,description,created_at"
+    assert [line.split(",")[0] for line in lines[1:]] == [str(inside.id)]
+
+    # The command writes through self.stdout, so callers can capture it.
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    out = StringIO()
+    call_command("export_data", "claims", "--output", "ndjson", "--from", "2025-01-01", "--car", str(car.id), stdout=out)
+    assert [json.loads(line)["id"] for line in out.getvalue().splitlines()] == [inside.id]
+
+
+@pytest.mark.django_db
+def test_bulk_import_claims_reports_row_errors(auth_client):
+    car = CarFactory()
+    body = "\n".join([
+        f'{{"vin": "{car.vin}", "claim_date": "2025-02-01", "amount": "300.00", "description": "Door dent"}}',
+        f'{{"car_id": {car.id}, "claim_date": "2025-02-02", "amount": "-5", "description": "Bad amount"}}',
+        '{"vin": "NOSUCHVIN", "claim_date": "2025-02-03", "amount": "10", "description": "Unknown car"}',
+    ])
+
+    response = auth_client.post("/api/import/claims/", body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.data["created"] == 1
+    assert [error["row"] for error in response.data["errors"]] == [2, 3]
+    assert "amount" in response.data["errors"][0]["errors"]
+    assert Claim.objects.filter(car=car).count() == 1
+
+
+@pytest.mark.django_db
+def test_claim_batch_submission_returns_per_item_results(auth_client, django_assert_max_num_queries):
+    cars = CarFactory.create_batch(20)
+    items = [
+        {"car_id": car.id, "claim_date": "2025-03-01", "amount": "120.00", "description": f"Hail {car.id}"}
+        for car in cars
+    ]
+    items.insert(3, {"vin": cars[0].vin, "claim_date": "2025-03-02", "amount": "0", "description": "Zero"})
+    items.insert(5, {"car_id": 999999, "claim_date": "2025-03-02", "amount": "10", "description": "Ghost"})
+
+    # Car lookup, bulk insert and post-write upkeep: independent of the item count.
+    with django_assert_max_num_queries(15):
+        response = auth_client.post("/api/claims/batch/", {"items": items}, format="json")
+    assert response.status_code == 200
+    assert (response.data["created"], response.data["failed"]) == (20, 2)
+
+    results = response.data["results"]
+    assert [result["index"] for result in results] == list(range(22))
+    assert [results[3]["status"], results[5]["status"]] == [400, 404]
+    assert "amount" in results[3]["errors"]
+    created = results[0]
+    assert created["status"] == 201
+    assert created["location"] == f"/api/cars/{cars[0].id}/claims/{created['claim']['id']}"
+    assert Claim.objects.count() == 20
+
+    too_many = auth_client.post("/api/claims/batch/", {"items": [items[0]] * 1001}, format="json")
+    assert too_many.status_code == 400
+
+
+@pytest.mark.django_db
+def test_partitioned_claims_keep_working_and_prune_by_date(auth_client, django_capture_on_commit_callbacks):
+    from django.db import connection
+
+    from apps.cars.models import CarSummary
+    from apps.claims.models import ClaimRollup
+    from core.partitioning import (convert_to_partitioned, detach_partitions,
+                                   ensure_partitions, partitions)
+
+    car = CarFactory()
+    for day in (date(2025, 1, 15), date(2025, 2, 10), date(2025, 3, 5)):
+        ClaimFactory(car=car, claim_date=day)
+    created, _ = convert_to_partitioned("claim", date(2025, 3, 1), 1)
+    assert created == ["claim_p2025_01", "claim_p2025_02", "claim_p2025_03", "claim_p2025_04"]
+
+    # Ids keep coming from a sequence; unpartitioned months land in the default partition.
+    response = auth_client.post(f"/api/cars/{car.id}/claims/", {
+        "claim_date": "2025-06-01", "amount": "50.00", "description": "Flood",
+    }, format="json")
+    assert response.status_code == 201
+    assert ensure_partitions("claim", date(2025, 6, 1), 0) == ["claim_p2025_06"]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM claim_p2025_06")
+        assert cursor.fetchone()[0] == 1
+
+    response = auth_client.get("/api/claims/?from=2025-02-01&to=2025-03-31")
+    assert [claim["claim_date"] for claim in response.data["results"]] == ["2025-03-05", "2025-02-10"]
+    plan = Claim.objects.filter(claim_date__gte=date(2025, 2, 1), claim_date__lte=date(2025, 2, 28)).explain()
+    assert "claim_p2025_02" in plan and "claim_p2025_03" not in plan
+
+    history = auth_client.get(f"/api/cars/{car.id}/history/?from=2025-03-01").data
+    assert [entry["claimDate"] for entry in history] == [date(2025, 3, 5), date(2025, 6, 1)]
+    assert auth_client.get("/api/claims/?from=2025-03-01&to=2025-02-01").status_code == 400
+
+    # Cache the full history first: detaching must invalidate it.
+    assert len(auth_client.get(f"/api/cars/{car.id}/history/").data) == 4
+    with django_capture_on_commit_callbacks(execute=True):
+        assert detach_partitions("claim", date(2025, 2, 1)) == ["claim_p2025_01"]
+    assert [name for _, name, _ in partitions("claim")][0] == "claim_p2025_02"
+    assert Claim.objects.filter(car=car).count() == 3
+
+    # Aggregates follow the live table, as a rebuild would.
+    assert ClaimRollup.objects.get(dimension="car", key=str(car.id)).claim_count == 3
+    assert not ClaimRollup.objects.filter(dimension="month", key="2025-01").exists()
+    assert CarSummary.objects.get(car=car).claim_count == 3
+    assert len(auth_client.get(f"/api/cars/{car.id}/history/").data) == 3
+
+
+@pytest.mark.django_db
+def test_claim_rollups_follow_writes_and_match_rebuild(auth_client, django_assert_num_queries):
+    from apps.claims.models import ClaimRollup
+    from apps.claims.rollups import rebuild_claim_rollups
+    from apps.policies.models import InsurancePolicy
+
+    policy = InsurancePolicyFactory(provider="Allianz", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+    car = policy.car
+    auth_client.post(f"/api/cars/{car.id}/claims/", {"claim_date": "2025-03-01", "amount": "100.00", "description": "Door"}, format="json")
+    auth_client.post(f"/api/cars/{car.id}/claims/", {"claim_date": "2026-02-01", "amount": "50.00", "description": "Light"}, format="json")
+    moved = Claim.objects.get(claim_date=date(2025, 3, 1))
+    moved.claim_date = date(2025, 4, 1)
+    moved.save()
+
+    response = auth_client.get("/api/claims/summary/?by=month")
+    # The emptied 2025-03 row is deleted rather than kept at zero.
+    assert [(row["key"], row["claim_count"]) for row in response.data["results"]] == [
+        ("2025-04", 1), ("2026-02", 1),
+    ]
+    response = auth_client.get("/api/claims/summary/?by=provider&key=Allianz")
+    assert response.data["results"][0]["total_amount"] == "100.00"
+
+    Claim.objects.filter(claim_date=date(2026, 2, 1)).delete()
+
+    # Policy and car edits re-attribute existing claims.
+    policy.provider = "AXA"
+    policy.save()
+    InsurancePolicyFactory(car=car, provider="Generali", start_date=date(2025, 4, 1), end_date=date(2025, 4, 30))
+    car.model = "Renamed"
+    car.save()
+
+    def rollups():
+        return {(row.dimension, row.key): (row.claim_count, row.total_amount) for row in ClaimRollup.objects.all()}
+
+    incremental = rollups()
+    rebuild_claim_rollups()
+    assert incremental == rollups()
+    assert incremental[("make_model", f"{car.make}/Renamed")] == (1, Decimal("100.00"))
+    assert incremental[("provider", "Generali")] == (1, Decimal("100.00"))
+    assert ("provider", "Allianz") not in incremental
+
+    InsurancePolicy.objects.filter(provider="Generali").delete()
+    assert rollups()[("provider", "AXA")] == (1, Decimal("100.00"))
+
+    # Updates read the previous values from the loaded instance; nothing to roll up here.
+    claim = Claim.objects.get(claim_date=date(2025, 4, 1))
+    claim.description = "Door and hinge"
+    with django_assert_num_queries(1):
+        claim.save()
+
+    assert auth_client.get("/api/claims/summary/?by=owner").status_code == 400
+
+
+@pytest.mark.django_db
+def test_car_delete_subtracts_its_claims_from_rollups_in_bulk(django_assert_max_num_queries):
+    from apps.claims.models import ClaimRollup
+    from apps.claims.rollups import rebuild_claim_rollups
+
+    def rollups():
+        return {(row.dimension, row.key): (row.claim_count, row.total_amount) for row in ClaimRollup.objects.all()}
+
+    policy = InsurancePolicyFactory(provider="Allianz", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+    kept = ClaimFactory(claim_date=date(2025, 3, 1), amount=Decimal("40.00"))
+    for day in range(1, 21):
+        ClaimFactory(car=policy.car, claim_date=date(2025, 3, day), amount=Decimal("10.00"))
+    assert rollups()[("car", str(policy.car_id))] == (20, Decimal("200.00"))
+
+    # The rollups cost the same however many claims the car had.
+    with django_assert_max_num_queries(20):
+        policy.car.delete()
+    incremental = rollups()
+    rebuild_claim_rollups()
+    assert incremental == rollups()
+    assert incremental[("month", "2025-03")] == (1, Decimal("40.00"))
+    assert ("provider", "Allianz") not in incremental
+
+    # Deleting the owner cascades through the car the same way.
+    User.objects.filter(pk=kept.car.owner_id).delete()
+    assert not ClaimRollup.objects.exists()
+
+
+@pytest.mark.django_db
+def test_claim_search_ranks_descriptions_and_follows_writes(auth_client, django_capture_on_commit_callbacks):
+    from django.core.cache import cache
+
+    cache.clear()
+    car = CarFactory()
+    mirror = ClaimFactory(car=car, description="Side mirror replaced after parking damage")
+    ClaimFactory(car=car, description="Windscreen chip repaired")
+
+    response = auth_client.get("/api/claims/search/?q=mirrors")
+    assert [claim["id"] for claim in response.data["results"]] == [mirror.id]
+    assert auth_client.get("/api/claims/search/?q=mirrors").data == response.data  # served from cache
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ClaimFactory(car=car, description="Mirror glass cracked")
+    assert auth_client.get("/api/claims/search/?q=mirrors").data["count"] == 2
+
+
+@pytest.mark.django_db
+def test_claim_search_cursor_pages_through_tied_ranks(auth_client):
+    from django.core.cache import cache
+
+    cache.clear()
+    car = CarFactory()
+    # Identical descriptions share one rank, which float4 cannot hold exactly.
+    tied = [ClaimFactory(car=car, description="Side mirror cracked in car park").id for _ in range(7)]
+    tied.append(ClaimFactory(car=car, description="Mirror").id)
+
+    seen = []
+    url = "/api/claims/search/?q=mirror&pagination=cursor&page_size=2"
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        seen.extend(claim["id"] for claim in response.data["results"])
+        url = response.data["next"]
+    assert sorted(seen) == sorted(tied)
@@ -1,19 +1,52 @@
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from apps.cars.models import Car
+from core.dates import parse_date_window
+from core.export import (CLAIM_EXPORT_FIELDS, claim_export_queryset,
+                         export_response, parse_export_filters,
+                         parse_export_output)
+from core.ingest import INGEST_BATCH_SIZE, ClaimBatchImporter
+from core.routing import ReplicaReadMixin
+from core.scoping import OwnerScopedMixin
+from core.search import (CLAIMS_KEY, CLAIMS_NAMESPACE, cached_search_response,
+                         claim_search_queryset, parse_search_term)
 
-from .models import Claim
-from .serializers import ClaimSerializer
+from .models import Claim, ClaimRollup
+from .serializers import ClaimRollupSerializer, ClaimSerializer
 
+# One importer batch, so a submission is validated and written as a unit.
+CLAIM_BATCH_MAX_ITEMS = INGEST_BATCH_SIZE
 
-class ClaimViewSet(viewsets.ModelViewSet):
+
+class ClaimViewSet(ReplicaReadMixin, OwnerScopedMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Claim.objects.all().order_by("-claim_date")
+    keyset_ordering = ("-claim_date", "-id")
     serializer_class = ClaimSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # ?from / ?to (claim_date, inclusive); on a partitioned claim table
+            # only the months in range are scanned (core.partitioning).
+            start, end = parse_date_window(self.request.query_params)
+            if start:
+                queryset = queryset.filter(claim_date__gte=start)
+            if end:
+                queryset = queryset.filter(claim_date__lte=end)
+        return queryset
+
+    def get_keyset_ordering(self):
+        if self.action == "summary":
+            return ("key", "id")
+        if self.action == "search":
+            return ("-rank", "-id")
+        return self.keyset_ordering
+
     @action(detail=False, methods=["post"], url_path=r"cars/(?P<car_id>\d+)/claims")
     def create_claim_for_car(self, request, car_id=None):
         """
@@ -22,7 +55,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
         """
         # Check if car exists
         try:
-            car = Car.objects.get(pk=car_id)
+            car = self.owned_cars().get(pk=car_id)
         except Car.DoesNotExist:
             return Response({"detail": "Car not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -38,3 +71,65 @@ class ClaimViewSet(viewsets.ModelViewSet):
         headers = {"Location": location}
 
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """
+        POST /api/claims/batch/  {"items": [{"car_id" | "vin", "claim_date", "amount", "description"}, ...]}
+        Submit many claims across cars at once: cars are resolved with one
+        query, valid items inserted with one bulk_create. Returns one result
+        per item, in request order: 201 with its Location, 400 with errors,
+        or 404 when the car is unknown (or not the caller's).
+        """
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"items": ["Expected a non-empty list."]})
+        if len(items) > CLAIM_BATCH_MAX_ITEMS:
+            raise ValidationError({"items": [f"At most {CLAIM_BATCH_MAX_ITEMS} items per request."]})
+
+        result = ClaimBatchImporter(owner=request.user, batch_size=CLAIM_BATCH_MAX_ITEMS).submit(items)
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        GET /api/claims/export?output=csv|ndjson&from=&to=&provider=&car=
+        Stream every matching claim without pagination.
+        """
+        output = parse_export_output(request.query_params)
+        queryset = self.scope_queryset(claim_export_queryset(parse_export_filters(request.query_params)))
+        return export_response(queryset, CLAIM_EXPORT_FIELDS, output, "claims")
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        GET /api/claims/search?q=
+        Full-text search over claim descriptions (web search syntax: "quoted
+        phrases", or, -exclusions), best matches first.
+        """
+        term = parse_search_term(request.query_params)
+        queryset = claim_search_queryset(term, self.get_queryset()).order_by("-rank", "-id")
+        return cached_search_response(
+            self, request, queryset, ClaimSerializer, CLAIMS_NAMESPACE, CLAIMS_KEY, self.owner_scope_key()
+        )
+
+    @action(detail=False, methods=["get"], url_path="summary", permission_classes=[IsAdminUser])
+    def summary(self, request):
+        """
+        GET /api/claims/summary?by=car|make_model|month|provider[&key=]
+        Claim counts and totals read from the precomputed rollup table.
+        Portfolio-wide, so staff only.
+        """
+        dimension = request.query_params.get("by")
+        dimensions = [choice for choice, _ in ClaimRollup.DIMENSIONS]
+        if dimension not in dimensions:
+            raise ValidationError({"detail": f"'by' must be one of: {', '.join(dimensions)}."})
+
+        queryset = ClaimRollup.objects.filter(dimension=dimension).order_by("key")
+        key = request.query_params.get("key")
+        if key is not None:
+            queryset = queryset.filter(key=key)
+
+        page = self.paginate_queryset(queryset)
+        serializer = ClaimRollupSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
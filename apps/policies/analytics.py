@@ -0,0 +1,248 @@
+"""
+Portfolio coverage analytics.
+
+For every day of a window: how many cars were insured (by `provider`
+when one is given), how many cars registered by that day were not
+insured by anyone, and, per provider, how many cars that provider
+covered while they had two or more policies in force (from any
+providers), so a car can count under several providers.
+Short windows are computed in one SQL statement over generate_series;
+long windows fetch the (clipped) policy intervals once and run a NumPy
+sweep-line over them, which scales with the number of policies instead
+of policies x days. Results are cached per (window, provider) and
+invalidated through a fleet-wide version stamp.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from core.versioning import get_version
+
+VERSION_NAMESPACE = "coverage-analytics"
+VERSION_KEY = "fleet"
+UNKNOWN_PROVIDER = "unknown"
+
+# A car joins the fleet on the (UTC) day it was registered. `cover` spans
+# every provider: overlaps and the uninsured count do not depend on the
+# provider filter, which only selects whose insured cars and overlaps are
+# reported.
+DAILY_COVERAGE_SQL = """
+    WITH days AS (
+        SELECT day::date FROM generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS day
+    ),
+    cover AS (
+        SELECT days.day, p.car_id, coalesce(p.provider, %(unknown)s) AS provider, count(*) AS policies,
+               bool_or(c.created_at::date <= days.day) AS registered
+        FROM days
+        JOIN insurance_policy p ON p.coverage @> days.day
+        JOIN car c ON c.id = p.car_id
+        WHERE p.coverage && daterange(%(start)s::date, %(end)s::date, '[]')
+        GROUP BY days.day, p.car_id, coalesce(p.provider, %(unknown)s)
+    ),
+    per_car AS (
+        SELECT day, car_id, sum(policies) AS policies, bool_or(registered) AS registered
+        FROM cover
+        GROUP BY day, car_id
+    ),
+    insured AS (
+        SELECT day,
+               count(DISTINCT car_id) FILTER (WHERE %(provider)s::text IS NULL OR provider = %(provider)s) AS cars
+        FROM cover
+        GROUP BY day
+    ),
+    insured_fleet AS (
+        SELECT day, count(*) AS cars FROM per_car WHERE registered GROUP BY day
+    ),
+    overlapping AS (
+        SELECT day, json_object_agg(provider, cars) AS by_provider
+        FROM (
+            SELECT cover.day, cover.provider, count(*) AS cars
+            FROM cover
+            JOIN per_car USING (day, car_id)
+            WHERE per_car.policies > 1 AND (%(provider)s::text IS NULL OR cover.provider = %(provider)s)
+            GROUP BY cover.day, cover.provider
+        ) AS per_provider
+        GROUP BY day
+    ),
+    registered AS (
+        SELECT created_at::date AS day, count(*) AS cars
+        FROM car
+        WHERE created_at::date BETWEEN %(start)s::date AND %(end)s::date
+        GROUP BY created_at::date
+    ),
+    fleet AS (
+        SELECT days.day,
+               ((SELECT count(*) FROM car WHERE created_at::date < %(start)s::date)
+               + sum(coalesce(registered.cars, 0)) OVER (ORDER BY days.day))::bigint AS cars
+        FROM days
+        LEFT JOIN registered USING (day)
+    )
+    SELECT days.day,
+           fleet.cars,
+           coalesce(insured.cars, 0),
+           coalesce(insured_fleet.cars, 0),
+           coalesce(overlapping.by_provider, '{}'::json)
+    FROM days
+    JOIN fleet USING (day)
+    LEFT JOIN insured USING (day)
+    LEFT JOIN insured_fleet USING (day)
+    LEFT JOIN overlapping USING (day)
+    ORDER BY days.day
+"""
+
+# Policy intervals clipped to the window, as day offsets from its start,
+# with the offset of the day their car was registered (negative when before
+# the window).
+WINDOW_INTERVALS_SQL = """
+    SELECT p.car_id, coalesce(p.provider, %(unknown)s),
+           greatest(p.start_date - %(start)s::date, 0),
+           least(p.end_date - %(start)s::date, %(last)s),
+           c.created_at::date - %(start)s::date
+    FROM insurance_policy p
+    JOIN car c ON c.id = p.car_id
+    WHERE p.coverage && daterange(%(start)s::date, %(end)s::date, '[]')
+"""
+
+# Cars registered by the end of the window, per day offset (0 for earlier ones).
+FLEET_REGISTRATIONS_SQL = """
+    SELECT greatest(created_at::date - %(start)s::date, 0), count(*)
+    FROM car
+    WHERE created_at::date <= %(end)s::date
+    GROUP BY 1
+"""
+
+
+def daily_coverage(start, end, provider=None):
+    """Cached list of per-day coverage counts for [start, end]."""
+    version = get_version(VERSION_NAMESPACE, VERSION_KEY)
+    key = f"coverage-analytics:{version}:{start}:{end}:{provider or ''}"
+    result = cache.get(key)
+    if result is None:
+        # Raw cursors on `connection` always read the primary (core.routing).
+        if (end - start).days + 1 > settings.COVERAGE_ANALYTICS_SWEEP_DAYS:
+            result = {"method": "sweep", "days": sweep_daily_coverage(start, end, provider)}
+        else:
+            result = {"method": "sql", "days": sql_daily_coverage(start, end, provider)}
+        cache.set(key, result, timeout=settings.COVERAGE_ANALYTICS_CACHE_TTL)
+    return result
+
+
+def _day(day, fleet, insured, insured_fleet, overlapping):
+    return {
+        "date": day.isoformat(),
+        "insured": insured,
+        "uninsured": fleet - insured_fleet,
+        "overlapping": overlapping,
+    }
+
+
+def sql_daily_coverage(start, end, provider=None):
+    params = {"start": start, "end": end, "provider": provider, "unknown": UNKNOWN_PROVIDER}
+    with connection.cursor() as cursor:
+        cursor.execute(DAILY_COVERAGE_SQL, params)
+        return [_day(*row) for row in cursor.fetchall()]
+
+
+def covered_group_counts(groups, starts, ends, days):
+    """
+    Per-day number of distinct groups (e.g. cars) covered by at least one of
+    their inclusive [start, end] day intervals.
+    """
+    counts = np.zeros(days + 1, dtype=np.int64)
+    if not len(groups):
+        return counts[:days]
+    order = np.lexsort((starts, groups))
+    groups, starts, ends = groups[order], starts[order], ends[order]
+    # Running max of `ends` restarted per group: shift each group above the previous one.
+    rank = np.concatenate(([0], np.cumsum(groups[1:] != groups[:-1])))
+    stride = days + 2
+    reach = np.maximum.accumulate(rank * stride + ends) - rank * stride
+    new_group = np.concatenate(([True], rank[1:] != rank[:-1]))
+    previous_reach = np.concatenate(([-2], reach[:-1]))
+    new_block = new_group | (starts > previous_reach + 1)
+    block_first = np.flatnonzero(new_block)
+    block_last = np.concatenate((block_first[1:] - 1, [len(starts) - 1]))
+    np.add.at(counts, starts[block_first], 1)
+    np.add.at(counts, reach[block_last] + 1, -1)
+    return np.cumsum(counts)[:days]
+
+
+def overlap_segments(groups, starts, ends):
+    """
+    Sub-intervals where a group has two or more intervals at once: each
+    interval overlaps whatever the earlier intervals of its group still cover.
+    """
+    if not len(groups):
+        return groups, starts, ends
+    order = np.lexsort((starts, groups))
+    groups, starts, ends = groups[order], starts[order], ends[order]
+    rank = np.concatenate(([0], np.cumsum(groups[1:] != groups[:-1])))
+    stride = int(ends.max()) + 3
+    reach = np.maximum.accumulate(rank * stride + ends) - rank * stride
+    new_group = np.concatenate(([True], rank[1:] != rank[:-1]))
+    previous_reach = np.where(new_group, -1, np.concatenate(([-1], reach[:-1])))
+    segment_ends = np.minimum(ends, previous_reach)
+    keep = starts <= segment_ends
+    return groups[keep], starts[keep], segment_ends[keep]
+
+
+def sweep_daily_coverage(start, end, provider=None):
+    days = (end - start).days + 1
+    params = {"start": start, "end": end, "last": days - 1, "unknown": UNKNOWN_PROVIDER}
+    with connection.cursor() as cursor:
+        cursor.execute(WINDOW_INTERVALS_SQL, params)
+        rows = cursor.fetchall()
+        cursor.execute(FLEET_REGISTRATIONS_SQL, params)
+        registrations = cursor.fetchall()
+
+    cars = np.array([row[0] for row in rows], dtype=np.int64)
+    providers = np.array([row[1] for row in rows], dtype=object)
+    starts = np.array([row[2] for row in rows], dtype=np.int64)
+    ends = np.array([row[3] for row in rows], dtype=np.int64)
+    registered = np.array([row[4] for row in rows], dtype=np.int64)
+
+    fleet = np.zeros(days, dtype=np.int64)
+    for offset, count in registrations:
+        fleet[offset] += count
+    fleet = np.cumsum(fleet)
+
+    # Uninsured: registered cars not covered by any provider.
+    fleet_starts = np.maximum(starts, registered)
+    in_fleet = fleet_starts <= ends
+    insured_fleet = covered_group_counts(cars[in_fleet], fleet_starts[in_fleet], ends[in_fleet], days)
+
+    overlap_cars, overlap_starts, overlap_ends = overlap_segments(cars, starts, ends)
+    overlap = covered_group_counts(overlap_cars, overlap_starts, overlap_ends, days)
+    insured = {}
+    overlapping = {}
+    for name in sorted(set(providers) if provider is None else {provider}):
+        mask = providers == name
+        insured[name] = covered_group_counts(cars[mask], starts[mask], ends[mask], days)
+        if not overlap.any():
+            continue
+        # Cars this provider covers on days they hold 2+ policies:
+        # |covered ∩ overlap| = |covered| + |overlap| - |covered ∪ overlap|.
+        either = covered_group_counts(
+            np.concatenate((cars[mask], overlap_cars)),
+            np.concatenate((starts[mask], overlap_starts)),
+            np.concatenate((ends[mask], overlap_ends)),
+            days,
+        )
+        counts = insured[name] + overlap - either
+        if counts.any():
+            overlapping[name] = counts
+
+    insured_cars = covered_group_counts(cars, starts, ends, days) if provider is None else insured[provider]
+    return [
+        _day(
+            start + timedelta(days=offset),
+            int(fleet[offset]),
+            int(insured_cars[offset]),
+            int(insured_fleet[offset]),
+            {name: int(counts[offset]) for name, counts in overlapping.items() if counts[offset]},
+        )
+        for offset in range(days)
+    ]
@@ -0,0 +1,115 @@
+"""
+In-process coverage index.
+
+For each car the worker keeps its policies as sorted, merged
+[start_date, end_date] intervals (as date ordinals) and answers
+"is the car insured on day X" by bisection. Entries are validated against
+a per-car version stamp in the shared cache, so a policy written by any
+worker invalidates the entry everywhere.
+
+A stamp is re-read at most once per COVERAGE_INDEX_STAMP_TTL seconds per
+entry; lookups in between cost no network round trip. Writes made by this
+worker drop the entry at once (apps.policies.signals), while writes made by
+other workers are picked up within the TTL. Set it to 0 to check the stamp
+on every lookup.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+
+import structlog
+from django.conf import settings
+
+from core.routing import primary_reads
+from core.versioning import get_version
+
+from .models import InsurancePolicy
+
+logger = structlog.get_logger()
+
+VERSION_NAMESPACE = "coverage"
+
+
+def merge_intervals(intervals):
+    """
+    Merge inclusive (start_date, end_date) pairs sorted by start_date.
+    Adjacent intervals (one ends the day before the next starts) are merged too.
+    """
+    starts, ends = [], []
+    for start_date, end_date in intervals:
+        start, end = start_date.toordinal(), end_date.toordinal()
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+class CoverageIndex:
+    """LRU-bounded map of car id -> (version, stamp checked at, starts, ends)."""
+
+    def __init__(self, max_cars, stamp_ttl):
+        self.max_cars = max_cars
+        self.stamp_ttl = stamp_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_covered(self, car_id, day):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(car_id)
+            if entry is not None:
+                self._entries.move_to_end(car_id)
+
+        if entry is None or now - entry[1] >= self.stamp_ttl:
+            try:
+                version = get_version(VERSION_NAMESPACE, car_id)
+            except Exception:
+                # Without a version stamp we cannot prove the entry is fresh.
+                logger.warning("Coverage index version unavailable; querying database.", car_id=car_id)
+                return InsurancePolicy.objects.filter(car_id=car_id, coverage__contains=day).exists()
+            if entry is None or entry[0] != version:
+                entry = self._load(car_id, version, now)
+            else:
+                entry = (version, now, *entry[2:])
+                with self._lock:
+                    if car_id in self._entries:
+                        self._entries[car_id] = entry
+
+        _, _, starts, ends = entry
+        ordinal = day.toordinal()
+        position = bisect_right(starts, ordinal) - 1
+        return position >= 0 and ordinal <= ends[position]
+
+    def invalidate(self, car_id):
+        with self._lock:
+            self._entries.pop(car_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, car_id, version, checked_at):
+        # The version is read before the rows: a write that commits in between
+        # bumps the stamp, so the next lookup reloads instead of trusting this entry.
+        with primary_reads():
+            rows = list(
+                InsurancePolicy.objects.filter(car_id=car_id)
+                .order_by("start_date")
+                .values_list("start_date", "end_date")
+            )
+        entry = (version, checked_at, *merge_intervals(rows))
+        with self._lock:
+            self._entries[car_id] = entry
+            self._entries.move_to_end(car_id)
+            while len(self._entries) > self.max_cars:
+                self._entries.popitem(last=False)
+        return entry
+
+
+coverage_index = CoverageIndex(
+    max_cars=getattr(settings, "COVERAGE_INDEX_MAX_CARS", 100_000),
+    stamp_ttl=getattr(settings, "COVERAGE_INDEX_STAMP_TTL", 1.0),
+)
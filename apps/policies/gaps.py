@@ -0,0 +1,58 @@
+"""
+Per-car coverage gap detection.
+
+Policies are walked once per car in (start_date, id) order. Each row sees the
+latest end_date among the car's earlier policies (a running max rather than a
+plain LAG(end_date), so a short policy nested inside a long one does not open
+a false gap); a start more than a day after that opens a gap. The last row of
+each car yields the open-ended gap after its final coverage, and cars without
+any policy get a (NULL, NULL) row. Both window functions share one sort, which
+the (car, start_date, end_date) index already provides.
+"""
+from django.db import connection, transaction
+
+REFRESH_GAPS_SQL = """
+    WITH ordered AS (
+        SELECT car_id, start_date,
+               max(end_date) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS covered_until,
+               max(end_date) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS covered_through,
+               lead(id) OVER w IS NULL AS is_last
+        FROM insurance_policy
+        WHERE car_id BETWEEN %(first)s AND %(last)s
+        WINDOW w AS (PARTITION BY car_id ORDER BY start_date, id)
+    ),
+    gaps AS (
+        SELECT car_id, covered_until + 1 AS gap_start, start_date - 1 AS gap_end
+        FROM ordered WHERE start_date > covered_until + 1
+        UNION ALL
+        SELECT car_id, covered_through + 1, NULL FROM ordered WHERE is_last
+        UNION ALL
+        SELECT c.id, NULL, NULL FROM car c
+        LEFT JOIN ordered ON ordered.car_id = c.id AND ordered.is_last
+        WHERE c.id BETWEEN %(first)s AND %(last)s AND ordered.car_id IS NULL
+    )
+    INSERT INTO coverage_gap (car_id, gap_start, gap_end, detected_at)
+    SELECT car_id, gap_start, gap_end, %(now)s FROM gaps
+"""
+
+CAR_ID_CHUNK_SQL = "SELECT id FROM car WHERE id > %s ORDER BY id LIMIT %s"
+
+
+def car_id_chunks(chunk_size, after=0):
+    """Yield (first_id, last_id) covering every car, `chunk_size` cars at a time."""
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(CAR_ID_CHUNK_SQL, [after, chunk_size])
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        after = ids[-1]
+
+
+def refresh_coverage_gaps(first_id, last_id, detected_at):
+    """Replace the stored gaps of cars first_id..last_id; returns the number of gaps."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM coverage_gap WHERE car_id BETWEEN %s AND %s", [first_id, last_id])
+        cursor.execute(REFRESH_GAPS_SQL, {"first": first_id, "last": last_id, "now": detected_at})
+        return cursor.rowcount
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-17 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0002_insuranceexpirylog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='insurancepolicy',
+            index=models.Index(fields=['logged_expiry_at', 'id'], name='idx_policy_expiry_id'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='insurancepolicy',
+            index=models.Index(condition=models.Q(('logged_expiry_at__isnull', True)), fields=['end_date', 'id'], name='idx_policy_unlogged_end'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-17 19:00
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0004_policy_unlogged_index'),
+    ]
+
+    operations = [
+        # GiST support for the bigint car_id column next to the range.
+        BtreeGistExtension(),
+        # A stored generated column: PostgreSQL rewrites insurance_policy to fill it,
+        # holding ACCESS EXCLUSIVE for the whole rewrite. Every coverage query depends
+        # on the column, so it is not optional; schedule this migration accordingly.
+        migrations.AddField(
+            model_name='insurancepolicy',
+            name='coverage',
+            field=models.GeneratedField(db_persist=True, expression=models.Func('start_date', 'end_date', models.Value('[]'), function='daterange', output_field=django.contrib.postgres.fields.ranges.DateRangeField()), output_field=django.contrib.postgres.fields.ranges.DateRangeField()),
+        ),
+        migrations.AddIndex(
+            model_name='insurancepolicy',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['car', 'coverage'], name='idx_policy_car_coverage'),
+        ),
+    ]
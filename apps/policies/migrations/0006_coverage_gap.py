@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-17 19:05
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0003_car_owner_alter_car_year_of_manufacture_and_more'),
+        ('policies', '0005_policy_coverage_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverageGap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gap_start', models.DateField(blank=True, null=True)),
+                ('gap_end', models.DateField(blank=True, null=True)),
+                ('period', models.GeneratedField(db_persist=True, expression=models.Func('gap_start', 'gap_end', models.Value('[]'), function='daterange', output_field=django.contrib.postgres.fields.ranges.DateRangeField()), output_field=django.contrib.postgres.fields.ranges.DateRangeField())),
+                ('detected_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage_gaps', to='cars.car')),
+            ],
+            options={
+                'db_table': 'coverage_gap',
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['period'], name='idx_coverage_gap_period'), models.Index(fields=['car', 'gap_start'], name='idx_coverage_gap_car_start')],
+            },
+        ),
+    ]
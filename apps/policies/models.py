@@ -1,20 +1,53 @@
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from django.utils import timezone
 
 from apps.cars.models import Car
+from core.tracking import LoadedValuesMixin
 
 
-class InsurancePolicy(models.Model):
+def date_range(start, end):
+    """The inclusive daterange [start, end] as a query value; None leaves that end open."""
+    return models.Func(
+        models.Value(start, output_field=models.DateField()),
+        models.Value(end, output_field=models.DateField()),
+        models.Value("[]"),
+        function="daterange",
+        output_field=DateRangeField(),
+    )
+
+
+class InsurancePolicy(LoadedValuesMixin, models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='policies')
     provider = models.CharField(max_length=100, blank = True, null = True)
     start_date = models.DateField()
     end_date = models.DateField()
     
     logged_expiry_at = models.DateTimeField(blank = True, null = True)
+
+    # [start_date, end_date] as one daterange, maintained by PostgreSQL. Point-in-time
+    # and overlap queries use @> / && against the GiST index below.
+    coverage = models.GeneratedField(
+        expression=models.Func(
+            "start_date", "end_date", models.Value("[]"), function="daterange", output_field=DateRangeField()
+        ),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
     
     class Meta:
         db_table = 'insurance_policy'
-        indexes = [models.Index(fields=["car", "start_date", "end_date"], name="idx_policy_car_dates")]
+        indexes = [
+            models.Index(fields=["car", "start_date", "end_date"], name="idx_policy_car_dates"),
+            GistIndex(fields=["car", "coverage"], name="idx_policy_car_coverage"),
+            models.Index(fields=["logged_expiry_at", "id"], name="idx_policy_expiry_id"),
+            models.Index(
+                fields=["end_date", "id"],
+                condition=models.Q(logged_expiry_at__isnull=True),
+                name="idx_policy_unlogged_end",
+            ),
+        ]
         constraints = [models.CheckConstraint(check=models.Q(end_date__gte=models.F('start_date')), name='chk_policy_end_after_start')]
         
     def __str__(self):
@@ -30,4 +63,35 @@ class InsuranceExpiryLog(models.Model):
         constraints = [models.UniqueConstraint(fields=["policy"], name="uniq_expirylog_policy")] #each policy can have only one expiry log entry in the database
         
     def __str__(self):
-        return f"Expiry log for Policy #{self.policy.id} logged at {self.logged_at}"
\ No newline at end of file
+        return f"Expiry log for Policy #{self.policy.id} logged at {self.logged_at}"
+
+
+class CoverageGap(models.Model):
+    """
+    A period in which a car has no active policy, as found by the last run of
+    core.scheduler.detect_coverage_gaps. A NULL gap_end means no later policy
+    exists (the gap is open-ended); a NULL gap_start means the car never had one.
+    """
+
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name="coverage_gaps")
+    gap_start = models.DateField(blank=True, null=True)
+    gap_end = models.DateField(blank=True, null=True)
+    period = models.GeneratedField(
+        expression=models.Func(
+            "gap_start", "gap_end", models.Value("[]"), function="daterange", output_field=DateRangeField()
+        ),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
+    detected_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "coverage_gap"
+        indexes = [
+            GistIndex(fields=["period"], name="idx_coverage_gap_period"),
+            models.Index(fields=["car", "gap_start"], name="idx_coverage_gap_car_start"),
+        ]
+
+    def __str__(self):
+        return f"Coverage gap for car {self.car_id} ({self.gap_start or '-'} to {self.gap_end or '-'})"
+
@@ -0,0 +1,77 @@
+"""
+Optional database guarantee that a car's policies never overlap.
+
+The constraint is an EXCLUDE USING gist (car_id WITH =, coverage WITH &&)
+on insurance_policy. It is not part of the model's Meta because existing
+data may already contain overlapping policies: inspect them with
+`manage.py policy_overlap_constraint status`, clean them up, then `enable`.
+"""
+from contextlib import contextmanager
+
+from django.db import IntegrityError, connection, transaction
+from rest_framework.exceptions import ValidationError
+
+OVERLAP_CONSTRAINT_NAME = "excl_policy_car_coverage_overlap"
+OVERLAP_ERROR = "Policy overlaps an existing policy for this car."
+
+OVERLAPPING_POLICIES_SQL = """
+    SELECT a.car_id, a.id, b.id
+    FROM insurance_policy a
+    JOIN insurance_policy b ON b.car_id = a.car_id AND b.id > a.id AND b.coverage && a.coverage
+    ORDER BY a.car_id, a.id, b.id
+    LIMIT %s
+"""
+
+OVERLAP_COUNT_SQL = """
+    SELECT count(*) FROM insurance_policy a
+    JOIN insurance_policy b ON b.car_id = a.car_id AND b.id > a.id AND b.coverage && a.coverage
+"""
+
+
+def overlapping_policies(limit=100):
+    """(car_id, policy_id, other_policy_id) for overlapping pairs, at most `limit`."""
+    with connection.cursor() as cursor:
+        cursor.execute(OVERLAPPING_POLICIES_SQL, [limit])
+        return cursor.fetchall()
+
+
+def overlap_count():
+    with connection.cursor() as cursor:
+        cursor.execute(OVERLAP_COUNT_SQL)
+        return cursor.fetchone()[0]
+
+
+def overlap_constraint_enabled():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = 'insurance_policy'::regclass",
+            [OVERLAP_CONSTRAINT_NAME],
+        )
+        return cursor.fetchone() is not None
+
+
+def enable_overlap_constraint():
+    """Add the exclusion constraint; PostgreSQL refuses if overlaps remain."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE insurance_policy ADD CONSTRAINT {OVERLAP_CONSTRAINT_NAME} "
+            "EXCLUDE USING gist (car_id WITH =, coverage WITH &&)"
+        )
+
+
+def disable_overlap_constraint():
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE insurance_policy DROP CONSTRAINT IF EXISTS {OVERLAP_CONSTRAINT_NAME}")
+
+
+@contextmanager
+def overlap_as_validation_error():
+    """Report a violated overlap constraint as a 400 instead of a server error."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        diag = getattr(exc.__cause__, "diag", None)
+        if getattr(diag, "constraint_name", None) != OVERLAP_CONSTRAINT_NAME:
+            raise
+        raise ValidationError({"detail": OVERLAP_ERROR})
@@ -1,12 +1,13 @@
 from rest_framework import serializers
 
-from .models import InsurancePolicy
+from .models import CoverageGap, InsurancePolicy
+from .overlaps import overlap_as_validation_error
 
 
 class InsurancePolicySerializer(serializers.ModelSerializer):
     class Meta:
         model = InsurancePolicy
-        fields = '__all__'
+        exclude = ['coverage']
         read_only_fields = ["car"]
         
     def validate(self, data):
@@ -19,4 +20,19 @@ class InsurancePolicySerializer(serializers.ModelSerializer):
         if start_date and end_date and end_date < start_date:
             raise serializers.ValidationError("End date must be after start date.")
         
-        return data
\ No newline at end of file
+        return data
+
+    def create(self, validated_data):
+        with overlap_as_validation_error():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with overlap_as_validation_error():
+            return super().update(instance, validated_data)
+
+
+class CoverageGapSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CoverageGap
+        fields = ["id", "car", "gap_start", "gap_end", "detected_at"]
+
@@ -0,0 +1,71 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from apps.cars.cache import invalidate_car_history
+from apps.cars.summary import refresh_car_summaries_on_commit
+from apps.claims.rollups import provider_totals, providers_changed
+from core.tracking import previous_values
+from core.versioning import bump_version_on_commit
+
+from . import analytics, coverage
+from .models import InsurancePolicy
+
+# Fields deciding which policy a claim is attributed to (apps.claims.rollups).
+ATTRIBUTION_FIELDS = ("car_id", "provider", "start_date", "end_date")
+
+
+def policies_changed(car_ids):
+    """
+    Invalidate per-car data derived from policies.
+    Called by the model signals and by bulk writers that bypass them.
+    """
+    car_ids = set(car_ids)
+    for car_id in car_ids:
+        coverage.coverage_index.invalidate(car_id)
+        bump_version_on_commit(coverage.VERSION_NAMESPACE, car_id)
+        # Again once committed: a lookup in between may have reloaded the old rows,
+        # and this worker would not re-read the stamp before the index's TTL.
+        transaction.on_commit(partial(coverage.coverage_index.invalidate, car_id))
+        invalidate_car_history(car_id)
+    refresh_car_summaries_on_commit(car_ids)
+    if car_ids:
+        bump_version_on_commit(analytics.VERSION_NAMESPACE, analytics.VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=InsurancePolicy)
+def policy_changed(sender, instance, **kwargs):
+    policies_changed([instance.car_id])
+
+
+@receiver(pre_save, sender=InsurancePolicy)
+def remember_claim_attribution(sender, instance, raw=False, **kwargs):
+    instance._rollup_providers = None
+    if raw:
+        return
+    previous = previous_values(instance, ATTRIBUTION_FIELDS)
+    if previous == {field: getattr(instance, field) for field in ATTRIBUTION_FIELDS}:
+        return
+    car_ids = {instance.car_id, previous["car_id"]} if previous else {instance.car_id}
+    instance._rollup_providers = (car_ids, provider_totals(car_ids))
+
+
+@receiver(pre_delete, sender=InsurancePolicy)
+def remember_deleted_attribution(sender, instance, origin=None, **kwargs):
+    instance._rollup_providers = None
+    # When a car (or its owner) is deleted, its claims go too and take their rollups with them.
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is InsurancePolicy:
+        instance._rollup_providers = ({instance.car_id}, provider_totals([instance.car_id]))
+
+
+@receiver([post_save, post_delete], sender=InsurancePolicy)
+def reattribute_claims(sender, instance, **kwargs):
+    pending = getattr(instance, "_rollup_providers", None)
+    if pending is not None:
+        instance._rollup_providers = None
+        providers_changed(*pending)
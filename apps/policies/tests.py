@@ -10,7 +10,8 @@ from core.scheduler import log_policy_expirations
 
 @pytest.fixture
 def auth_client(db):
-    user = User.objects.create_user(username="tester", password="test1234")
+    # Staff see every owner's cars (core.scoping); customer scoping has its own tests.
+    user = User.objects.create_user(username="tester", password="test1234", is_staff=True)
     client = APIClient()
     client.force_authenticate(user=user)
     return client
@@ -111,3 +112,266 @@ def test_scheduler_idempotent_behavior():
 
     # Should be the same timestamp (unchanged)
     assert expired_policy.logged_expiry_at == first_log_time
+
+
+@pytest.mark.django_db
+def test_coverage_index_matches_database(settings, django_assert_num_queries):
+    from apps.policies.coverage import coverage_index
+
+    settings.COVERAGE_INDEX_ENABLED = True
+    coverage_index.clear()
+    today = timezone.now().date()
+    policy = InsurancePolicyFactory(
+        start_date=today - timezone.timedelta(days=10),
+        end_date=today - timezone.timedelta(days=5),
+    )
+    InsurancePolicyFactory(
+        car=policy.car,
+        start_date=today - timezone.timedelta(days=4),
+        end_date=today + timezone.timedelta(days=5),
+    )
+
+    assert coverage_index.is_covered(policy.car.id, today) is True
+    with django_assert_num_queries(0):
+        assert coverage_index.is_covered(policy.car.id, today - timezone.timedelta(days=10)) is True
+        assert coverage_index.is_covered(policy.car.id, today + timezone.timedelta(days=6)) is False
+
+
+@pytest.mark.django_db
+def test_coverage_index_invalidated_on_policy_change(settings, django_capture_on_commit_callbacks):
+    from apps.policies.coverage import coverage_index
+
+    settings.COVERAGE_INDEX_ENABLED = True
+    coverage_index.clear()
+    today = timezone.now().date()
+    policy = InsurancePolicyFactory(
+        start_date=today - timezone.timedelta(days=90),
+        end_date=today - timezone.timedelta(days=30),
+    )
+    assert coverage_index.is_covered(policy.car.id, today) is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        policy.end_date = today + timezone.timedelta(days=30)
+        policy.save()
+
+    assert coverage_index.is_covered(policy.car.id, today) is True
+
+
+@pytest.mark.django_db
+def test_coverage_index_reads_stamps_once_per_ttl_and_evicts_lru(monkeypatch):
+    from apps.policies import coverage
+    from apps.policies.models import InsurancePolicy
+    from core.versioning import bump_version
+
+    index = coverage.CoverageIndex(max_cars=2, stamp_ttl=60)
+    stamp_reads = []
+    get_version = coverage.get_version
+    monkeypatch.setattr(coverage, "get_version", lambda *key: stamp_reads.append(key) or get_version(*key))
+    today = timezone.now().date()
+    first, second, third = (InsurancePolicyFactory(start_date=today, end_date=today).car_id for _ in range(3))
+
+    assert index.is_covered(first, today) is True
+    assert index.is_covered(first, today) is True
+    assert len(stamp_reads) == 1  # the second lookup trusted the entry
+
+    # Another worker's write is seen once the entry's TTL has passed.
+    InsurancePolicy.objects.filter(car_id=first).update(start_date=today - timezone.timedelta(days=1))
+    bump_version(coverage.VERSION_NAMESPACE, first)
+    index.stamp_ttl = 0
+    assert index.is_covered(first, today - timezone.timedelta(days=1)) is True
+    index.stamp_ttl = 60
+
+    # A hit makes `first` the most recent entry, so `second` is evicted.
+    index.is_covered(second, today)
+    index.is_covered(first, today)
+    index.is_covered(third, today)
+    assert list(index._entries) == [first, third]
+
+
+@pytest.mark.django_db
+def test_scheduler_processes_expiries_in_chunks():
+    from apps.policies.models import InsuranceExpiryLog
+
+    yesterday = timezone.now().date() - timezone.timedelta(days=1)
+    policies = [InsurancePolicyFactory(end_date=yesterday) for _ in range(5)]
+    active = InsurancePolicyFactory(end_date=yesterday + timezone.timedelta(days=30))
+
+    assert log_policy_expirations(batch_size=2) == 5
+    assert InsuranceExpiryLog.objects.filter(policy__in=policies).count() == 5
+    active.refresh_from_db()
+    assert active.logged_expiry_at is None
+    assert log_policy_expirations(batch_size=2) == 0
+
+
+@pytest.mark.django_db
+def test_scheduler_expiry_shards_cover_the_fleet_once():
+    from apps.policies.models import InsuranceExpiryLog
+    from core.scheduler import car_id_shards
+
+    yesterday = timezone.now().date() - timezone.timedelta(days=1)
+    policies = [InsurancePolicyFactory(end_date=yesterday) for _ in range(7)]
+
+    shards = car_id_shards(3)
+    assert len(shards) == 3 and shards[0][0] is None and shards[-1][1] is None
+    assert sum(log_policy_expirations(car_id_range=shard) for shard in shards) == 7
+    assert InsuranceExpiryLog.objects.filter(policy__in=policies).count() == 7
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scheduler_expiry_shards_run_in_parallel_threads():
+    from apps.policies.models import InsuranceExpiryLog
+    from core.scheduler import log_policy_expirations_sharded
+
+    yesterday = timezone.now().date() - timezone.timedelta(days=1)
+    policies = [InsurancePolicyFactory(end_date=yesterday) for _ in range(7)]
+
+    assert log_policy_expirations_sharded(workers=3) == 7
+    assert InsuranceExpiryLog.objects.filter(policy__in=policies).count() == 7
+    assert log_policy_expirations_sharded(workers=3) == 0
+
+
+@pytest.mark.django_db
+def test_scheduler_lock_elects_a_single_leader():
+    from core.locking import AdvisoryLock
+
+    leader, standby = AdvisoryLock("test.scheduler"), AdvisoryLock("test.scheduler")
+    assert leader.acquire() and leader.is_held()
+    assert not standby.acquire()
+    leader.release()
+    assert standby.acquire()
+    standby.release()
+
+
+@pytest.mark.django_db
+def test_policy_export_ndjson_by_provider(auth_client):
+    import json
+
+    allianz = InsurancePolicyFactory(provider="Allianz")
+    InsurancePolicyFactory(provider="AXA")
+
+    response = auth_client.get("/api/policies/export/?output=ndjson&provider=Allianz")
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [allianz.id]
+    assert rows[0]["car_id"] == allianz.car_id
+
+
+@pytest.mark.django_db
+def test_coverage_analytics_sql_and_sweep_agree(auth_client, settings):
+    from apps.cars.models import Car
+    from apps.policies.analytics import sql_daily_coverage, sweep_daily_coverage
+
+    day = timezone.datetime(2025, 6, 1).date()
+    first = InsurancePolicyFactory(provider="Allianz", start_date=day, end_date=day + timezone.timedelta(days=9))
+    InsurancePolicyFactory(car=first.car, provider="Allianz", start_date=day + timezone.timedelta(days=5),
+                           end_date=day + timezone.timedelta(days=20))
+    InsurancePolicyFactory(car=first.car, provider="AXA", start_date=day + timezone.timedelta(days=11),
+                           end_date=day + timezone.timedelta(days=30))
+    InsurancePolicyFactory(provider="AXA", start_date=day + timezone.timedelta(days=2),
+                           end_date=day + timezone.timedelta(days=3))
+    never_insured = CarFactory()
+    Car.objects.update(created_at=timezone.make_aware(timezone.datetime(2025, 5, 1)))
+    Car.objects.filter(pk=never_insured.pk).update(created_at=timezone.make_aware(timezone.datetime(2025, 6, 2, 12)))
+
+    start, end = day - timezone.timedelta(days=1), day + timezone.timedelta(days=12)
+    sql = sql_daily_coverage(start, end)
+    assert sql == sweep_daily_coverage(start, end)
+    assert sql_daily_coverage(start, end, "AXA") == sweep_daily_coverage(start, end, "AXA")
+
+    by_date = {row["date"]: row for row in sql}
+    assert by_date["2025-05-31"] == {"date": "2025-05-31", "insured": 0, "uninsured": 2, "overlapping": {}}
+    assert by_date["2025-06-01"]["uninsured"] == 1  # the third car is not registered yet
+    assert by_date["2025-06-03"] == {"date": "2025-06-03", "insured": 2, "uninsured": 1, "overlapping": {}}
+    assert by_date["2025-06-07"]["overlapping"] == {"Allianz": 1}
+    assert all(type(row["uninsured"]) is int for row in sql)
+    # Overlaps across providers count under each of them.
+    assert by_date["2025-06-12"]["overlapping"] == {"Allianz": 1, "AXA": 1}
+
+    # A provider filter narrows the insured count, not who is uninsured.
+    axa = {row["date"]: row for row in sql_daily_coverage(start, end, "AXA")}
+    assert axa["2025-06-07"] == {"date": "2025-06-07", "insured": 0, "uninsured": 2, "overlapping": {}}
+    assert axa["2025-06-12"] == {"date": "2025-06-12", "insured": 1, "uninsured": 2, "overlapping": {"AXA": 1}}
+
+    response = auth_client.get(f"/api/policies/coverage/?from={start}&to={end}&provider=AXA")
+    assert response.status_code == 200
+    assert response.data["method"] == "sql"
+    assert sum(row["insured"] for row in response.data["days"]) == 4
+
+
+@pytest.mark.django_db
+def test_coverage_range_includes_both_end_dates(auth_client):
+    from apps.policies.models import InsurancePolicy
+
+    policy = InsurancePolicyFactory(start_date="2025-01-01", end_date="2025-01-31")
+    url = f"/api/cars/{policy.car.id}/insurance-valid/"
+
+    assert [auth_client.get(url, {"date": day}).data["valid"] for day in ("2024-12-31", "2025-01-01", "2025-01-31", "2025-02-01")] == [
+        False, True, True, False,
+    ]
+    assert InsurancePolicy.objects.get(pk=policy.pk).coverage.upper.isoformat() == "2025-02-01"  # canonical [start, end + 1)
+
+
+@pytest.mark.django_db
+def test_overlap_constraint_rejects_overlapping_policies(auth_client):
+    from django.core.management import CommandError, call_command
+    from django.db import connection
+
+    from apps.policies.overlaps import overlap_constraint_enabled, overlapping_policies
+
+    car = CarFactory()
+    first = InsurancePolicyFactory(car=car, start_date="2025-01-01", end_date="2025-06-30")
+    second = InsurancePolicyFactory(car=car, start_date="2025-06-30", end_date="2025-12-31")
+    InsurancePolicyFactory(car=car, start_date="2026-01-01", end_date="2026-12-31")  # adjacent, not overlapping
+
+    assert overlapping_policies() == [(car.id, first.id, second.id)]
+    with pytest.raises(CommandError):
+        call_command("policy_overlap_constraint", "enable")
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")
+        if cursor.fetchone() is None:
+            pytest.skip("btree_gist is not installed on this PostgreSQL server")
+
+    second.delete()
+    call_command("policy_overlap_constraint", "enable")
+    assert overlap_constraint_enabled()
+
+    payload = {"provider": "Allianz", "start_date": "2025-03-01", "end_date": "2025-03-31"}
+    response = auth_client.post(f"/api/cars/{car.id}/policies/", payload, format="json")
+    assert response.status_code == 400
+    assert response.data["detail"] == "Policy overlaps an existing policy for this car."
+
+
+@pytest.mark.django_db
+def test_coverage_gaps_job_and_endpoint(auth_client):
+    from datetime import date
+
+    from apps.policies.models import CoverageGap
+    from core.scheduler import detect_coverage_gaps
+
+    today = timezone.localdate()
+    lapsed = CarFactory()
+    InsurancePolicyFactory(car=lapsed, start_date=date(2020, 1, 1), end_date=date(2020, 3, 31))
+    InsurancePolicyFactory(car=lapsed, start_date=date(2020, 2, 1), end_date=date(2020, 2, 10))  # nested
+    InsurancePolicyFactory(car=lapsed, start_date=date(2020, 5, 1), end_date=date(2020, 12, 31))
+    never_insured = CarFactory()
+    expiring = CarFactory()
+    InsurancePolicyFactory(car=expiring, start_date=today - timezone.timedelta(days=100), end_date=today + timezone.timedelta(days=10))
+
+    assert detect_coverage_gaps(chunk_size=2) == 4
+    gaps = {(gap.car_id, gap.gap_start, gap.gap_end) for gap in CoverageGap.objects.all()}
+    assert gaps == {
+        (lapsed.id, date(2020, 4, 1), date(2020, 4, 30)),
+        (lapsed.id, date(2021, 1, 1), None),
+        (never_insured.id, None, None),
+        (expiring.id, today + timezone.timedelta(days=11), None),
+    }
+
+    def cars(query):
+        return [gap["car"] for gap in auth_client.get(f"/api/policies/coverage-gaps/?{query}").data["results"]]
+
+    assert cars("date=2020-04-15") == [lapsed.id, never_insured.id]
+    assert cars(f"within_days=5&car={expiring.id}") == []
+    assert cars(f"within_days=30&car={expiring.id}") == [expiring.id]
+    assert cars("from=2020-02-01&to=2020-02-28") == [never_insured.id]
+
+    assert detect_coverage_gaps() == 4  # reruns replace, not append
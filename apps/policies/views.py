@@ -1,19 +1,36 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from apps.cars.models import Car
+from core.dates import parse_date
+from core.export import (POLICY_EXPORT_FIELDS, export_response,
+                         parse_export_filters, parse_export_output,
+                         policy_export_queryset)
+from core.routing import ReplicaReadMixin
+from core.scoping import OwnerScopedMixin
 
-from .models import InsurancePolicy
-from .serializers import InsurancePolicySerializer
+from .analytics import daily_coverage
+from .models import CoverageGap, InsurancePolicy, date_range
+from .overlaps import overlap_as_validation_error
+from .serializers import CoverageGapSerializer, InsurancePolicySerializer
 
 
-class InsurancePolicyViewSet(viewsets.ModelViewSet):
+class InsurancePolicyViewSet(ReplicaReadMixin, OwnerScopedMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = InsurancePolicy.objects.all().order_by("-logged_expiry_at")
+    keyset_ordering = ("-logged_expiry_at", "-id")
     serializer_class = InsurancePolicySerializer
 
+    def get_keyset_ordering(self):
+        if self.action == "coverage_gaps":
+            return ("car_id", "id")
+        return self.keyset_ordering
+
     @action(detail=False, methods=["post"], url_path=r"cars/(?P<car_id>\d+)/policies")
     def create_policy_for_car(self, request, car_id=None):
         """
@@ -21,7 +38,7 @@ class InsurancePolicyViewSet(viewsets.ModelViewSet):
         Create a new insurance policy for a given car.
         """
         try:
-            car = Car.objects.get(pk=car_id)
+            car = self.owned_cars().get(pk=car_id)
         except Car.DoesNotExist:
             return Response({"detail": "Car not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -38,14 +55,83 @@ class InsurancePolicyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        policy = InsurancePolicy.objects.create(
-            car=car,
-            provider=serializer.validated_data.get("provider"),
-            start_date=start_date,
-            end_date=end_date,
-        )
+        with overlap_as_validation_error():
+            policy = InsurancePolicy.objects.create(
+                car=car,
+                provider=serializer.validated_data.get("provider"),
+                start_date=start_date,
+                end_date=end_date,
+            )
 
         return Response(
             InsurancePolicySerializer(policy).data,
             status=status.HTTP_201_CREATED,
         )
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        GET /api/policies/export?output=csv|ndjson&from=&to=&provider=&car=
+        Stream every matching policy without pagination.
+        """
+        output = parse_export_output(request.query_params)
+        queryset = self.scope_queryset(policy_export_queryset(parse_export_filters(request.query_params)))
+        return export_response(queryset, POLICY_EXPORT_FIELDS, output, "policies")
+
+    @action(detail=False, methods=["get"], url_path="coverage", permission_classes=[IsAdminUser])
+    def coverage(self, request):
+        """
+        GET /api/policies/coverage?from=YYYY-MM-DD&to=YYYY-MM-DD&provider=
+        Daily insured car counts (for `provider` when given), cars registered
+        by that day and insured by no one, and cars with overlapping policies
+        per provider, for every day of the window. Portfolio-wide, so staff
+        only.
+        """
+        start = parse_date(request.query_params.get("from"))
+        end = parse_date(request.query_params.get("to"))
+        if end < start:
+            raise ValidationError({"detail": "'to' must not be before 'from'."})
+        if (end - start).days + 1 > settings.COVERAGE_ANALYTICS_MAX_DAYS:
+            raise ValidationError({"detail": f"Window is limited to {settings.COVERAGE_ANALYTICS_MAX_DAYS} days."})
+
+        provider = request.query_params.get("provider") or None
+        result = daily_coverage(start, end, provider)
+        return Response(
+            {"from": start, "to": end, "provider": provider, **result},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="coverage-gaps")
+    def coverage_gaps(self, request):
+        """
+        GET /api/policies/coverage-gaps?date=YYYY-MM-DD | from=&to= | within_days=N [&car=]
+        Uninsured periods found by the last gap detection run: gaps containing
+        `date`, overlapping [from, to], or starting within the next N days.
+        """
+        params = request.query_params
+        queryset = self.scope_queryset(CoverageGap.objects.order_by("car_id", "id"))
+
+        if params.get("date"):
+            queryset = queryset.filter(period__contains=parse_date(params["date"]))
+        if params.get("within_days"):
+            try:
+                days = int(params["within_days"])
+            except ValueError:
+                raise ValidationError({"detail": "'within_days' must be an integer."})
+            if not 0 <= days <= settings.COVERAGE_ANALYTICS_MAX_DAYS:
+                raise ValidationError({"detail": f"'within_days' must be between 0 and {settings.COVERAGE_ANALYTICS_MAX_DAYS}."})
+            today = timezone.localdate()
+            queryset = queryset.filter(period__overlap=date_range(today, today + timezone.timedelta(days=days)))
+        if params.get("from") or params.get("to"):
+            start = parse_date(params["from"]) if params.get("from") else None
+            end = parse_date(params["to"]) if params.get("to") else None
+            queryset = queryset.filter(period__overlap=date_range(start, end))
+        if params.get("car"):
+            try:
+                queryset = queryset.filter(car_id=int(params["car"]))
+            except ValueError:
+                raise ValidationError({"detail": "'car' must be an integer."})
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(CoverageGapSerializer(page, many=True).data)
+
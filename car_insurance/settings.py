@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",  # Django REST Framework
     "apps.cars",
     "apps.policies",
@@ -52,10 +53,12 @@ INSTALLED_APPS = [
 # ---------------------------------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.QueryMetricsMiddleware",  # per-request SQL / latency metrics
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.routing.ReplicaPinningMiddleware",  # read-your-writes for replica reads
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -97,6 +100,24 @@ DATABASES = {
     }
 }
 
+# Read replicas (core.routing): same database and credentials as the primary,
+# one "host[:port]" each. Tests read the primary through every replica alias.
+POSTGRES_REPLICA_HOSTS = env.list("POSTGRES_REPLICA_HOSTS", default=[])
+for _index, _replica in enumerate(POSTGRES_REPLICA_HOSTS, start=1):
+    _host, _, _port = _replica.partition(":")
+    DATABASES[f"replica{_index}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "OPTIONS": {"connect_timeout": env.int("POSTGRES_REPLICA_CONNECT_TIMEOUT", default=2)},
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.routing.ReplicaRouter"]
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=5)  # primary-only reads after a client writes
+REPLICA_MAX_LAG_SECONDS = env.float("REPLICA_MAX_LAG_SECONDS", default=5.0)
+REPLICA_LAG_CHECK_INTERVAL = env.int("REPLICA_LAG_CHECK_INTERVAL", default=5)  # seconds between lag probes per process
+
 # ---------------------------------------------------------------------------
 # Caching: Redis
 # ---------------------------------------------------------------------------
@@ -108,6 +129,22 @@ CACHES = {
     }
 }
 
+# Car history read-through cache (apps.cars.cache)
+HISTORY_CACHE_TTL = env.int("HISTORY_CACHE_TTL", default=3600)
+
+# Per-worker policy coverage index (apps.policies.coverage)
+COVERAGE_INDEX_ENABLED = env.bool("COVERAGE_INDEX_ENABLED", default=False)
+COVERAGE_INDEX_MAX_CARS = env.int("COVERAGE_INDEX_MAX_CARS", default=100_000)
+COVERAGE_INDEX_STAMP_TTL = env.float("COVERAGE_INDEX_STAMP_TTL", default=1.0)  # seconds other workers' writes may go unseen
+
+# Portfolio coverage analytics (apps.policies.analytics)
+COVERAGE_ANALYTICS_CACHE_TTL = env.int("COVERAGE_ANALYTICS_CACHE_TTL", default=900)
+COVERAGE_ANALYTICS_SWEEP_DAYS = env.int("COVERAGE_ANALYTICS_SWEEP_DAYS", default=31)  # longer windows use NumPy
+COVERAGE_ANALYTICS_MAX_DAYS = env.int("COVERAGE_ANALYTICS_MAX_DAYS", default=3660)
+
+# Car and claim search result cache (core.search)
+SEARCH_CACHE_TTL = env.int("SEARCH_CACHE_TTL", default=300)
+
 # ---------------------------------------------------------------------------
 # Email: MailHog for development
 # ---------------------------------------------------------------------------
@@ -130,6 +167,12 @@ LANGUAGE_CODE = "en-us"
 # Time zone and scheduler
 TIME_ZONE = env.str("TIME_ZONE", default="Europe/Bucharest")
 SCHEDULER_ENABLED = env.bool("SCHEDULER_ENABLED", default=False)
+POLICY_EXPIRY_BATCH_SIZE = env.int("POLICY_EXPIRY_BATCH_SIZE", default=1000)
+POLICY_EXPIRY_WORKERS = env.int("POLICY_EXPIRY_WORKERS", default=1)  # car id shards run in parallel
+SCHEDULER_LOCK_NAME = env("SCHEDULER_LOCK_NAME", default="car_insurance.scheduler")
+COVERAGE_GAP_CHUNK_SIZE = env.int("COVERAGE_GAP_CHUNK_SIZE", default=5000)  # cars per transaction
+CAR_SUMMARY_CHUNK_SIZE = env.int("CAR_SUMMARY_CHUNK_SIZE", default=5000)  # cars per transaction
+PARTITION_MONTHS_AHEAD = env.int("PARTITION_MONTHS_AHEAD", default=3)  # monthly partitions kept ahead of today
 LOG_LEVEL = env.str("LOG_LEVEL", default="INFO")
 USE_I18N = True
 USE_TZ = True
@@ -142,12 +185,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # ---------------------------------------------------------------------------
 # Django REST Framework & JWT Authentication
 # ---------------------------------------------------------------------------
+# Basic auth verifies a PBKDF2 hash on every request; keep it off outside local debugging.
+API_BASIC_AUTH_ENABLED = env.bool("API_BASIC_AUTH_ENABLED", default=False)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.CachedJWTAuthentication",  # JWT, users resolved from cache
         "rest_framework.authentication.SessionAuthentication",  # for DRF UI login
-        "rest_framework.authentication.BasicAuthentication",    # optional
-    ),
+    ) + (("rest_framework.authentication.BasicAuthentication",) if API_BASIC_AUTH_ENABLED else ()),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",  # your default
     ),
@@ -162,6 +207,14 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# /metrics/ is open to staff, and to scrapers sending "Authorization: Token <METRICS_TOKEN>"
+# (disabled while empty).
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
+# Authenticated user cache (core.authentication)
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=300)
+AUTH_USER_LOCAL_TTL = env.int("AUTH_USER_LOCAL_TTL", default=5)  # seconds other workers may serve a stale user
+
 # ---------------------------------------------------------------------------
 # Structured Logging (structlog)
 # ---------------------------------------------------------------------------
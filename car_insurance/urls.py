@@ -17,16 +17,20 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
-from core.views import health_check
+from core.views import (BulkImportView, async_health_check, health_check,
+                        metrics)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", health_check, name="health"),
+    path("health/async/", async_health_check, name="health-async"),
+    path("metrics/", metrics, name="metrics"),
     
      # API routes
     path("api/", include("apps.cars.urls")),    
     path("api/", include("apps.accounts.urls")),
     path("api/", include("apps.policies.urls")),
     path("api/", include("apps.claims.urls")),
+    path("api/import/<str:dataset>/", BulkImportView.as_view(), name="bulk-import"),
     
 ]
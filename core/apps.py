@@ -11,6 +11,8 @@ class CoreConfig(AppConfig):
         """
         from django.conf import settings
 
+        from core import authentication  # noqa: F401  (user cache invalidation receivers)
+
         if getattr(settings, "SCHEDULER_ENABLED", False):
             from core.scheduler import start_scheduler
             start_scheduler()
@@ -0,0 +1,130 @@
+"""
+JWT authentication with cached user resolution.
+
+simplejwt's JWTAuthentication loads the user row on every request. Here the
+user is resolved through two cache tiers:
+
+  local   per-process dict, AUTH_USER_LOCAL_TTL seconds, no I/O at all
+  shared  Django cache (Redis), keyed by user id and the user's version
+          stamp, AUTH_USER_CACHE_TTL seconds
+
+Saving or deleting a user bumps the stamp ("auth-user", id) once the
+transaction commits, so the shared entry is never read again; other
+processes drop their local copy within AUTH_USER_LOCAL_TTL. The token checks
+simplejwt applies to a fresh row (active flag, revoke claim) run on the
+cached user on every request.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.versioning import aget_version, bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "auth-user"
+LOCAL_MAX_USERS = 10_000
+
+_local_users = {}  # user id -> (expires at, user)
+
+
+def _user_key(user_id, version):
+    return f"auth:user:{user_id}:{version}"
+
+
+def _lookup():
+    return get_user_model().objects.filter
+
+
+def _from_local(user_id):
+    entry = _local_users.get(user_id)
+    if entry is not None and entry[0] > time.monotonic():
+        # Each request gets its own copy; per-request attributes must not leak.
+        return copy.copy(entry[1])
+    return None
+
+
+def _remember_locally(user_id, user):
+    if len(_local_users) >= LOCAL_MAX_USERS:
+        _local_users.clear()
+    _local_users[user_id] = (time.monotonic() + settings.AUTH_USER_LOCAL_TTL, user)
+    return copy.copy(user)
+
+
+def resolve_user(user_id):
+    """Return the user with this USER_ID_FIELD value, or None; cached."""
+    user = _from_local(user_id)
+    if user is not None:
+        return user
+    key = _user_key(user_id, get_version(VERSION_NAMESPACE, user_id))
+    user = cache.get(key)
+    if user is None:
+        user = _lookup()(**{jwt_settings.USER_ID_FIELD: user_id}).first()
+        if user is None:
+            return None
+        cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TTL)
+    return _remember_locally(user_id, user)
+
+
+async def aresolve_user(user_id):
+    """Async resolve_user() for views running on the event loop."""
+    user = _from_local(user_id)
+    if user is not None:
+        return user
+    key = _user_key(user_id, await aget_version(VERSION_NAMESPACE, user_id))
+    user = await cache.aget(key)
+    if user is None:
+        user = await _lookup()(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            return None
+        await cache.aset(key, user, timeout=settings.AUTH_USER_CACHE_TTL)
+    return _remember_locally(user_id, user)
+
+
+def invalidate_user(user_id):
+    _local_users.pop(user_id, None)
+    bump_version_on_commit(VERSION_NAMESPACE, user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving users via resolve_user() instead of a query per request."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = resolve_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Covers password and is_active changes; logins only touch last_login.
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    invalidate_user(getattr(instance, jwt_settings.USER_ID_FIELD))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user(getattr(instance, jwt_settings.USER_ID_FIELD))
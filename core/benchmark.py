@@ -0,0 +1,199 @@
+"""
+In-process benchmark of the API hot paths.
+
+Requests go through Django's test client, so the full middleware, DRF and
+ORM stack is exercised without network noise. Every request records its
+latency and SQL query count; the report is plain JSON so it can be stored
+as a baseline and compared on the next release. Any response outside 2xx
+counts as an error: a run measuring 404s or 403s is not a benchmark.
+
+Car ids and list pages are sampled from what the benchmark user can see
+(its own cars, or the whole book for staff), so requests hit real rows
+rather than the owner-scoping or out-of-range page 404.
+
+The async mode drives the ASGI variants (ASYNC_ENDPOINTS) through
+AsyncClient with one asyncio task per concurrent client instead of one
+thread, which is how an ASGI server serves them.
+"""
+import asyncio
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import close_old_connections, connection, connections
+from django.test import AsyncClient, Client
+from django.utils import timezone
+
+from apps.cars.models import Car
+from apps.claims.models import Claim
+from core.middleware import QueryTracker, track_queries
+from core.scoping import scope_to_owner
+
+ENDPOINTS = {
+    "insurance-valid": lambda rng, ctx: (
+        f"/api/cars/{rng.choice(ctx['car_ids'])}/insurance-valid/"
+        f"?date={ctx['today'] - timezone.timedelta(days=rng.randint(0, 365))}"
+    ),
+    "history": lambda rng, ctx: f"/api/cars/{rng.choice(ctx['car_ids'])}/history/",
+    "car-list": lambda rng, ctx: f"/api/cars/?page={rng.randint(1, ctx['car_pages'])}",
+    "claim-list": lambda rng, ctx: f"/api/claims/?page={rng.randint(1, ctx['claim_pages'])}",
+    "health": lambda rng, ctx: "/health/",
+}
+
+ASYNC_ENDPOINTS = {
+    "insurance-valid": lambda rng, ctx: (
+        f"/api/async/cars/{rng.choice(ctx['car_ids'])}/insurance-valid/"
+        f"?date={ctx['today'] - timezone.timedelta(days=rng.randint(0, 365))}"
+    ),
+    "history": lambda rng, ctx: f"/api/async/cars/{rng.choice(ctx['car_ids'])}/history/",
+    "health": lambda rng, ctx: "/health/async/",
+}
+
+BENCHMARK_MODES = ("sync", "async")
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _sample_car_ids(user, limit=10000):
+    cars = scope_to_owner(Car.objects.all(), user)
+    return list(cars.order_by("?").values_list("id", flat=True)[:limit])
+
+
+def _page_count(queryset, page_size=10, limit=20):
+    """Pages of the default list page size, capped at `limit`; at least 1."""
+    return max(1, min(limit, math.ceil(queryset.count() / page_size)))
+
+
+def benchmark_context(user):
+    return {
+        "car_ids": _sample_car_ids(user),
+        "car_pages": _page_count(scope_to_owner(Car.objects.all(), user)),
+        "claim_pages": _page_count(scope_to_owner(Claim.objects.all(), user, "car")),
+        "today": timezone.localdate(),
+    }
+
+
+def _run_worker(user, endpoint, requests, seed, ctx, own_connection=False):
+    client = Client(SERVER_NAME="localhost")
+    client.force_login(user)
+    rng = random.Random(seed)
+    samples = []
+    try:
+        for _ in range(requests):
+            url = ENDPOINTS[endpoint](rng, ctx)
+            tracker = QueryTracker()
+            start = perf_counter()
+            with connection.execute_wrapper(tracker):
+                response = client.get(url)
+            samples.append((perf_counter() - start, tracker.count, response.status_code))
+    finally:
+        if own_connection:
+            # Pool threads open their own connections; release them.
+            connections.close_all()
+    return samples
+
+
+async def _run_async_worker(user, endpoint, requests, seed, ctx):
+    client = AsyncClient(SERVER_NAME="localhost")
+    await client.aforce_login(user)
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(requests):
+        url = ASYNC_ENDPOINTS[endpoint](rng, ctx)
+        tracker = QueryTracker()
+        start = perf_counter()
+        # Like the ASGI handler: each request gets its own thread for sync
+        # work, and that thread's connection is the one to track.
+        async with ThreadSensitiveContext():
+            tracking = await sync_to_async(track_queries)(tracker)
+            try:
+                response = await client.get(url)
+            finally:
+                await sync_to_async(_finish_async_request)(tracking)
+        samples.append((perf_counter() - start, tracker.count, response.status_code))
+    return samples
+
+
+def _finish_async_request(tracking):
+    tracking.close()
+    # What request_finished does under a real ASGI server; the test client skips it.
+    close_old_connections()
+
+
+async def _run_async_workers(user, endpoint, requests, concurrency, seed, ctx):
+    batches = await asyncio.gather(*[
+        _run_async_worker(user, endpoint, requests, seed + worker, ctx) for worker in range(concurrency)
+    ])
+    return [sample for batch in batches for sample in batch]
+
+
+def benchmark_endpoint(user, endpoint, requests=200, concurrency=1, warmup=20, seed=0, ctx=None, mode="sync"):
+    ctx = ctx or benchmark_context(user)
+    if not ctx["car_ids"]:
+        raise ValueError(f"User {user.pk} can see no cars; seed data first.")
+
+    per_worker = max(1, requests // concurrency)
+    if mode == "async":
+        asyncio.run(_run_async_workers(user, endpoint, warmup, 1, seed, ctx))
+        start = perf_counter()
+        samples = asyncio.run(_run_async_workers(user, endpoint, per_worker, concurrency, seed, ctx))
+        return _summarize(samples, concurrency, perf_counter() - start)
+
+    _run_worker(user, endpoint, warmup, seed, ctx)  # fill caches and connection pools
+    start = perf_counter()
+    if concurrency == 1:
+        samples = _run_worker(user, endpoint, per_worker, seed, ctx)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            batches = pool.map(
+                lambda worker: _run_worker(user, endpoint, per_worker, seed + worker, ctx, own_connection=True),
+                range(concurrency),
+            )
+            samples = [sample for batch in batches for sample in batch]
+    return _summarize(samples, concurrency, perf_counter() - start)
+
+
+def _summarize(samples, concurrency, elapsed):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[1] for sample in samples]
+    return {
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "errors": sum(1 for sample in samples if not 200 <= sample[2] < 300),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "queries": {"mean": round(sum(queries) / len(queries), 2), "max": max(queries)},
+    }
+
+
+def compare_to_baseline(report, baseline, max_regression=0.2):
+    """
+    Return a list of human-readable regressions: p95 latency or mean query
+    count worse than the baseline by more than `max_regression` (fraction).
+    """
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        for metric, now, before in (
+            ("p95 latency", current["latency_ms"]["p95"], previous["latency_ms"]["p95"]),
+            ("mean queries", current["queries"]["mean"], previous["queries"]["mean"]),
+        ):
+            if before and now > before * (1 + max_regression):
+                regressions.append(f"{endpoint}: {metric} {before} -> {now}")
+    return regressions
@@ -0,0 +1,27 @@
+"""Parsing of the YYYY-MM-DD dates taken by the API, the exports and their commands."""
+from datetime import datetime
+
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date(date_str):
+    if not date_str:
+        raise ValidationError({"detail": "Missing required query parameter: date"})
+
+    try:
+        date_obj = datetime.strptime(str(date_str), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({"detail": "Invalid date format. Expected YYYY-MM-DD."})
+
+    if not (1900 <= date_obj.year <= 2100):
+        raise ValidationError({"detail": "Date out of valid range (1900–2100)."})
+
+    return date_obj
+
+
+def parse_date_window(params):
+    """Optional ?from / ?to dates (inclusive) as a (from, to) pair."""
+    window = tuple(parse_date(params[name]) if params.get(name) else None for name in ("from", "to"))
+    if window[0] and window[1] and window[1] < window[0]:
+        raise ValidationError({"detail": "'to' must not be before 'from'."})
+    return window
@@ -0,0 +1,267 @@
+"""
+Bulk ingest of cars, policies and claims from CSV or NDJSON.
+
+Rows are handled in batches: every row is validated with the same
+serializer rules as the single-row endpoints, VINs / car ids are resolved
+with one query per batch, and valid rows are written with one
+`bulk_create` per batch. Invalid rows are reported by their 1-based row
+number and never abort the rest of the file. A batch the database rejects
+(e.g. a VIN inserted concurrently) is retried row by row, each in its own
+savepoint, so only the offending rows fail.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+import structlog
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.cars.models import Car
+from apps.cars.serializers import CarImportSerializer
+from apps.cars.signals import fleet_changed
+from apps.cars.summary import refresh_car_summaries_on_commit
+from apps.claims.models import Claim
+from apps.claims.rollups import claims_reattributed
+from apps.claims.serializers import ClaimSerializer
+from apps.claims.signals import claims_created
+from apps.policies.models import InsurancePolicy
+from apps.policies.serializers import InsurancePolicySerializer
+from apps.policies.signals import policies_changed
+from core.scoping import scope_to_owner
+
+logger = structlog.get_logger()
+
+INGEST_BATCH_SIZE = 1000
+INGEST_MAX_REPORTED_ERRORS = 1000
+INGEST_FORMATS = ("csv", "ndjson")
+
+# Errors reported for rows the database rejects, by SQLSTATE. Driver messages
+# name tables and constraints, so they are logged rather than returned.
+DATABASE_ERRORS = {
+    "23505": "Duplicates an existing record.",
+    "23P01": "Overlaps an existing record.",
+    "23503": "References a record that does not exist.",
+    "23514": "Violates a database check.",
+}
+DATABASE_ERROR_DEFAULT = "Rejected by the database."
+
+
+def read_rows(stream, input_format):
+    """Yield one dict per record from a binary stream, decoding line by line."""
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    if input_format == "csv":
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        # Malformed lines still count as a row so numbering stays aligned.
+        yield record if isinstance(record, dict) else {}
+
+
+class Importer:
+    model = None
+    serializer_class = None
+
+    def __init__(self, owner=None, batch_size=INGEST_BATCH_SIZE):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.serializer = self.serializer_class()
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while batch := list(islice(numbered, self.batch_size)):
+            self.import_batch(batch)
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+    def import_batch(self, batch):
+        pending = []
+        for number, row, extra in self.resolve(batch):
+            try:
+                pending.append((number, self.model(**self.serializer.run_validation(row), **extra)))
+            except ValidationError as exc:
+                self.reject(number, exc.detail)
+
+        if not pending:
+            return
+        try:
+            with transaction.atomic():
+                self.write([obj for _, obj in pending])
+        except IntegrityError:
+            pending = self.write_rows(pending)
+            if not pending:
+                return
+        objects = [obj for _, obj in pending]
+        self.created += len(objects)
+        self.record_created(pending)
+        self.after_write(objects)
+
+    def write_rows(self, pending):
+        """Write rows one savepoint at a time; returns the ones the database accepted."""
+        written = []
+        for number, obj in pending:
+            try:
+                with transaction.atomic():
+                    self.write([obj])
+            except IntegrityError as exc:
+                logger.info("Ingest row rejected by the database.", row=number, error=str(exc))
+                self.reject(number, {"detail": _database_error(exc)})
+                continue
+            written.append((number, obj))
+        return written
+
+    def resolve(self, batch):
+        """
+        Yield (row number, row, extra model kwargs) for rows worth validating.
+        By default every row, with nothing added; subclasses resolve references.
+        """
+        for number, row in batch:
+            yield number, row, {}
+
+    def write(self, objects):
+        """Insert a validated batch; runs inside the batch's transaction."""
+        self.model.objects.bulk_create(objects)
+
+    def record_created(self, pending):
+        """Hook receiving (row number, saved object) pairs of a written batch."""
+
+    def after_write(self, objects):
+        pass
+
+    def reject(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < INGEST_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": number, "errors": errors})
+
+
+class CarImporter(Importer):
+    model = Car
+    serializer_class = CarImportSerializer
+
+    def resolve(self, batch):
+        vins = {row.get("vin") for _, row in batch if row.get("vin")}
+        taken = set(Car.objects.filter(vin__in=vins).values_list("vin", flat=True))
+        for number, row in batch:
+            vin = row.get("vin")
+            if vin in taken:
+                self.reject(number, {"vin": ["Car with this vin already exists."]})
+                continue
+            if vin:
+                # Rows without a vin are left to the serializer to reject.
+                taken.add(vin)
+            yield number, row, {"owner": self.owner}
+
+    def after_write(self, objects):
+        fleet_changed()
+        refresh_car_summaries_on_commit(car.id for car in objects)
+
+
+class CarBoundImporter(Importer):
+    """
+    Rows reference their car by `car_id` or by `vin`. Through the API only
+    the uploader's own cars resolve (core.scoping); the command has no owner.
+    """
+
+    def cars(self):
+        if self.owner is None:
+            return Car.objects.all()
+        return scope_to_owner(Car.objects.all(), self.owner)
+
+    def resolve(self, batch):
+        vins = {row["vin"] for _, row in batch if row.get("vin") and not row.get("car_id")}
+        car_ids = {_as_int(row.get("car_id")) for _, row in batch if row.get("car_id")}
+        known_ids = set(self.cars().filter(id__in=car_ids - {None}).values_list("id", flat=True))
+        ids_by_vin = dict(self.cars().filter(vin__in=vins).values_list("vin", "id"))
+
+        for number, row in batch:
+            if row.get("car_id"):
+                car_id = _as_int(row["car_id"])
+                car_id = car_id if car_id in known_ids else None
+            else:
+                car_id = ids_by_vin.get(row.get("vin"))
+            if car_id is None:
+                self.reject_missing_car(number)
+                continue
+            yield number, row, {"car_id": car_id}
+
+    def reject_missing_car(self, number):
+        self.reject(number, {"car": ["Car not found."]})
+
+
+class PolicyImporter(CarBoundImporter):
+    model = InsurancePolicy
+    serializer_class = InsurancePolicySerializer
+
+    def write(self, objects):
+        # bulk_create sends no signals: re-attribute the cars' claims here.
+        with claims_reattributed(policy.car_id for policy in objects):
+            super().write(objects)
+
+    def after_write(self, objects):
+        policies_changed(policy.car_id for policy in objects)
+
+
+class ClaimImporter(CarBoundImporter):
+    model = Claim
+    serializer_class = ClaimSerializer
+
+    def after_write(self, objects):
+        claims_created(objects)
+
+
+class ClaimBatchImporter(ClaimImporter):
+    """
+    Claim submission from the batch endpoint: keeps one result per row
+    (created, invalid or unknown car) instead of a capped error report.
+    """
+
+    def __init__(self, owner=None, batch_size=INGEST_BATCH_SIZE):
+        super().__init__(owner=owner, batch_size=batch_size)
+        self.results = {}
+
+    def reject(self, number, errors):
+        super().reject(number, errors)
+        self.results.setdefault(number, {"status": 400, "errors": errors})
+
+    def reject_missing_car(self, number):
+        self.results[number] = {"status": 404, "errors": {"car": ["Car not found."]}}
+        super().reject_missing_car(number)
+
+    def record_created(self, pending):
+        for number, claim in pending:
+            self.results[number] = {
+                "status": 201,
+                "location": f"/api/cars/{claim.car_id}/claims/{claim.id}",
+                "claim": self.serializer.to_representation(claim),
+            }
+
+    def submit(self, items):
+        """Import `items` (dicts) and return per-item results in request order."""
+        summary = self.run(item if isinstance(item, dict) else {} for item in items)
+        results = [{"index": number - 1, **self.results[number]} for number in range(1, len(items) + 1)]
+        return {"created": summary["created"], "failed": summary["failed"], "results": results}
+
+
+IMPORTERS = {"cars": CarImporter, "policies": PolicyImporter, "claims": ClaimImporter}
+
+
+def _database_error(exc):
+    cause = exc.__cause__
+    code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    return DATABASE_ERRORS.get(code, DATABASE_ERROR_DEFAULT)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,56 @@
+"""
+Cluster-wide leader election with PostgreSQL session advisory locks.
+
+The lock lives on a dedicated connection, separate from the thread-local
+connections the jobs use, so it is held exactly as long as that session is
+alive: if the leader process dies or loses its database connection,
+PostgreSQL releases the lock and a standby can take over.
+"""
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+class AdvisoryLock:
+    def __init__(self, name, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.using = using
+        self.connection = None
+
+    def acquire(self):
+        """Try once to take the lock; returns True if this process now holds it."""
+        if self.connection is None:
+            self.connection = connections.create_connection(self.using)
+            # Leadership is checked from scheduler worker threads.
+            self.connection.inc_thread_sharing()
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtextextended(%s, 0))", [self.name])
+            acquired = cursor.fetchone()[0]
+        if not acquired:
+            self._close()
+        return acquired
+
+    def is_held(self):
+        """The lock is ours for as long as the session that took it is alive."""
+        if self.connection is None:
+            return False
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            return False
+        return True
+
+    def release(self):
+        if self.connection is None:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(hashtextextended(%s, 0))", [self.name])
+        except DatabaseError:
+            pass  # the session is gone, and the lock with it
+        finally:
+            self._close()
+
+    def _close(self):
+        self.connection.dec_thread_sharing()
+        self.connection.close()
+        self.connection = None
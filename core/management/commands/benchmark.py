@@ -0,0 +1,104 @@
+import json
+import platform
+import subprocess
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.cars.models import Car
+from apps.claims.models import Claim
+from apps.policies.models import InsurancePolicy
+from core.benchmark import (ASYNC_ENDPOINTS, BENCHMARK_MODES, ENDPOINTS,
+                            benchmark_endpoint, compare_to_baseline)
+from core.seeding import bulk_seed
+
+
+class Command(BaseCommand):
+    help = "Benchmark the API hot paths in-process and report latency / query counts as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=sorted(ENDPOINTS))
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--modes", nargs="+", choices=BENCHMARK_MODES, default=["sync"],
+                            help="'async' runs the ASGI variants; reported as 'async:<endpoint>'")
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--rng-seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this path (default: stdout)")
+        parser.add_argument("--baseline", help="Compare against a stored report; fail on regressions")
+        parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="Allowed relative slowdown vs. the baseline (default 0.2 = 20%%)")
+        parser.add_argument("--seed", action="store_true", help="Bulk-seed data before benchmarking")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--cars", type=int, default=100_000)
+        parser.add_argument("--policies", type=int, default=200_000)
+        parser.add_argument("--claims", type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.stderr.write("🌱 Bulk seeding benchmark data...")
+            bulk_seed(
+                users=options["users"], cars=options["cars"], policies=options["policies"],
+                claims=options["claims"], seed=options["rng_seed"], method="copy",
+                report=lambda model, written: self.stderr.write(f"  {model.__name__}: {written}"),
+            )
+
+        # A customer with cars: per-car endpoints are scoped to the requesting owner.
+        user = User.objects.filter(is_active=True, cars__isnull=False).order_by("id").first()
+        if user is None:
+            raise CommandError("The database has no users owning cars; run with --seed first.")
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "debug": settings.DEBUG,
+                "rows": {
+                    "cars": Car.objects.count(),
+                    "policies": InsurancePolicy.objects.count(),
+                    "claims": Claim.objects.count(),
+                },
+            },
+            "endpoints": {},
+        }
+        for mode in options["modes"]:
+            for endpoint in options["endpoints"]:
+                if mode == "async" and endpoint not in ASYNC_ENDPOINTS:
+                    continue
+                name = endpoint if mode == "sync" else f"{mode}:{endpoint}"
+                self.stderr.write(f"⏱  {name}...")
+                report["endpoints"][name] = benchmark_endpoint(
+                    user, endpoint, requests=options["requests"], concurrency=options["concurrency"],
+                    warmup=options["warmup"], seed=options["rng_seed"], mode=mode,
+                )
+
+        rendered = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(rendered)
+        else:
+            self.stdout.write(rendered)
+
+        failed = [f"{name}: {result['errors']}/{result['requests']}"
+                  for name, result in report["endpoints"].items() if result["errors"]]
+        if failed:
+            raise CommandError("Non-2xx responses:\n" + "\n".join(failed))
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as handle:
+                regressions = compare_to_baseline(report, json.load(handle), options["max_regression"])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("✅ No regressions against the baseline."))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
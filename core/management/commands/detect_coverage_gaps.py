@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.scheduler import detect_coverage_gaps
+
+
+class Command(BaseCommand):
+    help = "Recompute per-car coverage gaps for the whole fleet (also run daily by the scheduler)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="Cars per transaction")
+
+    def handle(self, *args, **options):
+        gaps = detect_coverage_gaps(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Stored {gaps} coverage gaps."))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.scheduler import car_id_shards, log_policy_expirations, log_policy_expirations_sharded
+
+
+class Command(BaseCommand):
+    help = (
+        "Log expired insurance policies now (run_scheduler also does this daily). "
+        "Use --shard/--shards to split the fleet across several hosts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.POLICY_EXPIRY_WORKERS,
+                            help="Parallel car id shards processed by this host")
+        parser.add_argument("--shards", type=int, help="Total number of car id shards across hosts")
+        parser.add_argument("--shard", type=int, help="Shard processed by this host (0-based)")
+
+    def handle(self, *args, **options):
+        shards, shard = options["shards"], options["shard"]
+        if (shards is None) != (shard is None):
+            raise CommandError("--shard and --shards go together.")
+        if shards is not None:
+            if not 0 <= shard < shards:
+                raise CommandError("--shard must be between 0 and --shards - 1.")
+            ranges = car_id_shards(shards)
+            # A fleet smaller than --shards leaves the trailing shards empty.
+            logged = log_policy_expirations(car_id_range=ranges[shard]) if shard < len(ranges) else 0
+        else:
+            logged = log_policy_expirations_sharded(workers=options["workers"])
+        self.stdout.write(self.style.SUCCESS(f"Logged {logged} expired policies."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.export import (CLAIM_EXPORT_FIELDS, EXPORT_CONTENT_TYPES,
+                         POLICY_EXPORT_FIELDS, claim_export_queryset,
+                         iter_export, parse_export_filters,
+                         policy_export_queryset)
+
+EXPORTS = {
+    "policies": (policy_export_queryset, POLICY_EXPORT_FIELDS),
+    "claims": (claim_export_queryset, CLAIM_EXPORT_FIELDS),
+}
+
+
+class Command(BaseCommand):
+    help = "Stream policies or claims to a CSV / NDJSON file (or stdout)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(EXPORTS))
+        parser.add_argument("--output", choices=sorted(EXPORT_CONTENT_TYPES), default="csv")
+        parser.add_argument("--file", help="Destination path (default: stdout)")
+        parser.add_argument("--from", dest="from", help="Start of date range (YYYY-MM-DD)")
+        parser.add_argument("--to", help="End of date range (YYYY-MM-DD)")
+        parser.add_argument("--provider")
+        parser.add_argument("--car", help="Car id")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        build_queryset, fields = EXPORTS[options["dataset"]]
+        try:
+            filters = parse_export_filters(options)
+        except ValidationError as exc:
+            raise CommandError(exc.detail["detail"])
+
+        rows = iter_export(build_queryset(filters), fields, options["output"], options["chunk_size"])
+        if options["file"]:
+            with open(options["file"], "w", newline="", encoding="utf-8") as handle:
+                handle.writelines(rows)
+            self.stderr.write(self.style.SUCCESS(f"✅ Exported {options['dataset']} to {options['file']}"))
+        else:
+            for row in rows:
+                self.stdout.write(row, ending="")
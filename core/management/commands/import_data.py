@@ -0,0 +1,38 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ingest import IMPORTERS, INGEST_BATCH_SIZE, INGEST_FORMATS, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import cars, policies or claims from a CSV / NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(IMPORTERS))
+        parser.add_argument("file")
+        parser.add_argument("--input", choices=INGEST_FORMATS, help="Default: from the file extension")
+        parser.add_argument("--owner", help="Username owning imported cars (required for cars)")
+        parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        input_format = options["input"] or ("ndjson" if options["file"].endswith((".ndjson", ".jsonl")) else "csv")
+        owner = None
+        if options["dataset"] == "cars":
+            if not options["owner"]:
+                raise CommandError("--owner is required when importing cars.")
+            try:
+                owner = User.objects.get(username=options["owner"])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user: {options['owner']}")
+
+        importer = IMPORTERS[options["dataset"]](owner=owner, batch_size=options["batch_size"])
+        with open(options["file"], "rb") as handle:
+            result = importer.run(read_rows(handle, input_format))
+
+        for error in result["errors"]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {result['created']} {options['dataset']} ({result['failed']} rows rejected)."
+        ))
@@ -0,0 +1,80 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.utils.timezone import localdate
+
+from core.partitioning import (PARTITIONED_TABLES, add_months,
+                               convert_to_partitioned, default_partition_rows,
+                               detach_partitions, ensure_partitions,
+                               is_partitioned, partitions)
+
+SCHEMA_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class Command(BaseCommand):
+    help = "Inspect, convert and maintain the monthly partitions of claim and insurance_expiry_log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("operation", choices=["status", "convert", "create", "detach", "archive"])
+        parser.add_argument("--table", choices=list(PARTITIONED_TABLES), help="Default: every table")
+        parser.add_argument("--ahead", type=int, help="Months to create after the current one")
+        parser.add_argument("--older-than", type=int, help="detach/archive: months ended this many months ago or earlier")
+        parser.add_argument("--schema", default="archive", help="archive: schema receiving detached partitions")
+
+    def handle(self, *args, **options):
+        operation = options["operation"]
+        tables = [options["table"]] if options["table"] else list(PARTITIONED_TABLES)
+        ahead = settings.PARTITION_MONTHS_AHEAD if options["ahead"] is None else options["ahead"]
+        current_month = localdate().replace(day=1)
+
+        if operation in ("detach", "archive"):
+            if options["older_than"] is None or options["older_than"] < 1:
+                raise CommandError("--older-than must be given and at least 1.")
+            if operation == "archive" and not SCHEMA_NAME_RE.match(options["schema"]):
+                raise CommandError("--schema must be a lowercase identifier.")
+
+        for table in tables:
+            partitioned = is_partitioned(table)
+            if operation == "status":
+                self.status(table, partitioned)
+                continue
+            if operation == "convert":
+                if partitioned:
+                    self.stdout.write(f"{table} is already partitioned.")
+                    continue
+                try:
+                    created, dropped = convert_to_partitioned(table, current_month, ahead)
+                except DatabaseError as exc:
+                    raise CommandError(f"Could not partition {table}: {exc}")
+                self.stdout.write(self.style.SUCCESS(f"{table} partitioned into {len(created)} monthly partitions."))
+                for name in dropped:
+                    self.stdout.write(f"  dropped unique constraint {name} (does not include the partition column)")
+                continue
+
+            if not partitioned:
+                self.stdout.write(f"{table} is not partitioned; run `partition_tables convert` first.")
+                continue
+            if operation == "create":
+                created = ensure_partitions(table, current_month, ahead)
+                self.stdout.write(self.style.SUCCESS(f"{table}: created {len(created)} partitions."))
+            else:
+                before = add_months(current_month, -options["older_than"])
+                schema = options["schema"] if operation == "archive" else None
+                detached = detach_partitions(table, before, archive_schema=schema)
+                target = f" into schema {schema}" if schema else ""
+                self.stdout.write(self.style.SUCCESS(f"{table}: detached {len(detached)} partitions{target}."))
+            for name in (created if operation == "create" else detached):
+                self.stdout.write(f"  {name}")
+
+    def status(self, table, partitioned):
+        if not partitioned:
+            self.stdout.write(f"{table}: not partitioned.")
+            return
+        months = partitions(table)
+        self.stdout.write(
+            f"{table}: {len(months)} monthly partitions, {default_partition_rows(table)} rows in the default partition."
+        )
+        for month, name, estimate in months:
+            self.stdout.write(f"  {name}  ~{estimate} rows")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from apps.policies.overlaps import (disable_overlap_constraint,
+                                    enable_overlap_constraint,
+                                    overlap_constraint_enabled, overlap_count,
+                                    overlapping_policies)
+
+
+class Command(BaseCommand):
+    help = "Inspect, enable or disable the constraint forbidding overlapping policies per car"
+
+    def add_arguments(self, parser):
+        parser.add_argument("operation", choices=["status", "enable", "disable"])
+        parser.add_argument("--limit", type=int, default=20, help="Overlapping pairs to list")
+
+    def handle(self, *args, **options):
+        operation = options["operation"]
+        if operation == "disable":
+            disable_overlap_constraint()
+            self.stdout.write(self.style.SUCCESS("Overlap constraint dropped."))
+            return
+
+        overlaps = overlap_count()
+        if operation == "status":
+            state = "enabled" if overlap_constraint_enabled() else "disabled"
+            self.stdout.write(f"Overlap constraint: {state}. Overlapping policy pairs: {overlaps}.")
+            for car_id, policy_id, other_id in overlapping_policies(options["limit"]):
+                self.stdout.write(f"  car {car_id}: policy {policy_id} overlaps policy {other_id}")
+            return
+
+        if overlap_constraint_enabled():
+            self.stdout.write("Overlap constraint is already enabled.")
+            return
+        if overlaps:
+            raise CommandError(
+                f"{overlaps} overlapping policy pairs must be resolved first; "
+                "list them with `policy_overlap_constraint status`."
+            )
+        try:
+            enable_overlap_constraint()
+        except DatabaseError as exc:
+            raise CommandError(f"Could not add the overlap constraint: {exc}")
+        self.stdout.write(self.style.SUCCESS("Overlap constraint enabled."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.claims.rollups import rebuild_claim_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the claim_rollup table from the claim table"
+
+    def handle(self, *args, **options):
+        rows = rebuild_claim_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} claim rollup rows."))
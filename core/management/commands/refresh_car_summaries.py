@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.scheduler import refresh_all_car_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the car_summary projection behind /api/cars/?view=summary (also run daily by the scheduler)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="Cars per transaction")
+
+    def handle(self, *args, **options):
+        refreshed = refresh_all_car_summaries(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} car summaries."))
@@ -0,0 +1,59 @@
+import sys
+import time
+
+import structlog
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.locking import AdvisoryLock
+from core.scheduler import add_scheduled_jobs
+
+logger = structlog.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the periodic jobs in a dedicated process. Start one per host: the processes elect a "
+        "leader through a PostgreSQL advisory lock and the others stand by until it goes away."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.POLICY_EXPIRY_WORKERS,
+                            help="Parallel car id shards for the policy expiry job")
+        parser.add_argument("--lock-name", default=settings.SCHEDULER_LOCK_NAME,
+                            help="Advisory lock shared by all scheduler processes")
+        parser.add_argument("--poll-interval", type=int, default=30,
+                            help="Seconds between lock attempts on standby and leadership checks")
+
+    def handle(self, *args, **options):
+        lock = AdvisoryLock(options["lock_name"])
+        interval = options["poll_interval"]
+
+        while not lock.acquire():
+            logger.info("Scheduler standing by; another process holds the lock.", lock=lock.name)
+            time.sleep(interval)
+        logger.info("Scheduler elected leader.", lock=lock.name, workers=options["workers"])
+
+        scheduler = BlockingScheduler(timezone="Europe/Bucharest")
+        add_scheduled_jobs(scheduler, expiry_workers=options["workers"])
+        lost = []
+
+        def check_leadership():
+            if not lock.is_held():
+                # The session (and with it the lock) is gone; a standby may already
+                # be leader, so stop rather than risk running the jobs twice.
+                logger.error("Scheduler lost its leadership lock; shutting down.", lock=lock.name)
+                lost.append(True)
+                scheduler.shutdown(wait=False)
+
+        scheduler.add_job(check_leadership, trigger="interval", seconds=interval, id="leadership_check_job")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            lock.release()
+        if lost:
+            # Non-zero so the supervisor restarts us as a standby.
+            sys.exit(1)
@@ -1,22 +1,47 @@
 import random
 
 from django.core.management.base import BaseCommand
+from faker import Faker
 
 from apps.accounts.factories import UserFactory
 from apps.cars.factories import CarFactory
 from apps.claims.factories import ClaimFactory
 from apps.policies.factories import InsurancePolicyFactory
+from core.seeding import SEED_CHUNK_SIZE, SEED_METHODS, bulk_seed
 
 
 class Command(BaseCommand):
-    help = "Seed database with mock data using factory_boy + Faker"
+    help = "Seed database with mock data using factory_boy + Faker, or in bulk with --bulk"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--cars", type=int, default=50)
+        parser.add_argument("--policies", type=int, default=50)
+        parser.add_argument("--claims", type=int, default=100)
+        parser.add_argument("--rng-seed", type=int, default=None, help="Seed for reproducible data")
+        parser.add_argument("--bulk", action="store_true",
+                            help="Generate rows in chunks and write them with bulk_create / COPY")
+        parser.add_argument("--method", choices=SEED_METHODS, default="copy", help="Write path for --bulk")
+        parser.add_argument("--workers", type=int, default=1, help="Processes used by --bulk")
+        parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("🌱 Seeding data..."))
 
-        users = UserFactory.create_batch(10)
-        cars = [CarFactory(owner=random.choice(users)) for _ in range(50)]
-        policies = [InsurancePolicyFactory(car=random.choice(cars)) for _ in range(50)]
-        claims = [ClaimFactory(car=random.choice(cars)) for _ in range(100)]
+        if options["bulk"]:
+            bulk_seed(
+                users=options["users"], cars=options["cars"], policies=options["policies"],
+                claims=options["claims"], seed=options["rng_seed"] or 0,
+                chunk_size=options["chunk_size"], method=options["method"], workers=options["workers"],
+                report=lambda model, written: self.stdout.write(f"  {model.__name__}: {written}"),
+            )
+        else:
+            if options["rng_seed"] is not None:
+                random.seed(options["rng_seed"])
+                Faker.seed(options["rng_seed"])
+            users = UserFactory.create_batch(options["users"])
+            cars = [CarFactory(owner=random.choice(users)) for _ in range(options["cars"])]
+            policies = [InsurancePolicyFactory(car=random.choice(cars)) for _ in range(options["policies"])]
+            claims = [ClaimFactory(car=random.choice(cars)) for _ in range(options["claims"])]
 
         self.stdout.write(self.style.SUCCESS("✅ Successfully seeded mock data."))
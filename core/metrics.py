@@ -0,0 +1,86 @@
+"""
+In-process metrics registry rendered in the Prometheus text format.
+
+Each worker keeps its own histograms; scrape every worker (or aggregate
+in Prometheus) to get the fleet-wide view.
+"""
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        position = bisect_left(self.buckets, value)
+        if position < len(self.buckets):
+            self.counts[position] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}  # name -> (help, buckets, {labels: Histogram})
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            self._families.setdefault(name, (help_text, buckets, {}))
+
+    def observe(self, name, labels, value):
+        _, buckets, series = self._families[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (help_text, _, series) in sorted(self._families.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key, le=_number(bound))} {cumulative}")
+                    lines.append(f'{name}_bucket{_labels(key, le="+Inf")} {histogram.total}')
+                    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.total}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for _, _, series in self._families.values():
+                series.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+registry.histogram("http_request_duration_seconds", "Total request latency.")
+registry.histogram("http_request_db_duration_seconds", "Time spent executing SQL per request.")
+registry.histogram("http_request_render_duration_seconds", "Response serialization (rendering) time.")
+registry.histogram("http_request_db_queries", "SQL queries executed per request.", QUERY_COUNT_BUCKETS)
@@ -1,5 +1,197 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination over a composite ordering such as
+    ("-claim_date", "-id"). The cursor carries the ordering values of the
+    last row, so every page is an index range scan starting where the
+    previous page ended: page N costs the same as page 1.
+
+    Views declare the ordering with `keyset_ordering` (or
+    `get_keyset_ordering()` when it depends on the action); the last field
+    must be unique (normally "id"). NULLs sort the PostgreSQL default way
+    (last when ascending, first when descending) so the matching B-tree
+    index applies.
+
+    The total count is opt-in via ?count=exact, or ?count=estimate which
+    reads planner statistics instead of running COUNT(*).
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    mode_query_param = "pagination"
+    default_ordering = ("-id",)
+    invalid_cursor_message = "Invalid cursor."
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return params.get(cls.mode_query_param) == "cursor" or cls.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in self.get_keyset_ordering(view)
+        ]
+        self.page_size = self.get_page_size(request)
+        self.count, self.count_estimated = self.get_count(queryset, request)
+
+        queryset = queryset.order_by(*[
+            F(name).desc(nulls_first=True) if descending else F(name).asc(nulls_last=True)
+            for name, descending in self.ordering
+        ])
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, queryset.model))
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_keyset_ordering(self, view):
+        if hasattr(view, "get_keyset_ordering"):
+            return view.get_keyset_ordering()
+        return getattr(view, "keyset_ordering", self.default_ordering)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": None}
+        if self.count is not None:
+            payload["count"] = self.count
+            payload["count_estimated"] = self.count_estimated
+        payload["results"] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    # -- cursor ---------------------------------------------------------------
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [
+            last[name] if isinstance(last, dict) else getattr(last, name)
+            for name, _ in self.ordering
+        ]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def encode_cursor(self, values):
+        encoded = json.dumps([_cursor_value(value) for value in values])
+        return base64.urlsafe_b64encode(encoded.encode()).decode()
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def after(self, position, model=None):
+        """Rows strictly after `position` in the declared ordering."""
+        condition = None
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, position):
+            if value is None:
+                # NULLs come first when descending, last when ascending.
+                beyond = Q(**{f"{name}__isnull": False}) if descending else None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                beyond = Q(**{f"{name}__lt" if descending else f"{name}__gt": value})
+                if not descending and _nullable(model, name):
+                    beyond |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if beyond is not None:
+                condition = equal & beyond if condition is None else condition | (equal & beyond)
+            equal &= same
+
+        # The OR chain alone gives the planner no range to start from, so it
+        # would walk the index from the top. A redundant bound on the leading
+        # column becomes the Index Cond that starts the scan at the cursor.
+        (name, descending), value = self.ordering[0], position[0]
+        if value is not None:
+            lead = Q(**{f"{name}__lte" if descending else f"{name}__gte": value})
+            if not descending and _nullable(model, name):
+                lead |= Q(**{f"{name}__isnull": True})
+            condition &= lead
+        return condition
+
+    # -- count ----------------------------------------------------------------
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return queryset.count(), False
+        if mode == "estimate":
+            return estimate_count(queryset), True
+        return None, False
+
+
+def _nullable(model, name):
+    """Whether `name` may hold NULLs; annotations and unknown names are assumed to."""
+    try:
+        return model._meta.get_field(name).null
+    except (AttributeError, FieldDoesNotExist):
+        return True
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def estimate_count(queryset):
+    """
+    Row estimate from planner statistics: pg_class.reltuples for an unfiltered
+    table, otherwise the top-level row estimate of the query plan.
+    """
+    with connections[queryset.db].cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table has been vacuumed or analyzed.
+            if row and row[0] >= 0:
+                return row[0]
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -7,7 +199,17 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'  # allow clients to set custom size
     max_page_size = 100                # limit the max items per page
 
+    def paginate_queryset(self, queryset, request, view=None):
+        # Clients opt into keyset pagination per request with ?pagination=cursor
+        # (or by following a `next` link that carries a cursor).
+        self.keyset = KeysetPagination() if KeysetPagination.is_requested(request) else None
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,
             'total_pages': self.page.paginator.num_pages,
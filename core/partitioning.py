@@ -0,0 +1,233 @@
+"""
+Monthly range partitioning of the tables that only ever grow:
+
+    claim                 by claim_date
+    insurance_expiry_log  by logged_at (months in UTC)
+
+Partitioning is opt-in, like the policy overlap constraint: migrations
+create plain tables, and `manage.py partition_tables convert` rebuilds one
+as a partitioned table during a maintenance window. From then on
+`partition_tables create` (also run daily by the scheduler) keeps the
+coming months' partitions in place, and `partition_tables detach` /
+`archive` take old months out of the live table.
+
+Partitions are named <table>_pYYYY_MM and hold one calendar month. A
+<table>_default partition catches rows outside every month; they are moved
+into a month's partition when it is created. Queries bounded on the
+partition column (?from / ?to on the claim list and car history) only scan
+the months they touch.
+
+PostgreSQL requires unique constraints on a partitioned table to include
+the partition column, so the primary key becomes (id, column) and unique
+constraints without the column are dropped. For insurance_expiry_log that
+is the one-log-per-policy constraint; log_policy_expirations still logs a
+policy once, as it only picks (and locks) policies with logged_expiry_at
+unset. Ids come from a plain sequence, as identity columns on partitioned
+tables need PostgreSQL 17.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+# table -> (partition column, bound suffix turning a date into a column value)
+PARTITIONED_TABLES = {
+    "claim": ("claim_date", ""),
+    "insurance_expiry_log": ("logged_at", " 00:00:00+00"),
+}
+PARTITION_NAME_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+INDEXES_SQL = """
+    SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+    WHERE i.indrelid = %s::regclass
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+"""
+
+CONSTRAINTS_SQL = """
+    SELECT conname, contype, pg_get_constraintdef(oid),
+           ARRAY(SELECT attname FROM pg_attribute WHERE attrelid = conrelid AND attnum = ANY(conkey))
+    FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('u', 'f')
+"""
+
+FOREIGN_KEYS_SQL = "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'"
+
+PARTITIONS_SQL = """
+    SELECT c.relname, c.reltuples::bigint FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = %s::regclass ORDER BY c.relname
+"""
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def _bound(table, month):
+    return f"'{month.isoformat()}{PARTITIONED_TABLES[table][1]}'"
+
+
+def _month_range(table, month):
+    return f"FOR VALUES FROM ({_bound(table, month)}) TO ({_bound(table, add_months(month, 1))})"
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cursor.fetchone() is not None
+
+
+def partitions(table):
+    """(month, name, estimated rows) of the table's monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL, [table])
+        rows = cursor.fetchall()
+    months = []
+    for name, estimate in rows:
+        match = PARTITION_NAME_RE.search(name)
+        if match and name == partition_name(table, date(int(match[1]), int(match[2]), 1)):
+            months.append((date(int(match[1]), int(match[2]), 1), name, max(estimate, 0)))
+    return sorted(months)
+
+
+def default_partition_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {default_partition_name(table)}")
+        return cursor.fetchone()[0]
+
+
+def create_partition(cursor, table, month):
+    """
+    Add the partition for `month`. Rows of that month already in the default
+    partition are moved into it first: ATTACH refuses while any remain.
+    """
+    column = PARTITIONED_TABLES[table][0]
+    name = partition_name(table, month)
+    lower, upper = _bound(table, month), _bound(table, add_months(month, 1))
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default_partition_name(table)} "
+        f"WHERE {column} >= {lower} AND {column} < {upper} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} {_month_range(table, month)}")
+
+
+def ensure_partitions(table, first_month, months_ahead):
+    """Create the missing partitions from `first_month` through `months_ahead` later; returns their names."""
+    existing = {month for month, _, _ in partitions(table)}
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first_month, offset)
+        if month in existing:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            create_partition(cursor, table, month)
+        created.append(partition_name(table, month))
+    return created
+
+
+def convert_to_partitioned(table, current_month, months_ahead):
+    """
+    Rebuild `table` as a partitioned table in one transaction, holding an
+    ACCESS EXCLUSIVE lock throughout: one partition per month present in the
+    data plus the current and `months_ahead` following months, a default
+    partition, then the rows, keys and indexes. Returns (partitions created,
+    unique constraints dropped).
+    """
+    column = PARTITIONED_TABLES[table][0]
+    old = f"{table}_unpartitioned"
+    sequence = f"{table}_id_seq"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        # Deferred foreign key checks still pending would keep the old table from being dropped.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        # Captured before the rename, so the definitions already name the new table.
+        cursor.execute(INDEXES_SQL, [table])
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(CONSTRAINTS_SQL, [table])
+        constraints = cursor.fetchall()
+        cursor.execute(f"SELECT COALESCE(max(id), 0) + 1 FROM {table}")
+        next_id = cursor.fetchone()[0]
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', {column})::date FROM {table}")
+        months = {row[0] for row in cursor.fetchall()}
+        months.update(add_months(current_month, offset) for offset in range(months_ahead + 1))
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({column})"
+        )
+        for month in sorted(months):
+            cursor.execute(
+                f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} {_month_range(table, month)}"
+            )
+        cursor.execute(f"CREATE TABLE {default_partition_name(table)} PARTITION OF {table} DEFAULT")
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        # Frees the old key, index and identity sequence names for reuse.
+        cursor.execute(f"DROP TABLE {old}")
+
+        cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, next_id])
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})")
+        dropped = []
+        for name, kind, definition, columns in constraints:
+            if kind == "u" and column not in columns:
+                dropped.append(name)
+                continue
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        for definition in indexes:
+            cursor.execute(definition)
+        # Autovacuum never analyzes a partitioned parent.
+        cursor.execute(f"ANALYZE {table}")
+    return [partition_name(table, month) for month in sorted(months)], dropped
+
+
+def detach_partitions(table, before, archive_schema=None):
+    """
+    Detach the monthly partitions ending on or before `before` (a month
+    start), moving them to `archive_schema` if given. Detached tables keep
+    their rows but lose their foreign keys, so they never block deleting a
+    car or policy; returns their names.
+
+    Detached claims leave every aggregate with the partition: claim rollups,
+    car summaries and cached car histories cover the live table only, as a
+    rebuild from it would.
+    """
+    detached = []
+    for month, name, _ in partitions(table):
+        if add_months(month, 1) > before:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Holds off writes (parent first, the order DETACH locks in) so the
+            # aggregates subtract exactly the rows that leave.
+            cursor.execute(f"LOCK TABLE {table} IN SHARE MODE")
+            if table == "claim":
+                _forget_claims(cursor, name)
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+            cursor.execute(FOREIGN_KEYS_SQL, [name])
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {constraint}")
+            if archive_schema:
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+        detached.append(name)
+    return detached
+
+
+def _forget_claims(cursor, name):
+    from apps.claims.rollups import remove_claims_in
+    from apps.claims.signals import claims_changed
+
+    remove_claims_in(name)
+    cursor.execute(f"SELECT DISTINCT car_id FROM {name}")
+    # Refreshes the cars' summaries and bumps their history stamps on commit.
+    claims_changed(car_id for (car_id,) in cursor.fetchall())
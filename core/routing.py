@@ -0,0 +1,187 @@
+"""
+Read-replica routing.
+
+Replicas are extra DATABASES aliases listed in DATABASE_REPLICAS (built
+from POSTGRES_REPLICA_HOSTS). Nothing reads from them by default: the
+car, policy and claim viewsets (ReplicaReadMixin) and the async views opt
+in per request, and only for safe methods or actions declared read-only.
+For that request, ReplicaRouter sends ORM reads to one replica. Writes
+always go to the primary.
+
+  read-your-writes  A request that may have written pins its user to the
+                    primary for REPLICA_PIN_SECONDS (ReplicaPinningMiddleware,
+                    shared through the cache, so every process honours it).
+  lag               Each process probes a replica's replay lag at most once
+                    per REPLICA_LAG_CHECK_INTERVAL seconds. Replicas further
+                    behind than REPLICA_MAX_LAG_SECONDS, or unreachable, are
+                    skipped; with none left, reads stay on the primary.
+
+The chosen alias lives in a context variable, so it covers async ORM calls
+made through sync_to_async as well. Code that reads through a raw cursor
+or after the view has returned (streamed bodies) should resolve the alias
+up front with `Model.objects.db`.
+
+Anything cached under a version stamp (history, coverage index, search
+pages, coverage analytics) is loaded inside primary_reads(), and stamp
+based ETags are left off replica responses: a lagging replica can serve
+rows older than a stamp that has already been bumped, which would then be
+cached as current until the TTL runs out.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import structlog
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = structlog.get_logger()
+
+# Lag is 0 on a primary, or on a standby that has replayed all it received.
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_read_alias = ContextVar("read_alias", default=None)
+_replica_lag = {}  # alias -> (checked at, lag in seconds)
+
+
+def _pin_key(user_id):
+    return f"replica:pin:{user_id}"
+
+
+def pin_to_primary(user):
+    cache.set(_pin_key(user.pk), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user.pk)) is not None
+
+
+def replica_lag(alias):
+    """Replay lag of `alias` in seconds (infinite when unreachable), memoised per process."""
+    checked = _replica_lag.get(alias)
+    if checked is not None and checked[0] > time.monotonic() - settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except DatabaseError as exc:
+        logger.warning("Replica unavailable.", alias=alias, error=str(exc))
+        lag = float("inf")
+    _replica_lag[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def read_alias_for(user):
+    """A replica fresh enough for `user` to read from, or None for the primary."""
+    if not settings.DATABASE_REPLICAS or is_pinned(user):
+        return None
+    fresh = [alias for alias in settings.DATABASE_REPLICAS if replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS]
+    return random.choice(fresh) if fresh else None
+
+
+@contextmanager
+def reading_from(alias):
+    """Route ORM reads in this context to `alias` (None: the primary)."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def primary_reads():
+    """Context reading from the primary; wraps every load cached under a version stamp."""
+    return reading_from(None)
+
+
+def reading_from_replica():
+    return _read_alias.get() is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin serving safe requests (and the actions listed in
+    `replica_read_actions`, e.g. read-only POSTs) from a replica.
+    """
+
+    replica_read_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS or self.action in self.replica_read_actions:
+            # Tells ReplicaPinningMiddleware this request did not write.
+            request._request.read_only = True
+            self._replica_token = _read_alias.set(read_alias_for(request.user))
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                _read_alias.reset(self._replica_token)
+
+
+class ReplicaPinningMiddleware:
+    """Pins users to the primary after any request that may have written."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._may_have_written(request):
+            self._pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._may_have_written(request):
+            await sync_to_async(self._pin)(request)
+        return response
+
+    @staticmethod
+    def _may_have_written(request):
+        # Checked before touching request.user, which may need a query.
+        return bool(settings.DATABASE_REPLICAS) and request.method not in SAFE_METHODS and not getattr(
+            request, "read_only", False
+        )
+
+    @staticmethod
+    def _pin(request):
+        # DRF copies the user it authenticated (JWT included) onto the Django request.
+        if request.user.is_authenticated:
+            pin_to_primary(request.user)
@@ -1,42 +1,186 @@
 #import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import structlog
 from apscheduler.schedulers.background import BackgroundScheduler
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, connections, transaction
 from django.utils.timezone import localdate, now
 
+from apps.cars.summary import refresh_car_summary_range
+from apps.policies.gaps import car_id_chunks, refresh_coverage_gaps
 from apps.policies.models import InsuranceExpiryLog, InsurancePolicy
+from core.partitioning import PARTITIONED_TABLES, ensure_partitions, is_partitioned
 
 #logger = logging.getLogger(__name__)
 logger = structlog.get_logger()
 
-def log_policy_expirations():
+def log_policy_expirations(batch_size=None, car_id_range=None):
     """
     Logs expiration of insurance policies that have ended before today
     and have not yet been logged.
+
+    Expiring policies are processed in id order, in chunks of `batch_size`,
+    each chunk in its own short transaction: one locking SELECT, one
+    bulk INSERT of log rows and one UPDATE. Progress is therefore committed
+    chunk by chunk, and a rerun after an interruption resumes with the
+    policies that are still unlogged. Returns the number of policies logged.
+
+    `car_id_range` is an inclusive (first, last) pair, either end None for
+    unbounded, restricting the run to one shard of the fleet.
     """
+    batch_size = batch_size or settings.POLICY_EXPIRY_BATCH_SIZE
     today = localdate()
-    logger.info(f"Starting insurance policy expiration logging task.")
-    with transaction.atomic():
-        already_logged_ids = InsuranceExpiryLog.objects.values_list('policy_id', flat=True)
-        expiring_policies = (
-            InsurancePolicy.objects
-            .select_for_update(skip_locked=True)
-            .filter(end_date__lte=today, logged_expiry_at__isnull=True)
-            .exclude(id__in=already_logged_ids)  # Ensure no existing log
+    logger.info(
+        "Starting insurance policy expiration logging task.", batch_size=batch_size, car_id_range=car_id_range
+    )
+    expiring = InsurancePolicy.objects.filter(end_date__lte=today, logged_expiry_at__isnull=True)
+    if car_id_range is not None:
+        first, last = car_id_range
+        if first is not None:
+            expiring = expiring.filter(car_id__gte=first)
+        if last is not None:
+            expiring = expiring.filter(car_id__lte=last)
+    last_id = 0
+    total = 0
+    while True:
+        with transaction.atomic():
+            policy_ids = list(
+                expiring
+                .select_for_update(skip_locked=True)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not policy_ids:
+                break
+            logged_at = now()
+            # The unique constraint on policy makes re-logging a no-op (on a
+            # partitioned log, the logged_expiry_at filter and row lock do).
+            InsuranceExpiryLog.objects.bulk_create(
+                [InsuranceExpiryLog(policy_id=policy_id, logged_at=logged_at) for policy_id in policy_ids],
+                ignore_conflicts=True,
+            )
+            InsurancePolicy.objects.filter(id__in=policy_ids).update(logged_expiry_at=logged_at)
+        last_id = policy_ids[-1]
+        total += len(policy_ids)
+        logger.info(
+            "Logged policy expirations chunk.",
+            count=len(policy_ids), first_id=policy_ids[0], last_id=last_id,
         )
-        for policy in expiring_policies:
-            InsuranceExpiryLog.objects.create(policy=policy, logged_at=now())
-            policy.logged_expiry_at = now()
-            policy.save(update_fields=['logged_expiry_at'])
-            logger.info(f"Logged expiration for InsurancePolicy id={policy.id} for car {policy.car.id}.")
-    logger.info("Policy expiry job completed.")
+    logger.info("Policy expiry job completed.", logged=total, car_id_range=car_id_range)
+    return total
+
+
+CAR_ID_SHARDS_SQL = """
+    SELECT max(id) FROM (SELECT id, ntile(%s) OVER (ORDER BY id) AS shard FROM car) AS cars
+    GROUP BY shard ORDER BY shard
+"""
+
+
+def car_id_shards(shards):
+    """
+    Split the fleet into `shards` contiguous car id ranges holding about the
+    same number of cars. The first and last ranges are open-ended, so cars
+    added after the split still belong to a shard.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(CAR_ID_SHARDS_SQL, [max(1, shards)])
+        bounds = [row[0] for row in cursor.fetchall()][:-1]
+    firsts = [None] + [bound + 1 for bound in bounds]
+    lasts = bounds + [None]
+    return list(zip(firsts, lasts))
+
+
+def _expiry_shard_worker(car_id_range):
+    try:
+        return log_policy_expirations(car_id_range=car_id_range)
+    finally:
+        # Django connections are per thread: close the one this shard opened.
+        connections.close_all()
+
+
+def log_policy_expirations_sharded(workers=None):
+    """
+    Runs log_policy_expirations over `workers` car id shards in parallel
+    threads, each with its own database connection. The work is a handful
+    of statements per chunk, so threads keep the database busy without
+    forking from the scheduler's thread. Returns the total number of
+    policies logged.
+    """
+    workers = workers or settings.POLICY_EXPIRY_WORKERS
+    if workers <= 1:
+        return log_policy_expirations()
+    shards = car_id_shards(workers)
+    with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="expiry-shard") as pool:
+        return sum(pool.map(_expiry_shard_worker, shards))
+
+
+def detect_coverage_gaps(chunk_size=None):
+    """
+    Recomputes the coverage_gap table for the whole fleet, `chunk_size` cars
+    at a time. Each chunk replaces its cars' gaps in one transaction with a
+    single INSERT ... SELECT, so readers always see a complete set of gaps
+    per car. Returns the number of gaps stored.
+    """
+    chunk_size = chunk_size or settings.COVERAGE_GAP_CHUNK_SIZE
+    detected_at = now()
+    logger.info("Starting coverage gap detection task.", chunk_size=chunk_size)
+    total = 0
+    for first_id, last_id in car_id_chunks(chunk_size):
+        gaps = refresh_coverage_gaps(first_id, last_id, detected_at)
+        total += gaps
+        logger.info("Detected coverage gaps chunk.", gaps=gaps, first_car_id=first_id, last_car_id=last_id)
+    logger.info("Coverage gap job completed.", gaps=total)
+    return total
+
+
+def refresh_all_car_summaries(chunk_size=None):
+    """
+    Recomputes car_summary for the whole fleet as of today, `chunk_size`
+    cars per transaction. Returns the number of summaries written.
+    """
+    chunk_size = chunk_size or settings.CAR_SUMMARY_CHUNK_SIZE
+    logger.info("Starting car summary refresh task.", chunk_size=chunk_size)
+    total = 0
+    for first_id, last_id in car_id_chunks(chunk_size):
+        total += refresh_car_summary_range(first_id, last_id)
+    logger.info("Car summary refresh completed.", refreshed=total)
+    return total
+
+
+def create_future_partitions(months_ahead=None):
+    """
+    Makes sure every partitioned table (core.partitioning) has partitions
+    for the current month and the next `months_ahead`, so new rows never
+    land in the default partition. Returns the names of those created.
+    """
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current_month = localdate().replace(day=1)
+    created = []
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(table):
+            created += ensure_partitions(table, current_month, months_ahead)
+    logger.info("Partition maintenance completed.", created=created)
+    return created
     
     
+def add_scheduled_jobs(scheduler, expiry_workers=1):
+    """Registers the periodic jobs on an APScheduler instance."""
+    scheduler.add_job(log_policy_expirations_sharded, trigger = 'interval', minutes = 1440, next_run_time=now(), kwargs={"workers": expiry_workers}, id="log_policy_expirations_job", replace_existing=True)
+    scheduler.add_job(detect_coverage_gaps, trigger = 'interval', minutes = 1440, next_run_time=now(), id="detect_coverage_gaps_job", replace_existing=True)
+    # Right after midnight: the active policy and next expiry depend on the date.
+    scheduler.add_job(refresh_all_car_summaries, trigger = 'cron', hour = 0, minute = 5, next_run_time=now(), id="refresh_car_summaries_job", replace_existing=True)
+    scheduler.add_job(create_future_partitions, trigger = 'cron', hour = 0, minute = 15, next_run_time=now(), id="create_future_partitions_job", replace_existing=True)
+
+
 def start_scheduler():
     """
-    Starts the background scheduler to run periodic tasks.
+    Starts the background scheduler to run periodic tasks inside this process.
+    Prefer `manage.py run_scheduler`, which elects a single leader across
+    processes and hosts.
     """
     scheduler = BackgroundScheduler(timezone="Europe/Bucharest")
-    scheduler.add_job(log_policy_expirations, trigger = 'interval', minutes = 1440, next_run_time=now(), id="log_policy_expirations_job", replace_existing=True)
+    add_scheduled_jobs(scheduler)
     scheduler.start()
     logger.info("Background scheduler started.")    
\ No newline at end of file
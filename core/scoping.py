@@ -0,0 +1,62 @@
+"""
+Per-owner scoping for the car, policy and claim viewsets.
+
+Customers see only rows belonging to cars they own; staff see the whole
+book. Car lists are served by idx_car_owner_created. Policies and claims
+are scoped by first resolving the owner's car ids (an index-only scan of
+the same index) and filtering on car_id = ANY(ids): a join on car.owner_id
+lets the planner walk the child table's global ordering index and discard
+other owners' rows, which costs in proportion to the whole book, while
+the id list is answered from the car-leading index of the child table and
+costs in proportion to that owner's data.
+"""
+from django.shortcuts import get_object_or_404
+
+from apps.cars.models import Car
+
+
+def sees_all_cars(user):
+    return user.is_staff
+
+
+def scope_key(user):
+    """Cache / ETag component separating results visible to different users."""
+    return "all" if sees_all_cars(user) else f"owner-{user.pk}"
+
+
+def owned_car_ids(user):
+    return list(Car.objects.filter(owner=user).values_list("id", flat=True))
+
+
+def scope_to_owner(queryset, user, car_lookup=None):
+    """
+    Rows of `queryset` visible to `user`. `car_lookup` is the relation from
+    the model to Car ("car" for policies and claims); None for Car itself.
+    """
+    if sees_all_cars(user):
+        return queryset
+    if car_lookup is None:
+        return queryset.filter(owner=user)
+    return queryset.filter(**{f"{car_lookup}__in": owned_car_ids(user)})
+
+
+class OwnerScopedMixin:
+    """Viewset mixin scoping get_queryset() to the requesting user's cars."""
+
+    car_lookup = "car"
+
+    def get_queryset(self):
+        return self.scope_queryset(super().get_queryset())
+
+    def scope_queryset(self, queryset):
+        return scope_to_owner(queryset, self.request.user, self.car_lookup)
+
+    def get_owned_car(self, car_id):
+        """The car `car_id` if the user may see it, else 404 (existence is not disclosed)."""
+        return get_object_or_404(self.owned_cars(), pk=car_id)
+
+    def owned_cars(self):
+        return scope_to_owner(Car.objects.all(), self.request.user)
+
+    def owner_scope_key(self):
+        return scope_key(self.request.user)
@@ -0,0 +1,142 @@
+"""
+Indexed search over cars and claims, shared by the `search` viewset actions
+and the admin changelists.
+
+Cars match on VIN, make, model and owner username. Filters run on
+UPPER(column), the expression both kinds of car index are built on:
+
+  prefix     UPPER(col) LIKE 'TERM%' uses a text_pattern_ops B-tree index; the
+             only match for terms shorter than TRIGRAM_MIN_LENGTH
+  substring  LIKE '%TERM%' and the fuzzy operators use pg_trgm GIN indexes,
+  / fuzzy    which cannot narrow terms shorter than three characters
+
+Owners are resolved to ids first (idx_car_owner_created), so each branch of
+the car filter has an index and the planner can combine them in a BitmapOr
+instead of scanning the table. Claims match on description through a
+tsvector expression index.
+
+Results are ranked and cached per query string under the collection's
+version stamp, so any write to cars (or claims) retires cached pages.
+Ranks are cast from real to double precision: keyset cursors carry the
+rank back as a float8 literal, which a real value never equals exactly,
+so rows tied with the cursor's rank would be skipped or repeated.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity,
+                                            TrigramWordSimilarity)
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest, Upper
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from apps.cars.conditional import LIST_KEY as CARS_KEY
+from apps.cars.conditional import LIST_NAMESPACE as CARS_NAMESPACE
+from apps.cars.models import Car
+from apps.claims.models import Claim
+from core.routing import primary_reads
+from core.versioning import get_version
+
+SEARCH_QUERY_PARAM = "q"
+SEARCH_MAX_LENGTH = 100
+# Trigram indexes cannot narrow shorter terms; those only match as prefixes.
+TRIGRAM_MIN_LENGTH = 3
+OWNER_MATCH_LIMIT = 200
+
+# Bumped by apps.claims.signals on every claim write.
+CLAIMS_NAMESPACE = "claims"
+CLAIMS_KEY = "all"
+
+# Must match the expression of idx_claim_description_fts.
+CLAIM_DOCUMENT = SearchVector("description", config="english")
+
+
+def parse_search_term(params):
+    term = " ".join(params.get(SEARCH_QUERY_PARAM, "").split())
+    if not term:
+        raise ValidationError({"detail": "Missing required query parameter: q"})
+    if len(term) > SEARCH_MAX_LENGTH:
+        raise ValidationError({"detail": f"q must be at most {SEARCH_MAX_LENGTH} characters."})
+    return term
+
+
+def car_search_filter(term):
+    """Q matching cars by VIN prefix, or fuzzily by VIN, make, model or owner."""
+    needle = term.upper()
+    condition = Q(vin_upper__startswith=needle.replace(" ", ""))
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return condition | Q(make_upper__startswith=needle) | Q(model_upper__startswith=needle)
+
+    owner_ids = list(
+        User.objects.alias(username_upper=Upper("username"))
+        .filter(Q(username_upper__contains=needle) | Q(username_upper__trigram_similar=needle))
+        .values_list("id", flat=True)[:OWNER_MATCH_LIMIT]
+    )
+    condition |= (
+        Q(vin_upper__trigram_similar=needle)
+        | Q(make_upper__contains=needle) | Q(make_upper__trigram_word_similar=needle)
+        | Q(model_upper__contains=needle) | Q(model_upper__trigram_word_similar=needle)
+    )
+    if owner_ids:
+        condition |= Q(owner_id__in=owner_ids)
+    return condition
+
+
+def with_car_search_columns(queryset):
+    """Alias the UPPER() expressions the trigram indexes are built on."""
+    return queryset.alias(vin_upper=Upper("vin"), make_upper=Upper("make"), model_upper=Upper("model"))
+
+
+def car_search_queryset(term, queryset=None):
+    """Matching cars ranked by their best trigram similarity to `term`."""
+    needle = Value(term.upper())
+    queryset = with_car_search_columns(queryset if queryset is not None else Car.objects.all())
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        rank = Value(1.0, output_field=FloatField())  # prefix matches only; all equally good
+    else:
+        rank = Cast(
+            Greatest(
+                TrigramSimilarity("vin_upper", needle),
+                TrigramWordSimilarity(needle, "make_upper"),
+                TrigramWordSimilarity(needle, "model_upper"),
+            ),
+            FloatField(),
+        )
+    return queryset.filter(car_search_filter(term)).annotate(rank=rank)
+
+
+def claim_search_query(term):
+    return SearchQuery(term, config="english", search_type="websearch")
+
+
+def claim_search_queryset(term, queryset=None):
+    """Claims whose description matches `term` (web search syntax), ranked."""
+    query = claim_search_query(term)
+    queryset = queryset if queryset is not None else Claim.objects.all()
+    return (
+        queryset.annotate(document=CLAIM_DOCUMENT)
+        .filter(document=query)
+        .annotate(rank=Cast(SearchRank(F("document"), query), FloatField()))
+    )
+
+
+def cached_search_response(view, request, queryset, serializer_class, namespace, key, scope):
+    """
+    Paginate and serialize `queryset` through `view`, caching the response
+    body per full query string and visibility `scope` (see core.scoping)
+    under the current (namespace, key) stamp.
+    """
+    stamp = get_version(namespace, key)
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    cache_key = f"search:{namespace}:{scope}:{stamp}:{digest}"
+    data = cache.get(cache_key)
+    if data is None:
+        with primary_reads():
+            page = view.paginate_queryset(queryset)
+            data = view.get_paginated_response(serializer_class(page, many=True).data).data
+        cache.set(cache_key, data, timeout=settings.SEARCH_CACHE_TTL)
+    return Response(data)
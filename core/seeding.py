@@ -0,0 +1,207 @@
+"""
+Bulk data generation for performance work.
+
+Rows are built in memory in chunks and written either with one
+`bulk_create` per chunk or with PostgreSQL `COPY`, which is orders of
+magnitude faster than creating objects through the factories one INSERT
+at a time. Generation is driven by a seeded RNG so the same parameters
+produce the same distribution of data.
+
+Work can be split across processes: each worker owns a disjoint slice of
+row numbers, and VINs / usernames are derived from a shared run tag plus
+the row number, so they are unique without any coordination (and without
+Faker's `unique` proxy, which remembers every value it ever produced).
+"""
+import io
+import multiprocessing
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.cars.factories import MAKES_MODELS
+from apps.cars.models import Car
+from apps.cars.signals import fleet_changed
+from apps.claims.factories import CLAIM_DESCRIPTIONS
+from apps.claims.models import Claim
+from apps.claims.rollups import rebuild_claim_rollups
+from apps.policies.factories import PROVIDERS
+from apps.policies.models import InsurancePolicy
+from core.scheduler import refresh_all_car_summaries
+
+SEED_CHUNK_SIZE = 5000
+SEED_PASSWORD = "Test1234!"
+SEED_METHODS = ("bulk_create", "copy")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _copy_text(value):
+    # PostgreSQL parses the str() form of dates, datetimes, decimals and bools.
+    if value is None:
+        return "\\N"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy_chunk(model, chunk):
+    """
+    COPY a chunk of unsaved instances. Primary keys are drawn from the
+    table's sequence up front so the caller gets ids back, as with bulk_create.
+    """
+    table = model._meta.db_table
+    fields = [field for field in model._meta.concrete_fields if not field.generated]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [table, len(chunk)],
+        )
+        for obj, (pk,) in zip(chunk, cursor.fetchall()):
+            obj.id = pk
+
+        buffer = io.StringIO()
+        for obj in chunk:
+            buffer.write("\t".join(_copy_text(field.pre_save(obj, True)) for field in fields) + "\n")
+        buffer.seek(0)
+        columns = ", ".join(quote_name(field.column) for field in fields)
+        cursor.copy_expert(f"COPY {quote_name(table)} ({columns}) FROM STDIN", buffer)
+    return chunk
+
+
+def _write(model, objects, chunk_size, method, report):
+    ids = []
+    for chunk in _chunks(objects, chunk_size):
+        with transaction.atomic():
+            if method == "copy":
+                written = _copy_chunk(model, chunk)
+            else:
+                written = model.objects.bulk_create(chunk)
+        ids.extend(obj.id for obj in written)
+        if report:
+            report(model, len(ids))
+    return ids
+
+
+def _spread(total, workers, worker):
+    """Half-open [start, stop) slice of `total` rows owned by `worker`."""
+    return total * worker // workers, total * (worker + 1) // workers
+
+
+def _share(total, workers, worker):
+    start, stop = _spread(total, workers, worker)
+    return stop - start
+
+
+def _seed_slice(spec):
+    """Seed one worker's share. `spec` is a plain dict so it pickles across processes."""
+    rng = random.Random(spec["seed"])
+    today = timezone.localdate()
+    tag, method, chunk_size, report = spec["tag"], spec["method"], spec["chunk_size"], spec.get("report")
+    makes = list(MAKES_MODELS)
+
+    user_ids = _write(User, (
+        User(username=f"seed.{tag.lower()}.{n}", email=f"seed.{tag.lower()}.{n}@example.com",
+             password=spec["password"])
+        for n in range(*spec["users"])
+    ), chunk_size, method, report)
+
+    car_ids = _write(Car, (
+        Car(
+            vin=f"{tag}{n:012d}",
+            make=(make := rng.choice(makes)),
+            model=rng.choice(MAKES_MODELS[make]),
+            year_of_manufacture=rng.randint(2000, today.year),
+            owner_id=rng.choice(user_ids),
+        )
+        for n in range(*spec["cars"])
+    ), chunk_size, method, report)
+
+    def _policy():
+        start = today - timedelta(days=rng.randint(-30, 3 * 365))
+        return InsurancePolicy(
+            car_id=rng.choice(car_ids),
+            provider=rng.choice(PROVIDERS),
+            start_date=start,
+            end_date=start + timedelta(days=rng.choice((90, 180, 365, 365, 365))),
+        )
+
+    _write(InsurancePolicy, (_policy() for _ in range(spec["policies"])), chunk_size, method, report)
+
+    _write(Claim, (
+        Claim(
+            car_id=rng.choice(car_ids),
+            claim_date=today - timedelta(days=rng.randint(0, 3 * 365)),
+            description=rng.choice(CLAIM_DESCRIPTIONS),
+            amount=Decimal(rng.randint(20000, 1000000)) / 100,
+        )
+        for _ in range(spec["claims"])
+    ), chunk_size, method, report)
+
+
+def _seed_worker(spec):
+    try:
+        _seed_slice(spec)
+    finally:
+        connections.close_all()
+    return spec["worker"]
+
+
+def bulk_seed(users=100, cars=1000, policies=2000, claims=5000, seed=0,
+              chunk_size=SEED_CHUNK_SIZE, method="bulk_create", workers=1, report=None):
+    """
+    Insert the requested number of rows and return the counts written.
+
+    `report(model, rows_written_so_far)` is called after every chunk when
+    running in a single process. With `workers > 1` the rows are split
+    across forked processes, each with its own database connection.
+    """
+    if method not in SEED_METHODS:
+        raise ValueError(f"method must be one of {SEED_METHODS}")
+    workers = max(1, min(workers, users or 1, cars or 1))
+    shared = {
+        # A per-run tag keeps usernames and VINs unique across repeated runs.
+        "tag": uuid.uuid4().hex[:5].upper(),
+        "password": make_password(SEED_PASSWORD),  # hashed once, shared by every user
+        "method": method,
+        "chunk_size": chunk_size,
+    }
+    specs = [
+        {
+            **shared,
+            "worker": worker,
+            "seed": seed + worker,
+            "users": _spread(users, workers, worker),
+            "cars": _spread(cars, workers, worker),
+            "policies": _share(policies, workers, worker),
+            "claims": _share(claims, workers, worker),
+        }
+        for worker in range(workers)
+    ]
+
+    if workers == 1:
+        _seed_slice({**specs[0], "report": report})
+    else:
+        # Forked children must not share the parent's open connection.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            list(pool.map(_seed_worker, specs))
+
+    fleet_changed()
+    if claims:
+        rebuild_claim_rollups()
+    refresh_all_car_summaries()
+    return {"users": users, "cars": cars, "policies": policies, "claims": claims}
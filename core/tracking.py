@@ -0,0 +1,54 @@
+"""
+What a model instance held when it was last loaded or saved.
+
+Signal handlers that turn an update into deltas (claim rollups, provider
+attribution, make/model moves) need the row's previous values. Models
+using LoadedValuesMixin remember them from the query that loaded the
+instance, so an update costs no extra SELECT; previous_values() falls back
+to one only for instances built by hand with an existing primary key.
+"""
+
+
+class LoadedValuesMixin:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if kwargs.get("update_fields") is None:
+            self._remember_values()
+        else:
+            self._loaded_values = None
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._remember_values()
+        else:
+            # Partial writes and refreshes leave the other fields' stored values
+            # unknown (they may hold unsaved changes); previous_values() will query.
+            self._loaded_values = None
+
+    def _remember_values(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+
+def previous_values(instance, fields):
+    """
+    {attname: value} of `fields` as stored before the pending save, or None
+    for a row not in the table yet. Call it from pre_save.
+    """
+    if instance.pk is None:
+        return None
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if all(field in loaded for field in fields):
+        return {field: loaded[field] for field in fields}
+    return type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first()
@@ -0,0 +1,50 @@
+"""
+Per-object version stamps kept in the shared cache.
+
+Writers bump a stamp after their transaction commits; readers compare the
+stamp they built a derived value from with the current one. Every worker
+sees the same stamps, so derived data cached in one process is never served
+after another process changed the underlying rows.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(namespace, pk):
+    return f"version:{namespace}:{pk}"
+
+
+def _new_token():
+    return f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+
+def get_version(namespace, pk):
+    """Return the current stamp, creating one if it was never set or was evicted."""
+    key = _version_key(namespace, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_token(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(namespace, pk):
+    """Async get_version() for views running on the event loop."""
+    key = _version_key(namespace, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_token(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(namespace, pk):
+    cache.set(_version_key(namespace, pk), _new_token(), timeout=None)
+
+
+def bump_version_on_commit(namespace, pk):
+    """Bump once the surrounding transaction commits (immediately in autocommit)."""
+    transaction.on_commit(lambda: bump_version(namespace, pk))
@@ -1,16 +1,34 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import (BasePermission, IsAdminUser,
+                                        IsAuthenticated)
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.cars.cache import history_cache_stats
+from core.ingest import IMPORTERS, INGEST_FORMATS, read_rows
+from core.metrics import registry
 
-def health_check(request):
-    db_status = "ok"
-    cache_status = "ok"
 
+def _database_status():
     try:
         connection.ensure_connection()
     except Exception:
-        db_status = "error"
+        return "error"
+    return "ok"
+
+
+def health_check(request):
+    db_status = _database_status()
+    cache_status = "ok"
 
     try:
         cache.set("health", "ok", timeout=5)
@@ -23,3 +41,81 @@ def health_check(request):
         "database": db_status,
         "cache": cache_status
     })
+
+
+async def async_health_check(request):
+    """health_check for ASGI deployments; does not tie up a worker thread on the cache."""
+    db_status = await sync_to_async(_database_status)()
+    cache_status = "ok"
+
+    try:
+        await cache.aset("health", "ok", timeout=5)
+        await cache.aget("health")
+    except Exception:
+        cache_status = "error"
+
+    return JsonResponse({
+        "status": "ok",
+        "database": db_status,
+        "cache": cache_status
+    })
+
+
+class HasMetricsToken(BasePermission):
+    """A scraper sending `Authorization: Token <METRICS_TOKEN>`; nobody while the setting is empty."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(request.headers.get("Authorization", ""), f"Token {token}")
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser | HasMetricsToken])
+def metrics(request):
+    """
+    Per-route request histograms in the Prometheus text exposition format.
+    Route names, query counts and cache ratios describe the deployment, so
+    only staff and the configured scraper may read them.
+    """
+    lines = [registry.render()]
+    try:
+        cache_stats = history_cache_stats()
+    except Exception:
+        cache_stats = None
+    if cache_stats is not None:
+        lines.append("# HELP car_history_cache_requests_total Car history cache lookups.\n")
+        lines.append("# TYPE car_history_cache_requests_total counter\n")
+        for result in ("hits", "misses"):
+            lines.append(f'car_history_cache_requests_total{{result="{result}"}} {cache_stats[result]}\n')
+    return HttpResponse("".join(lines), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class BulkImportView(APIView):
+    """
+    POST /api/import/{cars|policies|claims}
+    Body: the raw file (Content-Type text/csv or application/x-ndjson),
+    or a multipart upload in the "file" field with ?input=csv|ndjson.
+    Imported cars are owned by the requesting user.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, dataset):
+        if dataset not in IMPORTERS:
+            raise NotFound(f"Unknown dataset: {dataset}")
+
+        if request.content_type.startswith("multipart/"):
+            stream = request.FILES.get("file")
+            if stream is None:
+                raise ValidationError({"file": "No file uploaded."})
+            input_format = request.query_params.get("input", "csv")
+        else:
+            stream = request.stream
+            input_format = "ndjson" if "ndjson" in request.content_type else "csv"
+        if input_format not in INGEST_FORMATS:
+            raise ValidationError({"input": f"Expected one of: {', '.join(INGEST_FORMATS)}."})
+
+        importer = IMPORTERS[dataset](owner=request.user)
+        result = importer.run(read_rows(stream or [], input_format))
+        return Response(result, status=status.HTTP_200_OK)